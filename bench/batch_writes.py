@@ -0,0 +1,73 @@
+"""Benchmark: bulk Convex mutations against a loop of single-row mutations.
+
+Run with `python -m bench.batch_writes [round trip ms]`. Uses the in-process
+fake backend with an injected round trip (default 40ms), so the numbers show
+what the per-row requests cost, not Convex's own insert time.
+"""
+import os
+import statistics
+import sys
+import time
+import types
+
+RUNS = 10
+ROSTER = 10
+VETO_STEPS = 8
+
+
+def measure(label: str, call, rows: int):
+    timings = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        call()
+        timings.append(time.perf_counter() - start)
+    p50 = statistics.median(timings) * 1000
+    print(f"{label:<34}{rows:>5} rows{p50:>10.1f} ms{p50 / rows:>9.2f} ms/row")
+    return p50
+
+
+def main():
+    rtt_ms = float(sys.argv[1]) if len(sys.argv) > 1 else 40.0
+    # The backend and log level are read from the environment on first import
+    os.environ["CONVEX_BACKEND"] = "fake"
+    os.environ["CONVEX_FAKE_LATENCY_MS"] = str(rtt_ms)
+    os.environ["CONVEX_FAKE_JITTER_MS"] = "0"
+    os.environ.setdefault("LOG_LEVEL", "warning")
+    from bot.lib.convex_client import client
+    from bot.lib.db.db import db
+    from bot.lib.veto_manager import VetoAction
+
+    users = [types.SimpleNamespace(id=1_000_000_000_000_000_000 + i, name=f"player{i}") for i in range(ROSTER)]
+    user_ids = list(db.users.create_or_find_many(users).values())
+    captain = user_ids[0]
+    team_id = client.mutation("teams:create", {"name": "A", "captainId": captain, "hasFirstPick": True, "updateTime": 0})
+    other_id = client.mutation("teams:create", {"name": "B", "captainId": captain, "hasFirstPick": False, "updateTime": 0})
+    match_id = client.mutation("matches:create", {"team1": team_id, "team2": other_id, "bestOf": 3, "updateTime": 0})
+    sequence = [
+        {"team_id": (team_id, other_id)[i % 2], "action": (VetoAction.BAN, VetoAction.PICK)[i % 2], "order": i + 1}
+        for i in range(VETO_STEPS)
+    ]
+
+    print(f"Fake Convex round trip {rtt_ms:.0f}ms, median of {RUNS} runs")
+    results = [
+        (
+            measure("users:createOrFind loop", lambda: [db.users.createOrFind(u) for u in users], ROSTER),
+            measure("users:createOrFindMany", lambda: db.users.create_or_find_many(users), ROSTER),
+        ),
+        (
+            measure("players:create loop", lambda: [db.players.create(team_id, u) for u in user_ids], ROSTER),
+            measure("players:createMany", lambda: db.players.create_batch(team_id, user_ids), ROSTER),
+        ),
+        (
+            measure("vetos:create loop", lambda: [
+                db.vetos.create(match_id, s["team_id"], s["action"].value, s["order"]) for s in sequence
+            ], VETO_STEPS),
+            measure("vetos:createMany", lambda: db.vetos.create_batch(match_id, sequence), VETO_STEPS),
+        ),
+    ]
+    speedups = ", ".join(f"{loop / bulk:.1f}x" for loop, bulk in results)
+    print(f"Speedup of the bulk mutation (users, players, vetos): {speedups}")
+
+
+if __name__ == "__main__":
+    main()
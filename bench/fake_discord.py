@@ -0,0 +1,265 @@
+"""Fake Discord objects for the load simulator.
+
+The fakes subclass the discord.py types the bot isinstance-checks, but never
+touch the gateway or HTTP: every write sleeps for a sampled latency and is
+counted instead. Interactions record when they were first acknowledged.
+"""
+import asyncio
+import datetime
+import itertools
+import random
+import time
+import types
+from collections import Counter
+from typing import Callable
+import discord
+
+SNOWFLAKE_BASE = 1_100_000_000_000_000_000
+
+
+class FakeDiscord:
+    """Registry of fake channels and users, plus the latency model shared by all of them"""
+
+    def __init__(self, latency: float, jitter: float, seed: int, standby_prefix: str,
+                 on_match_thread: Callable[["FakeThread"], None], on_dm: Callable[["FakeUser", str], None]):
+        self.latency = latency
+        self.jitter = jitter
+        self.calls: Counter[str] = Counter()
+        self.channels: dict[int, discord.abc.Snowflake] = {}
+        self.users: dict[int, "FakeUser"] = {}
+        self.standby_prefix = standby_prefix
+        self.on_match_thread = on_match_thread
+        self.on_dm = on_dm
+        self._rng = random.Random(seed)
+        self._ids = itertools.count(SNOWFLAKE_BASE)
+
+        self.guild = FakeGuild(self, self.next_id())
+        self.match_channel = self.register(FakeTextChannel(self, self.next_id(), self.guild))
+        self.category = self.register(FakeCategory(self, self.next_id(), self.guild))
+
+    def next_id(self) -> int:
+        return next(self._ids)
+
+    def register(self, channel):
+        self.channels[channel.id] = channel
+        return channel
+
+    async def api(self, route: str):
+        self.calls[route] += 1
+        await asyncio.sleep(max(0.0, self._rng.gauss(self.latency, self.jitter)))
+
+    def user(self, user_id: int) -> "FakeUser":
+        if user_id not in self.users:
+            self.users[user_id] = FakeUser(self, user_id)
+        return self.users[user_id]
+
+    def thread_named(self, thread: "FakeThread"):
+        if not thread.name.startswith(self.standby_prefix):
+            self.on_match_thread(thread)
+
+
+def not_found() -> discord.NotFound:
+    return discord.NotFound(types.SimpleNamespace(status=404, reason="Not Found"), "Unknown Channel")
+
+
+class FakeUser(discord.User):
+    def __init__(self, fake: FakeDiscord, user_id: int):
+        self._fake = fake
+        self.id = user_id
+        self.name = f"sim_user_{user_id}"
+        self.global_name = None
+        self.bot = False
+        self.dms = 0
+
+    async def send(self, content: str | None = None, **kwargs):
+        await self._fake.api("dm")
+        self.dms += 1
+        self._fake.on_dm(self, content or "")
+
+
+class FakeGuild:
+    def __init__(self, fake: FakeDiscord, guild_id: int):
+        self._fake = fake
+        self.id = guild_id
+
+    async def create_voice_channel(self, name: str, category=None, **kwargs):
+        await self._fake.api("voice_create")
+        return self._fake.register(FakeVoiceChannel(self._fake, self._fake.next_id(), name, self, category))
+
+
+class FakeTextChannel(discord.TextChannel):
+    def __init__(self, fake: FakeDiscord, channel_id: int, guild: FakeGuild):
+        self._fake = fake
+        self.id = channel_id
+        self.guild = guild
+        self.name = "matches"
+
+    @property
+    def threads(self) -> list["FakeThread"]:
+        return [c for c in self._fake.channels.values() if isinstance(c, FakeThread) and c.parent_id == self.id]
+
+    async def archived_threads(self, *, private: bool = False, limit: int | None = 100, **kwargs):
+        # Fake threads never archive
+        await self._fake.api("archived_threads")
+        for thread in ():
+            yield thread
+
+    async def create_thread(self, name: str, **kwargs):
+        await self._fake.api("thread_create")
+        thread = self._fake.register(FakeThread(self._fake, self._fake.next_id(), self.id, name))
+        self._fake.thread_named(thread)
+        return thread
+
+
+class FakeThread(discord.Thread):
+    def __init__(self, fake: FakeDiscord, thread_id: int, parent_id: int, name: str):
+        self._fake = fake
+        self.id = thread_id
+        self.parent_id = parent_id
+        self.name = name
+        self.member_ids: set[int] = set()
+        self.messages: list[str] = []
+
+    async def add_user(self, user):
+        await self._fake.api("thread_member")
+        self.member_ids.add(user.id)
+
+    async def send(self, content: str | None = None, **kwargs):
+        await self._fake.api("message")
+        self.messages.append(content or "")
+
+    async def edit(self, *, name: str | None = None, **kwargs):
+        await self._fake.api("channel_edit")
+        if name is not None:
+            self.name = name
+            self._fake.thread_named(self)
+        return self
+
+
+class FakeVoiceChannel(discord.VoiceChannel):
+    def __init__(self, fake: FakeDiscord, channel_id: int, name: str, guild: FakeGuild, category):
+        self._fake = fake
+        self.id = channel_id
+        self.name = name
+        self.guild = guild
+        self.category_id = category.id if category else None
+
+    @property
+    def members(self) -> list:
+        return []
+
+    async def edit(self, *, name: str | None = None, **kwargs):
+        await self._fake.api("channel_edit")
+        if name is not None:
+            self.name = name
+        return self
+
+    async def delete(self, *, reason: str | None = None):
+        await self._fake.api("channel_delete")
+        self._fake.channels.pop(self.id, None)
+
+
+class FakeCategory(discord.CategoryChannel):
+    def __init__(self, fake: FakeDiscord, channel_id: int, guild: FakeGuild):
+        self._fake = fake
+        self.id = channel_id
+        self.guild = guild
+        self.name = "match voice"
+
+    @property
+    def voice_channels(self) -> list[FakeVoiceChannel]:
+        return [c for c in self._fake.channels.values()
+                if isinstance(c, FakeVoiceChannel) and c.category_id == self.id]
+
+
+class FakeBot(discord.Client):
+    def __init__(self, fake: FakeDiscord):
+        super().__init__(intents=discord.Intents.none())
+        self._fake = fake
+        self._bot_user = fake.user(fake.next_id())
+
+    @property
+    def user(self):
+        return self._bot_user
+
+    def get_channel(self, channel_id: int):
+        return self._fake.channels.get(channel_id)
+
+    async def fetch_channel(self, channel_id: int):
+        await self._fake.api("fetch_channel")
+        if channel_id not in self._fake.channels:
+            raise not_found()
+        return self._fake.channels[channel_id]
+
+    def get_user(self, user_id: int):
+        return self._fake.users.get(user_id)
+
+    async def fetch_user(self, user_id: int):
+        await self._fake.api("fetch_user")
+        return self._fake.user(user_id)
+
+
+class FakeResponse:
+    def __init__(self, interaction: "FakeInteraction"):
+        self._interaction = interaction
+        self._done = False
+
+    def is_done(self) -> bool:
+        return self._done
+
+    async def _acknowledge(self):
+        if self._done:
+            raise RuntimeError("Interaction already acknowledged")
+        self._done = True
+        self._interaction.acked_at = time.perf_counter()
+        await self._interaction.fake.api("interaction_response")
+
+    async def send_message(self, content: str | None = None, *, ephemeral: bool = False, **kwargs):
+        self._interaction.replies.append(content or "")
+        await self._acknowledge()
+
+    async def defer(self, *, ephemeral: bool = False, thinking: bool = False):
+        await self._acknowledge()
+
+    async def edit_message(self, **kwargs):
+        await self._acknowledge()
+
+
+class FakeFollowup:
+    def __init__(self, interaction: "FakeInteraction"):
+        self._interaction = interaction
+
+    async def send(self, content: str | None = None, **kwargs):
+        self._interaction.replies.append(content or "")
+        await self._interaction.fake.api("interaction_followup")
+
+
+class FakeInteraction:
+    """Just enough of discord.Interaction for the cog callbacks"""
+
+    def __init__(self, fake: FakeDiscord, user: FakeUser, channel=None, command=None):
+        self.fake = fake
+        self.user = user
+        self.channel = channel
+        self.command = command
+        self.created = time.perf_counter()
+        self.created_at = datetime.datetime.now(datetime.timezone.utc)
+        self.acked_at: float | None = None
+        self.replies: list[str] = []
+        self.response = FakeResponse(self)
+        self.followup = FakeFollowup(self)
+
+    async def edit_original_response(self, *, content: str | None = None, **kwargs):
+        self.replies.append(content or "")
+        await self.fake.api("interaction_edit")
+
+    async def delete_original_response(self):
+        await self.fake.api("interaction_delete")
+
+    @property
+    def ack_latency(self) -> float | None:
+        return None if self.acked_at is None else self.acked_at - self.created
+
+    @property
+    def failed(self) -> bool:
+        return any(r.startswith("❌") or r.startswith("An unexpected error") for r in self.replies)
@@ -0,0 +1,293 @@
+"""Load simulation of the queue -> ready -> match -> veto -> score flow.
+
+Run with `python -m bench.load_sim --players 2000 --duration 60`. Mock players
+arrive as a Poisson process and join a best-of queue. They answer ready
+checks after a log-normal delay, or never (no-shows). Captains then run the
+BO3 veto through the Map cog and report the score through the Game cog.
+Convex runs on the in-process fake backend and Discord on bench.fake_discord,
+both with injected latency, so the whole bot runs in one process.
+
+Reports matches/min, p50/p99 per stage and event loop lag.
+"""
+import argparse
+import asyncio
+import builtins
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+from collections import Counter, defaultdict
+from bench.fake_discord import FakeDiscord, FakeBot, FakeInteraction, FakeThread
+
+MODE_WEIGHTS = {1: 0.5, 3: 0.35, 5: 0.15}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--players", type=int, default=1000, help="mock players that join over the arrival window")
+    parser.add_argument("--duration", type=float, default=30.0, help="arrival window in seconds")
+    parser.add_argument("--drain", type=float, default=30.0, help="seconds to let matches finish after arrivals stop")
+    parser.add_argument("--no-show", type=float, default=0.03, help="probability a player never readies up")
+    parser.add_argument("--ready-median", type=float, default=1.0, help="median seconds to answer a ready check")
+    parser.add_argument("--ready-timeout", type=float, default=5.0, help="ready check timeout, READY_TIMEOUT is 30s live")
+    parser.add_argument("--think", type=float, default=0.3, help="mean captain seconds per veto step")
+    parser.add_argument("--play", type=float, default=2.0, help="mean seconds between veto end and score report")
+    parser.add_argument("--convex-latency", type=float, default=0.03)
+    parser.add_argument("--discord-latency", type=float, default=0.08)
+    parser.add_argument("--pool", action="store_true", help="pre-warm the thread/voice resource pool")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--verbose", action="store_true", help="keep the bot's own log output")
+    return parser.parse_args()
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+class Stats:
+    def __init__(self):
+        self.samples: dict[str, list[float]] = defaultdict(list)
+        self.counters: Counter[str] = Counter()
+
+    def record(self, stage: str, seconds: float):
+        self.samples[stage].append(seconds)
+
+    def count(self, name: str, n: int = 1):
+        self.counters[name] += n
+
+
+async def monitor_loop_lag(stats: Stats, interval: float = 0.05):
+    """Oversleep of a periodic timer is time the loop spent busy with something else"""
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        stats.record("loop_lag", time.perf_counter() - start - interval)
+
+
+class Simulation:
+    def __init__(self, args, stats: Stats):
+        from bot.lib.convex_client import client
+
+        self.args = args
+        self.fake_db = client
+        self.stats = stats
+        self.rng = random.Random(args.seed)
+        self.joined_at: dict[int, float] = {}
+        self.tasks: set[asyncio.Task] = set()
+
+        # Imported here: the Convex backend is chosen from the environment on first import
+        from bot.commands.game import Game
+        from bot.commands.map import Map
+        from bot.commands.queue import Queue
+        from bot.lib.constants import POOL_PREFIX
+        from bot.lib.player_queue import PlayerContext
+
+        self.fake = FakeDiscord(
+            args.discord_latency, args.discord_latency / 3, args.seed, POOL_PREFIX,
+            on_match_thread=self.on_match_thread, on_dm=self.on_dm,
+        )
+        self.bot = FakeBot(self.fake)
+        self.queue_cog = Queue(self.bot)
+        self.map_cog = Map(self.bot)
+        self.game_cog = Game(self.bot)
+        self.players = PlayerContext
+
+    def spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def interact(self, stage: str, command, cog, user, channel, *args):
+        """Invoke an app command callback the way discord.py would"""
+        interaction = FakeInteraction(self.fake, user, channel, command)
+        start = time.perf_counter()
+        await command.callback(cog, interaction, *args)
+        self.stats.record(stage, time.perf_counter() - start)
+        if interaction.ack_latency is not None:
+            self.stats.record("ack", interaction.ack_latency)
+        if interaction.failed:
+            self.stats.count(f"{stage}_failed")
+        return interaction
+
+    async def player(self, user_id: int, arrival: float):
+        await asyncio.sleep(arrival)
+        user = self.fake.user(user_id)
+        best_of = self.rng.choices(list(MODE_WEIGHTS), weights=list(MODE_WEIGHTS.values()))[0]
+        self.joined_at[user_id] = time.perf_counter()
+        await self.interact("join", self.queue_cog.join, self.queue_cog, user, None, best_of)
+
+    def on_dm(self, user, content: str):
+        if content.startswith("Ready check!"):
+            self.stats.count("ready_checks")
+            if self.rng.random() < self.args.no_show:
+                self.stats.count("no_shows")
+                return
+            delay = self.rng.lognormvariate(0, 0.6) * self.args.ready_median
+            self.spawn(self.ready_up(user, delay))
+        elif content.startswith("You were not ready"):
+            self.stats.count("ready_timeouts")
+
+    async def ready_up(self, user, delay: float):
+        await asyncio.sleep(delay)
+        if self.players._user_id_to_best_of.get(user.id) is not None:
+            await self.interact("ready", self.queue_cog.ready, self.queue_cog, user, None)
+
+    def on_match_thread(self, thread: FakeThread):
+        self.spawn(self.drive_match(thread))
+
+    async def drive_match(self, thread: FakeThread):
+        from bot.lib.db.maps import MapsServiceImpl
+        from bot.lib.match_context import MatchContextCache
+        from bot.lib.veto_manager import VetoStateCache
+
+        # The context is cached right after the thread exists, before the thread ID write
+        context = None
+        for _ in range(200):
+            context = MatchContextCache._by_thread.get(str(thread.id))
+            if context:
+                break
+            await asyncio.sleep(0.05)
+        if context is None:
+            self.stats.count("match_without_context")
+            return
+
+        now = time.perf_counter()
+        for roster in context.rosters.values():
+            for entry in roster:
+                joined = self.joined_at.pop(int(entry["discordId"]), None)
+                if joined is not None:
+                    self.stats.record("queue_to_thread", now - joined)
+        captains = {n: self.fake.user(int(d)) for n, d in context.captain_discord_ids.items()}
+        match = context.match
+
+        if match["bestOf"] == 3:
+            veto = await VetoStateCache.get(match)
+            while (phase := veto.get_current_phase()) is not None:
+                await asyncio.sleep(self.rng.expovariate(1 / self.args.think))
+                captain = captains[phase.team_number]
+                if phase.action.value == "side_pick":
+                    await self.interact("veto", self.map_cog.pick, self.map_cog, captain, thread,
+                                        self.rng.choice(["ATK", "DEF"]))
+                    continue
+                available = veto.get_available_maps(MapsServiceImpl.catalogue.all())
+                choice = self.rng.choice(available)["name"]
+                command = self.map_cog.ban if phase.action.value == "ban" else self.map_cog.pick
+                before = veto.current_order
+                await self.interact("veto", command, self.map_cog, captain, thread, choice)
+                if veto.current_order == before:
+                    self.stats.count("veto_stuck")
+                    return
+                # A failed write evicts the cached state, continue from the rebuilt one
+                veto = await VetoStateCache.get(match)
+
+        await asyncio.sleep(self.rng.expovariate(1 / self.args.play))
+        score = f"13-{self.rng.randint(0, 11)}" if self.rng.random() < 0.5 else f"{self.rng.randint(0, 11)}-13"
+        for number in (1, 2):
+            await self.interact("score", self.game_cog.score, self.game_cog, captains[number], thread, score)
+        self.stats.count("matches_finished")
+
+    async def run(self) -> float:
+        from bot.lib.constants import QUEUE_MODES
+        from bot.lib.db.maps import MapsServiceImpl
+        from bot.lib.leaderboard import Leaderboards
+        from bot.lib.match_queue import MatchQueue
+        from bot.lib.resource_pool import ResourcePool
+        from bot.lib.scheduler import Scheduler
+
+        # Start from empty queues instead of the seeded test users
+        self.players._queues = {bo: MatchQueue(bo) for bo in QUEUE_MODES}
+        self.players.users = {}
+        _ = MapsServiceImpl.load_catalogue()
+        Scheduler.start()
+        await Scheduler.restore()
+        await self.players.restore()
+        await Leaderboards.load()
+        if self.args.pool:
+            ResourcePool.start(self.bot)
+            await asyncio.sleep(2)
+
+        create_match = self.players.create_match
+
+        async def timed_create_match(player_ids, best_of):
+            start = time.perf_counter()
+            await create_match(player_ids, best_of)
+            self.stats.record("create_match", time.perf_counter() - start)
+            self.stats.count("matches_created")
+
+        self.players.create_match = timed_create_match
+
+        lag = asyncio.create_task(monitor_loop_lag(self.stats))
+        start = time.perf_counter()
+        arrival = 0.0
+        rate = self.args.players / self.args.duration
+        for _ in range(self.args.players):
+            arrival += self.rng.expovariate(rate)
+            self.spawn(self.player(self.fake.next_id(), arrival))
+
+        await asyncio.sleep(self.args.duration + self.args.drain)
+        elapsed = time.perf_counter() - start
+        lag.cancel()
+        for task in list(self.tasks):
+            task.cancel()
+        return elapsed
+
+
+def report(stats: Stats, elapsed: float, sim: Simulation, out):
+    from bot.lib.outbound import Outbound
+
+    def print(*args):
+        builtins.print(*args, file=out)
+
+    finished = stats.counters["matches_finished"]
+    print(f"Simulated {elapsed:.0f}s: {stats.counters['matches_created']} matches created, {finished} finished "
+          f"({finished / elapsed * 60:.1f} matches/min)")
+    print(f"Ready checks {stats.counters['ready_checks']}, no-shows {stats.counters['no_shows']}, "
+          f"timeout removals {stats.counters['ready_timeouts']}")
+    print(f"{'stage':<16}{'n':>7}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for stage in ("join", "ready", "create_match", "queue_to_thread", "veto", "score", "ack", "loop_lag"):
+        samples = stats.samples.get(stage)
+        if not samples:
+            continue
+        print(f"{stage:<16}{len(samples):>7}{percentile(samples, 50) * 1000:>10.1f}"
+              f"{percentile(samples, 99) * 1000:>10.1f}{max(samples) * 1000:>10.1f}")
+    failures = {k: v for k, v in stats.counters.items() if k.endswith("_failed") or k in ("veto_stuck", "match_without_context")}
+    if failures:
+        print(f"Failures: {dict(failures)}")
+    print(f"Convex calls: {sum(sim.fake_db.calls.values())} ({', '.join(f'{k} {v}' for k, v in sim.fake_db.calls.most_common(5))})")
+    print(f"Discord calls: {sum(sim.fake.calls.values())} ({', '.join(f'{k} {v}' for k, v in sim.fake.calls.most_common(5))})")
+    waits = Outbound.stats()["waits"]
+    print("Outbound mean wait: " + ", ".join(
+        f"{name} {w['total'] / w['count'] * 1000:.0f}ms" for name, w in waits.items() if w["count"]
+    ))
+
+
+def main():
+    args = parse_args()
+    os.environ["CONVEX_BACKEND"] = "fake"
+    os.environ["CONVEX_FAKE_LATENCY_MS"] = str(args.convex_latency * 1000)
+    os.environ["CONVEX_FAKE_JITTER_MS"] = str(args.convex_latency * 1000 / 3)
+
+    import bot.lib.player_queue as player_queue
+    player_queue.READY_TIMEOUT = args.ready_timeout
+
+    stats = Stats()
+
+    async def simulate():
+        sim = Simulation(args, stats)
+        os.environ["DISCORD_MATCH_THREAD_CHANNEL_ID"] = str(sim.fake.match_channel.id)
+        os.environ["DISCORD_MATCH_CATEGORY_ID"] = str(sim.fake.category.id)
+        return sim, await sim.run()
+
+    out = sys.stdout
+    # Executor threads still finishing Convex calls keep logging after the loop stops
+    output = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+    with output:
+        sim, elapsed = asyncio.run(simulate())
+        report(stats, elapsed, sim, out)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,49 @@
+"""Benchmark: caller-side cost of one log() call.
+
+Run with `python -m bench.log_overhead`. Compares the old synchronous
+print-and-flush with the queued writer for disabled, sampled and kept
+records. Output goes to /dev/null so only the logging path is measured.
+"""
+import contextlib
+import os
+import statistics
+import sys
+import time
+from bot.lib import log as logging
+from bot.lib.log import log, flush, log_context, DEBUG, INFO
+
+CALLS = 100_000
+RUNS = 5
+
+
+def old_log(message: str) -> None:
+    print(message, flush=True)
+    _ = sys.stdout.flush()
+
+
+def measure(label: str, call) -> None:
+    samples = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        for i in range(CALLS):
+            call(i)
+        samples.append((time.perf_counter() - start) / CALLS)
+        # Writer backlog is not the caller's cost, drain it between runs
+        flush(timeout=60)
+    print(f"{label:<34}{statistics.median(samples) * 1e9:>10.0f} ns/call", file=sys.__stdout__)
+
+
+def main():
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        measure("print + flush (old log)", lambda i: old_log(f"Veto created: match={i}"))
+        measure("log, level disabled", lambda i: log(f"Veto created: match={i}", level=DEBUG - 1))
+        measure("log, level disabled, lazy", lambda i: log(lambda: f"Veto created: match={i}", level=DEBUG - 1))
+        logging._min_level = DEBUG
+        measure("log debug, 1% sampled", lambda i: log(f"Veto created: match={i}", level=DEBUG, sample=0.01))
+        measure("log info, queued", lambda i: log(f"Veto created: match={i}", level=INFO))
+        with log_context(match_id="m1", user_id="42"):
+            measure("log info, queued with context", lambda i: log(f"Veto created: match={i}", level=INFO))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Benchmark: rebuild queue state for a 500-player queue from snapshot + journal.
+
+Run with `python -m bench.queue_recovery`. Only measures the in-process
+replay; the single queueState:load round trip comes on top of it.
+"""
+import random
+import statistics
+import time
+from bot.lib.constants import QUEUE_JOURNAL_BATCH_SIZE, QUEUE_MODES, QUEUE_SNAPSHOT_EVERY
+from bot.lib.match_queue import MatchQueue, replay_queues, serialize_queues
+
+PLAYERS = 500
+RUNS = 50
+
+
+def build_state(rng: random.Random):
+    queues = {bo: MatchQueue(bo) for bo in QUEUE_MODES}
+    user_ids = [1_000_000_000_000_000_000 + i for i in range(PLAYERS)]
+    for uid in user_ids:
+        _ = queues[rng.choice(QUEUE_MODES)].join(uid)
+    snapshot = {"seq": PLAYERS, "queues": serialize_queues(queues)}
+
+    # Worst case: a full snapshot interval of journal events after the snapshot
+    events = []
+    for _ in range(QUEUE_SNAPSHOT_EVERY - 1):
+        uid = rng.choice(user_ids)
+        kind = rng.choice(["join", "leave", "ready"])
+        event = {"kind": kind, "discordId": str(uid)}
+        if kind == "join":
+            event["bestOf"] = rng.choice(QUEUE_MODES)
+        events.append(event)
+
+    batches = []
+    for start in range(0, len(events), QUEUE_JOURNAL_BATCH_SIZE):
+        chunk = events[start:start + QUEUE_JOURNAL_BATCH_SIZE]
+        batches.append({"lastSeq": PLAYERS + start + len(chunk), "events": chunk})
+    return snapshot, batches
+
+
+def main():
+    rng = random.Random(42)
+    snapshot, batches = build_state(rng)
+    event_count = sum(len(b["events"]) for b in batches)
+
+    timings = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        queues, seq = replay_queues(QUEUE_MODES, snapshot, batches)
+        timings.append(time.perf_counter() - start)
+
+    players = sum(len(q) for q in queues.values())
+    print(f"Snapshot of {PLAYERS} players + {event_count} journal events in {len(batches)} batches")
+    print(f"Recovered {players} queued players at seq {seq}")
+    print(f"Replay p50: {statistics.median(timings) * 1000:.2f}ms, max: {max(timings) * 1000:.2f}ms over {RUNS} runs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Benchmark: rating-optimal team balancing vs. the old random split.
+
+Run with `python -m bench.team_balancer`. Quality is the absolute
+difference between the two teams' rating sums.
+"""
+import os
+import random
+import statistics
+import time
+
+TRIALS = 2000
+
+
+def random_split(player_ids: list[int]) -> tuple[list[int], list[int]]:
+    """The previous balance_teams: shuffle and cut in half"""
+    shuffled = player_ids.copy()
+    random.shuffle(shuffled)
+    mid = len(shuffled) // 2
+    return shuffled[:mid], shuffled[mid:]
+
+
+def rating_gap(teams: tuple[list[int], list[int]], ratings: dict[int, float]) -> float:
+    return abs(sum(ratings[p] for p in teams[0]) - sum(ratings[p] for p in teams[1]))
+
+
+def run(name: str, balance, lobbies: list[tuple[list[int], dict[int, float]]]):
+    gaps, timings = [], []
+    for player_ids, ratings in lobbies:
+        start = time.perf_counter()
+        teams = balance(player_ids, ratings)
+        timings.append(time.perf_counter() - start)
+        gaps.append(rating_gap(teams, ratings))
+    gaps.sort()
+    print(
+        f"{name:>8}: gap mean {statistics.mean(gaps):7.1f}, p95 {gaps[int(len(gaps) * 0.95)]:7.1f} | "
+        f"time p50 {statistics.median(timings) * 1e6:6.1f}us, max {max(timings) * 1e6:6.1f}us"
+    )
+
+
+def main():
+    # The log level is read from the environment on first import
+    os.environ.setdefault("LOG_LEVEL", "warning")
+    from bot.lib.team_balancer import TeamBalancer
+
+    rng = random.Random(7)
+    lobbies = []
+    for _ in range(TRIALS):
+        player_ids = [rng.randrange(10**17, 10**18) for _ in range(10)]
+        lobbies.append((player_ids, {p: rng.gauss(1000, 200) for p in player_ids}))
+
+    print(f"{TRIALS} lobbies of 10, ratings ~ N(1000, 200)")
+    run("random", lambda ids, _: random_split(ids), lobbies)
+    run("optimal", TeamBalancer.balance_teams, lobbies)
+
+
+if __name__ == "__main__":
+    main()
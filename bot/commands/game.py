@@ -1,12 +1,15 @@
-import asyncio
 import re
 import discord
 from discord import app_commands
 from discord.ext import commands
-from bot.lib.db.matches import MatchesServiceImpl
-from bot.lib.db.teams import TeamsServiceImpl
-from bot.lib.db.users import UsersServiceImpl
-from bot.lib.log import log
+from bot.lib.constants import SCORE_CONFIRM_TIMEOUT, VOICE_RELEASE_GRACE
+from bot.lib.db.db import async_db
+from bot.lib.interaction_reply import InteractionReply
+from bot.lib.log import log, ERROR
+from bot.lib.match_context import MatchContextCache
+from bot.lib.mmr import MmrEngine
+from bot.lib.scheduler import Scheduler
+from bot.lib.veto_manager import VetoStateCache
 
 pending_scores: dict[str, dict] = {}
 
@@ -18,11 +21,16 @@ def parse_score(s: str):
         return None
     return int(m.group(1)), int(m.group(2))
 
-async def _cleanup_after(match_id: str, delay: int = 30):
-    await asyncio.sleep(delay)
-    if match_id in pending_scores:
+async def _expire_pending_score(payload: dict):
+    match_id = payload["matchId"]
+    if pending_scores.pop(match_id, None) is not None:
         log(f"Score pending expired for match {match_id}")
-        pending_scores.pop(match_id, None)
+
+def _expire_later(match_id: str):
+    # Rescheduling the same key resets the timer
+    Scheduler.schedule(f"score:{match_id}", "score_expiry", SCORE_CONFIRM_TIMEOUT, {"matchId": match_id})
+
+Scheduler.register("score_expiry", _expire_pending_score)
 
 class Game(commands.Cog):
     def __init__(self, bot):
@@ -33,67 +41,73 @@ class Game(commands.Cog):
     @group.command(name="score", description="Submit game score as <t1>-<t2> in a match thread (captains only)")
     @app_commands.describe(score="Format like 13-9")
     async def score(self, interaction: discord.Interaction, score: str):
+        reply = InteractionReply(interaction, ephemeral=True)
         try:
             thread_id = str(interaction.channel.id) if interaction.channel else None
             if not thread_id:
-                await interaction.response.send_message("❌ This command can only be used in a match thread", ephemeral=True)
+                await reply.send("❌ This command can only be used in a match thread", ephemeral=True)
                 return
 
-            match = MatchesServiceImpl.find_by_thread_id(thread_id)
-            if not match:
-                await interaction.response.send_message("❌ No match found for this thread", ephemeral=True)
+            context = await MatchContextCache.get(thread_id)
+            if not context:
+                await reply.send("❌ No match found for this thread", ephemeral=True)
                 return
 
-            match_id = match["_id"]
-            team1 = TeamsServiceImpl.find_by_id(match["team1"]) 
-            team2 = TeamsServiceImpl.find_by_id(match["team2"]) 
+            if context.is_finished:
+                await reply.send("❌ This match is already finished", ephemeral=True)
+                return
 
+            match_id = context.match_id
             uid = str(interaction.user.id)
-            t1_cap = UsersServiceImpl.find_by_id(team1["captainId"]).get("discordId")
-            t2_cap = UsersServiceImpl.find_by_id(team2["captainId"]).get("discordId")
-            if uid != t1_cap and uid != t2_cap:
-                await interaction.response.send_message("❌ Only captains can submit score", ephemeral=True)
+            if not context.is_captain(uid):
+                await reply.send("❌ Only captains can submit score", ephemeral=True)
                 return
 
             parsed = parse_score(score)
             if not parsed:
-                await interaction.response.send_message("❌ Invalid score format. Use e.g. 13-9", ephemeral=True)
+                await reply.send("❌ Invalid score format. Use e.g. 13-9", ephemeral=True)
                 return
 
             norm = f"{parsed[0]}-{parsed[1]}"
 
             existing = pending_scores.get(match_id)
             if not existing:
-                pending_scores[match_id] = {"by": uid, "score": norm, "task": asyncio.create_task(_cleanup_after(match_id))}
-                await interaction.response.send_message(f"📝 Score pending: {norm}. Waiting for the other captain (30s)...", ephemeral=True)
+                pending_scores[match_id] = {"by": uid, "score": norm}
+                _expire_later(match_id)
+                await reply.send(f"📝 Score pending: {norm}. Waiting for the other captain ({SCORE_CONFIRM_TIMEOUT}s)...", ephemeral=True)
                 return
 
             # Second submission
             if existing["by"] == uid:
                 # overwrite and reset timer
                 existing["score"] = norm
-                if task := existing.get("task"):
-                    task.cancel()
-                existing["task"] = asyncio.create_task(_cleanup_after(match_id))
-                await interaction.response.send_message(f"✏️ Updated pending score to {norm}. Waiting for the other captain (30s)...", ephemeral=True)
+                _expire_later(match_id)
+                await reply.send(f"✏️ Updated pending score to {norm}. Waiting for the other captain ({SCORE_CONFIRM_TIMEOUT}s)...", ephemeral=True)
                 return
 
             if existing["score"] == norm:
                 # consensus reached
-                if task := existing.get("task"):
-                    task.cancel()
+                _ = Scheduler.cancel(f"score:{match_id}")
                 pending_scores.pop(match_id, None)
-                MatchesServiceImpl.set_score(match_id, parsed[0], parsed[1])
-                await interaction.response.send_message(f"✅ Score confirmed: {norm}. Match finished.")
+                await async_db.matches.set_score(match_id, parsed[0], parsed[1])
+                MatchContextCache.invalidate(match_id)
+                VetoStateCache.evict(match_id)
+                # Voice channels go back to the pool shortly after the match ends
+                _ = Scheduler.expedite(f"voice:{match_id}", VOICE_RELEASE_GRACE)
+                try:
+                    await MmrEngine.apply_confirmed_score(context, parsed[0], parsed[1])
+                except Exception as e:
+                    # The score stands, ratings can be rebuilt with MmrEngine.backfill()
+                    log(f"Error updating MMR for match {match_id}: {e}", level=ERROR)
+                await reply.send(f"✅ Score confirmed: {norm}. Match finished.")
             else:
                 # mismatch; reset to latest and wait again
-                if task := existing.get("task"):
-                    task.cancel()
-                pending_scores[match_id] = {"by": uid, "score": norm, "task": asyncio.create_task(_cleanup_after(match_id))}
-                await interaction.response.send_message("⚠️ Scores don't match. Latest submission recorded; waiting for other captain (30s)...", ephemeral=True)
+                pending_scores[match_id] = {"by": uid, "score": norm}
+                _expire_later(match_id)
+                await reply.send(f"⚠️ Scores don't match. Latest submission recorded; waiting for other captain ({SCORE_CONFIRM_TIMEOUT}s)...", ephemeral=True)
         except Exception as e:
-            log(f"Error handling /game score: {e}")
-            await interaction.response.send_message("❌ Failed to submit score", ephemeral=True)
+            log(f"Error handling /game score: {e}", level=ERROR)
+            await reply.send("❌ Failed to submit score", ephemeral=True)
 
 async def setup(bot):
     await bot.add_cog(Game(bot))
@@ -1,6 +1,80 @@
 import discord
 from discord import app_commands
 from discord.ext import commands
+from bot.lib.constants import LEADERBOARD_VIEW_TIMEOUT
+from bot.lib.exceptions import handle_exception
+from bot.lib.leaderboard import Leaderboards, LeaderboardPages
+
+TITLES = {
+    "alltime": lambda: "All-time Leaderboard",
+    "seasonal": lambda: f"Season {Leaderboards.season} Leaderboard",
+}
+
+def render_page(board: str, page: int) -> discord.Embed:
+    """Render a single 1-based page of a board as an embed"""
+    ranked = Leaderboards.boards[board]
+    rows = [
+        f"**#{rank}** {Leaderboards.display_name(user_id)} - {score:.0f}"
+        for rank, user_id, score in ranked.page(page - 1)
+    ]
+    embed = discord.Embed(title=TITLES[board](), description="\n".join(rows) or "No rated players yet.")
+    embed.set_footer(text=f"Page {page}/{ranked.page_count()} - {len(ranked)} players")
+    return embed
+
+async def own_rank(board: str, discord_id: str) -> str | None:
+    if own := await Leaderboards.rank_of(board, discord_id):
+        return f"You: **#{own[0]}** of {len(Leaderboards.boards[board])} - {own[1]:.0f}"
+    return None
+
+class LeaderboardPaginator(discord.ui.View):
+    """Previous/next buttons, each page comes from LeaderboardPages"""
+
+    def __init__(self, board: str, page: int, owner_id: int):
+        super().__init__(timeout=LEADERBOARD_VIEW_TIMEOUT)
+        self.board = board
+        self.owner_id = owner_id
+        self.page = self.clamp(page)
+        self._sync_buttons()
+
+    def clamp(self, page: int) -> int:
+        return min(max(page, 1), Leaderboards.boards[self.board].page_count())
+
+    def embed(self) -> discord.Embed:
+        return LeaderboardPages.get(self.board, self.page, render_page)
+
+    def _sync_buttons(self):
+        self.previous.disabled = self.page <= 1
+        self.next.disabled = self.page >= Leaderboards.boards[self.board].page_count()
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.owner_id:
+            await interaction.response.send_message("❌ Run the command yourself to browse pages", ephemeral=True)
+            return False
+        return True
+
+    async def _turn(self, interaction: discord.Interaction, step: int):
+        self.page = self.clamp(self.page + step)
+        self._sync_buttons()
+        await interaction.response.edit_message(embed=self.embed(), view=self)
+
+    @discord.ui.button(label="◀", style=discord.ButtonStyle.secondary)
+    async def previous(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._turn(interaction, -1)
+
+    @discord.ui.button(label="▶", style=discord.ButtonStyle.secondary)
+    async def next(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._turn(interaction, 1)
+
+async def send_board(interaction: discord.Interaction, board: str, page: int):
+    if not Leaderboards.available:
+        await interaction.response.send_message("❌ Leaderboard unavailable, try again in a minute", ephemeral=True)
+        return
+    view = LeaderboardPaginator(board, page, interaction.user.id)
+    await interaction.response.send_message(
+        content=await own_rank(board, str(interaction.user.id)),
+        embed=view.embed(),
+        view=view,
+    )
 
 class Leaderboard(commands.Cog):
     def __init__(self, bot):
@@ -9,12 +83,20 @@ class Leaderboard(commands.Cog):
     group = app_commands.Group(name="leaderboard", description="Leaderboad related commands")
 
     @group.command(name="alltime", description="View all-time leaderboard")
-    async def alltime(self, interaction: discord.Interaction):
-        await interaction.response.send_message("Coming soon...")
+    @app_commands.describe(page="Page number")
+    async def alltime(self, interaction: discord.Interaction, page: int = 1):
+        try:
+            await send_board(interaction, "alltime", page)
+        except Exception as e:
+            await handle_exception(interaction, e)
 
     @group.command(name="seasonal", description="View seasonal leaderboard")
-    async def pick(self, interaction: discord.Interaction):
-        await interaction.response.send_message("Coming soon...")
+    @app_commands.describe(page="Page number")
+    async def pick(self, interaction: discord.Interaction, page: int = 1):
+        try:
+            await send_board(interaction, "seasonal", page)
+        except Exception as e:
+            await handle_exception(interaction, e)
 
 async def setup(bot):
     await bot.add_cog(Leaderboard(bot))
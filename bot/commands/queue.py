@@ -2,9 +2,11 @@ import discord
 from discord import Interaction, app_commands
 from discord.ext import commands
 from bot.lib.player_queue import PlayerContext
-from bot.lib.constants import PLAYER_REQUIRED, READY_TIMEOUT
+from bot.lib.constants import PLAYER_REQUIRED, READY_TIMEOUT, QUEUE_MODES
 from bot.lib.log import log
+from bot.lib.outbound import Outbound, Priority
 from bot.lib.exceptions import handle_exception
+from bot.lib.interaction_reply import InteractionReply
 
 class Queue(commands.Cog):
     def __init__(self, bot: commands.Bot):
@@ -21,14 +23,19 @@ class Queue(commands.Cog):
         app_commands.Choice(name="5", value=5)
     ])
     async def join(self, interaction: discord.Interaction, best_of: int = 1):
+        # The DM probe waits behind Outbound's budgets, the reply acknowledges in time regardless
+        reply = InteractionReply(interaction)
         try:
-            if best_of not in [1, 3, 5]:
+            if best_of not in QUEUE_MODES:
                 best_of = 1
             
             try:
-                await interaction.user.send("You will receive ready checks here, before the game start.")
+                await Outbound.call(
+                    f"dm:{interaction.user.id}", Priority.INTERACTION,
+                    lambda: interaction.user.send("You will receive ready checks here, before the game start."),
+                )
             except discord.Forbidden:
-                await interaction.response.send_message(
+                await reply.send(
                     "I cannot send you DMs. Please enable DMs from server members in your privacy settings.\n"
                     "Go to Server Settings → Content & Social -> Social permissions -> Direct Messages",
                     ephemeral=True
@@ -37,9 +44,9 @@ class Queue(commands.Cog):
             
             player_count = PlayerContext.add_player(interaction.user, best_of)
             log(f"{player_count} players in queue (Best of {best_of})")
-            _ = await interaction.response.send_message(f"You joined the queue! ({player_count}/{PLAYER_REQUIRED} players)")
+            await reply.send(f"You joined the queue! ({player_count}/{PLAYER_REQUIRED} players)")
         except Exception as e:
-            await handle_exception(interaction, e)
+            await handle_exception(interaction, e, reply)
 
     @group.command(name="ready", description="Mark as ready")
     async def ready(self, interaction: Interaction):
@@ -1,2 +1,82 @@
+import os
+
 PLAYER_REQUIRED = 10
 READY_TIMEOUT = 30
+# Seconds a captain's score waits for the other captain, and match voice channels live
+SCORE_CONFIRM_TIMEOUT = int(os.getenv("SCORE_CONFIRM_TIMEOUT", "30"))
+VOICE_CHANNEL_LIFETIME = 2 * 60 * 60
+# Seconds after a confirmed score before the match voice channels are released
+VOICE_RELEASE_GRACE = int(os.getenv("VOICE_RELEASE_GRACE", "300"))
+# Best-of modes players can queue for, one MatchQueue each
+QUEUE_MODES = (1, 3, 5)
+# Max concurrent Discord calls when notifying a batch of players
+FANOUT_CONCURRENCY = int(os.getenv("FANOUT_CONCURRENCY", "5"))
+# Queue journal: flush cadence, batch size and snapshot frequency (in events)
+QUEUE_JOURNAL_FLUSH_INTERVAL = float(os.getenv("QUEUE_JOURNAL_FLUSH_INTERVAL", "1.0"))
+QUEUE_JOURNAL_BATCH_SIZE = int(os.getenv("QUEUE_JOURNAL_BATCH_SIZE", "50"))
+QUEUE_SNAPSHOT_EVERY = int(os.getenv("QUEUE_SNAPSHOT_EVERY", "500"))
+# Attempts to load the persisted queue state at startup, and the first retry delay in seconds (doubles each time)
+QUEUE_RESTORE_RETRIES = int(os.getenv("QUEUE_RESTORE_RETRIES", "3"))
+QUEUE_RESTORE_RETRY_DELAY = float(os.getenv("QUEUE_RESTORE_RETRY_DELAY", "1.0"))
+# Veto state machines kept in memory, older ones are rebuilt from Convex
+VETO_CACHE_SIZE = int(os.getenv("VETO_CACHE_SIZE", "256"))
+# Seconds before the in-process map catalogue is reloaded from Convex
+MAP_CATALOGUE_TTL = float(os.getenv("MAP_CATALOGUE_TTL", "300"))
+# Match thread contexts (match, teams, captains, rosters) kept in memory
+MATCH_CONTEXT_CACHE_SIZE = int(os.getenv("MATCH_CONTEXT_CACHE_SIZE", "256"))
+# Discord ID <-> Convex user ID pairs kept in memory, filled from the leaderboard load and every created match
+USER_IDENTITY_CACHE_SIZE = int(os.getenv("USER_IDENTITY_CACHE_SIZE", "50000"))
+# Rating given to players without one, and the balancer's cost of a duplicated role
+DEFAULT_RATING = 1000.0
+ROLE_DUPLICATE_PENALTY = float(os.getenv("ROLE_DUPLICATE_PENALTY", "50"))
+# Elo K-factor: the most a single match can move a player's rating
+MMR_K_FACTOR = float(os.getenv("MMR_K_FACTOR", "32"))
+# Season that new rating changes count towards on the seasonal leaderboard
+CURRENT_SEASON = os.getenv("SEASON", "1")
+LEADERBOARD_PAGE_SIZE = 10
+# Rendered leaderboard pages kept until the boards change, and paginator lifetime in seconds
+LEADERBOARD_PAGE_CACHE_SIZE = int(os.getenv("LEADERBOARD_PAGE_CACHE_SIZE", "64"))
+LEADERBOARD_VIEW_TIMEOUT = float(os.getenv("LEADERBOARD_VIEW_TIMEOUT", "180"))
+# First retry delay of a failed leaderboard load at startup, doubling up to the max, in seconds
+LEADERBOARD_LOAD_RETRY_DELAY = float(os.getenv("LEADERBOARD_LOAD_RETRY_DELAY", "5"))
+LEADERBOARD_LOAD_MAX_RETRY_DELAY = float(os.getenv("LEADERBOARD_LOAD_MAX_RETRY_DELAY", "300"))
+# Longest the scheduler sleeps without a wakeup, bounds the retry delay of failed timer writes
+SCHEDULER_MAX_SLEEP = float(os.getenv("SCHEDULER_MAX_SLEEP", "60"))
+# First retry delay of a failed persistent timer handler or timer write, doubling up to the max, in seconds
+SCHEDULER_RETRY_DELAY = float(os.getenv("SCHEDULER_RETRY_DELAY", "5"))
+SCHEDULER_MAX_RETRY_DELAY = float(os.getenv("SCHEDULER_MAX_RETRY_DELAY", "300"))
+# Outbound Discord writes: max in flight, and (requests, seconds) budgets globally and per route.
+# Route budgets approximate Discord's per-route limits and apply per channel, thread, guild or DM recipient.
+OUTBOUND_CONCURRENCY = int(os.getenv("OUTBOUND_CONCURRENCY", "10"))
+OUTBOUND_GLOBAL_LIMIT = (int(os.getenv("OUTBOUND_GLOBAL_LIMIT", "40")), 1.0)
+OUTBOUND_ROUTE_LIMITS = {
+    "dm": (5, 5.0),
+    "message": (5, 5.0),
+    "thread_create": (5, 5.0),
+    "thread_member": (10, 5.0),
+    "voice_create": (5, 5.0),
+    "channel_delete": (5, 5.0),
+    "channel_edit": (2, 600.0),
+}
+# Retries per failed provisioning step, and the first retry delay in seconds (doubles each time)
+PIPELINE_RETRIES = int(os.getenv("PIPELINE_RETRIES", "2"))
+PIPELINE_RETRY_DELAY = float(os.getenv("PIPELINE_RETRY_DELAY", "0.5"))
+# Warm pool: parked match threads and voice channel triples, named with POOL_PREFIX
+THREAD_POOL_SIZE = int(os.getenv("THREAD_POOL_SIZE", "2"))
+VOICE_POOL_SIZE = int(os.getenv("VOICE_POOL_SIZE", "2"))
+POOL_PREFIX = "standby"
+# Prometheus text endpoint at http://METRICS_HOST:METRICS_PORT/metrics, 0 disables it
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9108"))
+# Seconds between event loop lag samples
+LOOP_LAG_INTERVAL = float(os.getenv("LOOP_LAG_INTERVAL", "0.5"))
+# Logging: minimum level (debug, info, warning, error), "json" or "text" lines,
+# share of debug records kept, and most records written per flush
+LOG_LEVEL = os.getenv("LOG_LEVEL", "info")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+LOG_DEBUG_SAMPLE = float(os.getenv("LOG_DEBUG_SAMPLE", "1.0"))
+LOG_BATCH_SIZE = int(os.getenv("LOG_BATCH_SIZE", "256"))
+# Seconds Discord gives an interaction to be acknowledged, and the seconds after creation a
+# handler may use before InteractionReply defers it
+INTERACTION_ACK_DEADLINE = 3.0
+INTERACTION_DEFER_AFTER = float(os.getenv("INTERACTION_DEFER_AFTER", "2.0"))
@@ -1,13 +1,60 @@
+import asyncio
+import functools
 import os
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-from convex import ConvexClient
+from bot.lib.metrics import Metrics
 
 # Load environment variables from .env.local before reading them
 load_dotenv(".env.local")
 
+# "convex" talks to the deployment at CONVEX_URL, "fake" runs bot/lib/fake_convex.py in-process
+CONVEX_BACKEND = os.getenv("CONVEX_BACKEND", "convex")
 CONVEX_URL = os.getenv("CONVEX_URL")
+CONVEX_MAX_WORKERS = int(os.getenv("CONVEX_MAX_WORKERS", "8"))
+# Injected round trip of the fake backend in milliseconds: mean and standard deviation
+CONVEX_FAKE_LATENCY_MS = float(os.getenv("CONVEX_FAKE_LATENCY_MS", "0"))
+CONVEX_FAKE_JITTER_MS = float(os.getenv("CONVEX_FAKE_JITTER_MS", "0"))
 
-if not CONVEX_URL:
-    raise ValueError("CONVEX_URL environment variable not set")
 
-client = ConvexClient(CONVEX_URL)
+def create_client():
+    """Client of the configured backend, both expose query(name, args) and mutation(name, args)"""
+    if CONVEX_BACKEND == "fake":
+        from bot.lib.fake_convex import FakeConvex
+        return FakeConvex(CONVEX_FAKE_LATENCY_MS / 1000, CONVEX_FAKE_JITTER_MS / 1000)
+    if CONVEX_BACKEND != "convex":
+        raise ValueError(f"Unknown CONVEX_BACKEND {CONVEX_BACKEND!r}, expected 'convex' or 'fake'")
+    if not CONVEX_URL:
+        raise ValueError("CONVEX_URL environment variable not set")
+    from convex import ConvexClient
+    return ConvexClient(CONVEX_URL)
+
+
+class TimedClient:
+    """Records the round trip of every query and mutation per function name"""
+
+    def __init__(self, inner):
+        self._inner = inner
+
+    def query(self, name: str, args: dict | None = None):
+        with Metrics.timer(Metrics.convex_rtt, name):
+            return self._inner.query(name, args)
+
+    def mutation(self, name: str, args: dict | None = None):
+        with Metrics.timer(Metrics.convex_rtt, name):
+            return self._inner.mutation(name, args)
+
+    def __getattr__(self, name: str):
+        return getattr(self._inner, name)
+
+
+client = TimedClient(create_client())
+
+# Bounded pool so blocking Convex round trips never run on the event loop
+executor = ThreadPoolExecutor(max_workers=CONVEX_MAX_WORKERS, thread_name_prefix="convex")
+
+
+async def run_blocking(func, *args, **kwargs):
+    """Run a blocking call on the Convex executor and await its result"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, functools.partial(func, *args, **kwargs))
@@ -1,8 +1,17 @@
+import functools
+from bot.lib.convex_client import run_blocking
 from .users import UsersServiceImpl
 from .teams import TeamsServiceImpl
 from .players import PlayersServiceImpl
 from .matches import MatchesServiceImpl
 from .vetos import VetosServiceImpl
+from .maps import MapsServiceImpl
+from .map_selections import MapSelectionsServiceImpl
+from .side_selections import SideSelectionsServiceImpl
+from .queue_state import QueueStateServiceImpl
+from .mmr import MmrServiceImpl
+from .leaderboard import LeaderboardServiceImpl
+from .timers import TimersServiceImpl
 
 class DbServiceImpl():
     users: UsersServiceImpl = UsersServiceImpl()
@@ -10,5 +19,44 @@ class DbServiceImpl():
     players: PlayersServiceImpl = PlayersServiceImpl()
     matches: MatchesServiceImpl = MatchesServiceImpl()
     vetos: VetosServiceImpl = VetosServiceImpl()
+    maps: MapsServiceImpl = MapsServiceImpl()
+    map_selections: MapSelectionsServiceImpl = MapSelectionsServiceImpl()
+    side_selections: SideSelectionsServiceImpl = SideSelectionsServiceImpl()
+    queue_state: QueueStateServiceImpl = QueueStateServiceImpl()
+    mmr: MmrServiceImpl = MmrServiceImpl()
+    leaderboard: LeaderboardServiceImpl = LeaderboardServiceImpl()
+    timers: TimersServiceImpl = TimersServiceImpl()
+
+class AsyncServiceImpl():
+    """Awaitable view of a *ServiceImpl, each call runs on the Convex executor"""
+
+    def __init__(self, service):
+        self._service = service
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._service, name)
+        if not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        async def call(*args, **kwargs):
+            return await run_blocking(attr, *args, **kwargs)
+
+        return call
+
+class AsyncDbServiceImpl():
+    users: AsyncServiceImpl = AsyncServiceImpl(UsersServiceImpl)
+    teams: AsyncServiceImpl = AsyncServiceImpl(TeamsServiceImpl)
+    players: AsyncServiceImpl = AsyncServiceImpl(PlayersServiceImpl)
+    matches: AsyncServiceImpl = AsyncServiceImpl(MatchesServiceImpl)
+    vetos: AsyncServiceImpl = AsyncServiceImpl(VetosServiceImpl)
+    maps: AsyncServiceImpl = AsyncServiceImpl(MapsServiceImpl)
+    map_selections: AsyncServiceImpl = AsyncServiceImpl(MapSelectionsServiceImpl)
+    side_selections: AsyncServiceImpl = AsyncServiceImpl(SideSelectionsServiceImpl)
+    queue_state: AsyncServiceImpl = AsyncServiceImpl(QueueStateServiceImpl)
+    mmr: AsyncServiceImpl = AsyncServiceImpl(MmrServiceImpl)
+    leaderboard: AsyncServiceImpl = AsyncServiceImpl(LeaderboardServiceImpl)
+    timers: AsyncServiceImpl = AsyncServiceImpl(TimersServiceImpl)
 
 db = DbServiceImpl()
+async_db = AsyncDbServiceImpl()
@@ -0,0 +1,32 @@
+from bot.lib.convex_client import client
+from bot.lib.log import log, ERROR
+from bot.lib.metrics import timed_service
+
+LOAD_PAGE_SIZE = 1000
+
+
+@timed_service
+class LeaderboardServiceImpl:
+
+    @staticmethod
+    def load_board(board: str, season: str) -> list[dict]:
+        """Every rated player of a board ("alltime" or "seasonal"), fetched page by page"""
+        try:
+            entries = []
+            cursor = None
+            while True:
+                result = client.query(
+                    "leaderboard:ratingsPage",
+                    {
+                        "board": board,
+                        "season": season,
+                        "paginationOpts": {"numItems": LOAD_PAGE_SIZE, "cursor": cursor}
+                    }
+                )
+                entries.extend(result["page"])
+                if result["isDone"]:
+                    return entries
+                cursor = result["continueCursor"]
+        except Exception as e:
+            log(f"Error loading {board} leaderboard: {e}", level=ERROR)
+            raise
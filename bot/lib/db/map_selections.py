@@ -1,8 +1,10 @@
 from bot.lib.convex_client import client
-from bot.lib.log import log
+from bot.lib.log import log, ERROR
+from bot.lib.metrics import timed_service
 import time
 
 
+@timed_service
 class MapSelectionsServiceImpl:
 
     @staticmethod
@@ -20,5 +22,5 @@ class MapSelectionsServiceImpl:
             log(f"Map selection created: veto={veto_id}, map={map_id}")
             return result
         except Exception as e:
-            log(f"Error creating map selection: {e}")
+            log(f"Error creating map selection: {e}", level=ERROR)
             raise
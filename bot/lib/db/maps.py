@@ -1,50 +1,117 @@
+from bot.lib.constants import MAP_CATALOGUE_TTL
 from bot.lib.convex_client import client
 from bot.lib.exceptions import BotException
-from bot.lib.log import log
+from bot.lib.log import log, ERROR
+from bot.lib.metrics import timed_service
+import threading
 import time
 
 
+class MapCatalogue:
+    """In-process copy of the maps table, indexed by _id and upper-case name"""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._by_id: dict[str, dict] = {}
+        self._by_name: dict[str, dict] = {}
+        self._loaded_at: float | None = None
+        self._lock = threading.Lock()
+
+    def is_fresh(self) -> bool:
+        return self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl
+
+    def load(self, maps: list[dict]):
+        by_id = {m["_id"]: m for m in maps}
+        by_name = {m["name"].upper(): m for m in maps}
+        with self._lock:
+            self._by_id, self._by_name = by_id, by_name
+            self._loaded_at = time.monotonic()
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = None
+
+    def all(self) -> list[dict]:
+        return list(self._by_id.values())
+
+    def active(self) -> list[dict]:
+        return [m for m in self._by_id.values() if m["isEnabled"]]
+
+    def by_id(self, map_id: str) -> dict | None:
+        return self._by_id.get(map_id)
+
+    def by_name(self, name: str) -> dict | None:
+        return self._by_name.get(name.upper())
+
+
+@timed_service
 class MapsServiceImpl:
+    catalogue: MapCatalogue = MapCatalogue(MAP_CATALOGUE_TTL)
+
+    @staticmethod
+    def load_catalogue() -> int:
+        """(Re)load the map catalogue from Convex, returns the number of maps"""
+        try:
+            maps = client.query("maps:list", {})
+            MapsServiceImpl.catalogue.load(maps)
+            log(f"Map catalogue loaded: {len(maps)} maps")
+            return len(maps)
+        except Exception as e:
+            log(f"Error loading map catalogue: {e}", level=ERROR)
+            raise
+
+    @staticmethod
+    def _fresh_catalogue() -> MapCatalogue:
+        if not MapsServiceImpl.catalogue.is_fresh():
+            _ = MapsServiceImpl.load_catalogue()
+        return MapsServiceImpl.catalogue
 
     @staticmethod
     def seed_maps() -> dict:
         """Seed all Valorant maps into database"""
         try:
             result = client.mutation("maps:seedMaps", {})
+            MapsServiceImpl.catalogue.invalidate()
             log(f"Maps seeding result: {result}")
             return result
         except Exception as e:
-            log(f"Error seeding maps: {e}")
+            log(f"Error seeding maps: {e}", level=ERROR)
             raise
 
     @staticmethod
     def get_all_maps() -> list:
         """Get all maps"""
         try:
-            result = client.query("maps:list", {})
-            return result
+            return MapsServiceImpl._fresh_catalogue().all()
         except Exception as e:
-            log(f"Error fetching all maps: {e}")
+            log(f"Error fetching all maps: {e}", level=ERROR)
             raise
 
     @staticmethod
     def get_active_maps() -> list:
         """Get only active (enabled) maps"""
         try:
-            result = client.query("maps:getActive", {})
-            return result
+            return MapsServiceImpl._fresh_catalogue().active()
         except Exception as e:
-            log(f"Error fetching active maps: {e}")
+            log(f"Error fetching active maps: {e}", level=ERROR)
             raise
 
     @staticmethod
     def get_map_by_name(name: str) -> dict:
         """Get a specific map by name"""
         try:
-            result = client.query("maps:getByName", {"name": name})
-            return result
+            return MapsServiceImpl._fresh_catalogue().by_name(name)
+        except Exception as e:
+            log(f"Error fetching map {name}: {e}", level=ERROR)
+            raise
+
+    @staticmethod
+    def get_map_by_id(map_id: str) -> dict:
+        """Get a specific map by ID"""
+        try:
+            return MapsServiceImpl._fresh_catalogue().by_id(map_id)
         except Exception as e:
-            log(f"Error fetching map {name}: {e}")
+            log(f"Error fetching map {map_id}: {e}", level=ERROR)
             raise
 
     @staticmethod
@@ -66,8 +133,9 @@ class MapsServiceImpl:
                     "updateTime": int(time.time() * 1000)
                 }
             )
+            MapsServiceImpl.catalogue.invalidate()
             log(f"Map '{name}' created")
             return result
         except Exception as e:
-            log(f"Error creating map {name}: {e}")
+            log(f"Error creating map {name}: {e}", level=ERROR)
             raise
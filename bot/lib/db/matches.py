@@ -1,8 +1,11 @@
+from discord import Member, User
 from bot.lib.convex_client import client
-from bot.lib.log import log
+from bot.lib.log import log, ERROR
+from bot.lib.metrics import timed_service
 import time
 
 
+@timed_service
 class MatchesServiceImpl:
 
     @staticmethod
@@ -12,7 +15,7 @@ class MatchesServiceImpl:
             result = client.query("matches:findById", {"matchId": match_id})
             return result
         except Exception as e:
-            log(f"Error fetching match {match_id}: {e}")
+            log(f"Error fetching match {match_id}: {e}", level=ERROR)
             raise
 
     @staticmethod
@@ -22,7 +25,17 @@ class MatchesServiceImpl:
             result = client.query("matches:findByThreadId", {"threadId": thread_id})
             return result
         except Exception as e:
-            log(f"Error fetching match by thread {thread_id}: {e}")
+            log(f"Error fetching match by thread {thread_id}: {e}", level=ERROR)
+            raise
+
+    @staticmethod
+    def context_by_thread_id(thread_id: str) -> dict:
+        """Get match, teams, captains and rosters for a thread in one query"""
+        try:
+            result = client.query("matches:contextByThreadId", {"threadId": thread_id})
+            return result
+        except Exception as e:
+            log(f"Error fetching match context for thread {thread_id}: {e}", level=ERROR)
             raise
 
     @staticmethod
@@ -42,7 +55,43 @@ class MatchesServiceImpl:
             log(f"Match created: {team1_id} vs {team2_id} (BO{best_of})")
             return result
         except Exception as e:
-            log(f"Error creating match: {e}")
+            log(f"Error creating match: {e}", level=ERROR)
+            raise
+
+    @staticmethod
+    def create_with_roster(
+        best_of: int,
+        team1_name: str,
+        team1_players: list[User | Member],
+        team1_captain_id: int,
+        team2_name: str,
+        team2_players: list[User | Member],
+        team2_captain_id: int,
+        team1_has_first_pick: bool,
+    ) -> dict:
+        """Create users, teams, match, players and BO1 decider in one mutation, returns all created IDs"""
+        def roster(name: str, players: list[User | Member], captain_id: int, has_first_pick: bool) -> dict:
+            return {
+                "name": name,
+                "captainDiscordId": str(captain_id),
+                "hasFirstPick": has_first_pick,
+                "players": [{"discordId": str(p.id), "username": p.name} for p in players],
+            }
+
+        try:
+            result = client.mutation(
+                "matches:createMatch",
+                {
+                    "team1": roster(team1_name, team1_players, team1_captain_id, team1_has_first_pick),
+                    "team2": roster(team2_name, team2_players, team2_captain_id, not team1_has_first_pick),
+                    "bestOf": best_of,
+                    "updateTime": int(time.time() * 1000)
+                }
+            )
+            log(f"Match created: {result['matchId']} ({team1_name} vs {team2_name}, BO{best_of})")
+            return result
+        except Exception as e:
+            log(f"Error creating match with roster: {e}", level=ERROR)
             raise
 
     @staticmethod
@@ -59,7 +108,7 @@ class MatchesServiceImpl:
             )
             log(f"Match {match_id} thread ID updated to {thread_id}")
         except Exception as e:
-            log(f"Error updating match thread: {e}")
+            log(f"Error updating match thread: {e}", level=ERROR)
             raise
 
     @staticmethod
@@ -76,7 +125,7 @@ class MatchesServiceImpl:
             )
             log(f"Match {match_id} status updated to {status}")
         except Exception as e:
-            log(f"Error updating match status: {e}")
+            log(f"Error updating match status: {e}", level=ERROR)
             raise
 
     @staticmethod
@@ -93,5 +142,5 @@ class MatchesServiceImpl:
             )
             log(f"Match {match_id} score set to {team1_score}-{team2_score}")
         except Exception as e:
-            log(f"Error setting match score: {e}")
+            log(f"Error setting match score: {e}", level=ERROR)
             raise
@@ -0,0 +1,47 @@
+from bot.lib.constants import CURRENT_SEASON, DEFAULT_RATING
+from bot.lib.convex_client import client
+from bot.lib.log import log, ERROR
+from bot.lib.metrics import timed_service
+import time
+
+FINISHED_PAGE_SIZE = 200
+
+
+@timed_service
+class MmrServiceImpl:
+
+    @staticmethod
+    def apply_match(match_id: str, updates: list[dict], replace: bool = False) -> list[dict] | None:
+        """Write all rating changes of a match in one mutation, returns the new ratings or None if already applied.
+
+        Updates without a rating are added to the stored one; a replaced match keeps its season.
+        """
+        try:
+            result = client.mutation(
+                "mmr:applyMatch",
+                {
+                    "matchId": match_id,
+                    "updates": updates,
+                    "replace": replace,
+                    "season": CURRENT_SEASON,
+                    "baseRating": DEFAULT_RATING,
+                    "updateTime": int(time.time() * 1000)
+                }
+            )
+            log(f"MMR for match {match_id}: {len(updates)} players {'updated' if result['applied'] else 'already applied'}")
+            return result["ratings"] if result["applied"] else None
+        except Exception as e:
+            log(f"Error applying MMR for match {match_id}: {e}", level=ERROR)
+            raise
+
+    @staticmethod
+    def finished_matches_page(cursor: str | None) -> dict:
+        """One page of finished matches with rosters, in creation order"""
+        try:
+            return client.query(
+                "mmr:finishedMatchesPage",
+                {"paginationOpts": {"numItems": FINISHED_PAGE_SIZE, "cursor": cursor}}
+            )
+        except Exception as e:
+            log(f"Error fetching finished matches: {e}", level=ERROR)
+            raise
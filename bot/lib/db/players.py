@@ -1,8 +1,10 @@
 from bot.lib.convex_client import client
-from bot.lib.log import log
+from bot.lib.log import log, ERROR
+from bot.lib.metrics import timed_service
 import time
 
 
+@timed_service
 class PlayersServiceImpl:
 
     @staticmethod
@@ -20,14 +22,23 @@ class PlayersServiceImpl:
             log(f"Player {user_id} added to team {team_id}")
             return result
         except Exception as e:
-            log(f"Error adding player to team: {e}")
+            log(f"Error adding player to team: {e}", level=ERROR)
             raise
 
     @staticmethod
     def create_batch(team_id: str, user_ids: list[str]) -> list[str]:
-        """Add multiple players to a team"""
-        result_ids = []
-        for user_id in user_ids:
-            result_id = PlayersServiceImpl.create(team_id, user_id)
-            result_ids.append(result_id)
-        return result_ids
+        """Add multiple players to a team in one mutation, returns player IDs in order"""
+        try:
+            result = client.mutation(
+                "players:createMany",
+                {
+                    "teamId": team_id,
+                    "userIds": user_ids,
+                    "updateTime": int(time.time() * 1000)
+                }
+            )
+            log(f"{len(result)} players added to team {team_id}")
+            return result
+        except Exception as e:
+            log(f"Error adding players to team: {e}", level=ERROR)
+            raise
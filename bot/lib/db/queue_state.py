@@ -0,0 +1,61 @@
+from bot.lib.convex_client import client
+from bot.lib.log import log, ERROR
+from bot.lib.metrics import timed_service
+import time
+
+
+@timed_service
+class QueueStateServiceImpl:
+
+    @staticmethod
+    def append_events(last_seq: int, events: list[dict]) -> str:
+        """Persist one batch of queue journal events, returns batch ID"""
+        try:
+            result = client.mutation(
+                "queueState:appendEvents",
+                {
+                    "lastSeq": last_seq,
+                    "events": events,
+                    "updateTime": int(time.time() * 1000)
+                }
+            )
+            return result
+        except Exception as e:
+            log(f"Error appending {len(events)} queue events: {e}", level=ERROR)
+            raise
+
+    @staticmethod
+    def save_snapshot(seq: int, queues: list[dict]) -> str:
+        """Persist a full queue snapshot and compact the journal up to seq"""
+        try:
+            result = client.mutation(
+                "queueState:saveSnapshot",
+                {
+                    "seq": seq,
+                    "queues": queues,
+                    "updateTime": int(time.time() * 1000)
+                }
+            )
+            log(f"Queue snapshot saved at seq {seq}")
+            return result
+        except Exception as e:
+            log(f"Error saving queue snapshot: {e}", level=ERROR)
+            raise
+
+    @staticmethod
+    def load() -> dict:
+        """Latest snapshot plus the journal batches written after it"""
+        try:
+            return client.query("queueState:load", {})
+        except Exception as e:
+            log(f"Error loading queue state: {e}", level=ERROR)
+            raise
+
+    @staticmethod
+    def latest_seq() -> int:
+        """Highest sequence number persisted in the snapshots or the journal"""
+        try:
+            return client.query("queueState:latestSeq", {})
+        except Exception as e:
+            log(f"Error fetching latest queue seq: {e}", level=ERROR)
+            raise
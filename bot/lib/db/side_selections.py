@@ -1,8 +1,10 @@
 from bot.lib.convex_client import client
-from bot.lib.log import log
+from bot.lib.log import log, ERROR
+from bot.lib.metrics import timed_service
 import time
 
 
+@timed_service
 class SideSelectionsServiceImpl:
 
     @staticmethod
@@ -20,5 +22,5 @@ class SideSelectionsServiceImpl:
             log(f"Side selection created: veto={veto_id}, side={side}")
             return result
         except Exception as e:
-            log(f"Error creating side selection: {e}")
+            log(f"Error creating side selection: {e}", level=ERROR)
             raise
@@ -1,8 +1,10 @@
 from bot.lib.convex_client import client
-from bot.lib.log import log
+from bot.lib.log import log, ERROR
+from bot.lib.metrics import timed_service
 import time
 
 
+@timed_service
 class TeamsServiceImpl:
 
     @staticmethod
@@ -12,7 +14,7 @@ class TeamsServiceImpl:
             result = client.query("teams:findById", {"teamId": team_id})
             return result
         except Exception as e:
-            log(f"Error fetching team {team_id}: {e}")
+            log(f"Error fetching team {team_id}: {e}", level=ERROR)
             raise
 
     @staticmethod
@@ -22,7 +24,7 @@ class TeamsServiceImpl:
             result = client.query("teams:findByThreadId", {"threadId": thread_id})
             return result
         except Exception as e:
-            log(f"Error fetching team by thread {thread_id}: {e}")
+            log(f"Error fetching team by thread {thread_id}: {e}", level=ERROR)
             raise
 
     @staticmethod
@@ -41,5 +43,5 @@ class TeamsServiceImpl:
             log(f"Team '{name}' created with captain {captain_id}")
             return result
         except Exception as e:
-            log(f"Error creating team {name}: {e}")
+            log(f"Error creating team {name}: {e}", level=ERROR)
             raise
@@ -0,0 +1,40 @@
+from bot.lib.convex_client import client
+from bot.lib.log import log, ERROR
+from bot.lib.metrics import timed_service
+import time
+
+
+@timed_service
+class TimersServiceImpl:
+
+    @staticmethod
+    def upsert(timer: dict) -> str:
+        """Create or replace the persisted timer with timer["key"], returns timer ID"""
+        try:
+            return client.mutation(
+                "timers:upsert",
+                {
+                    **timer,
+                    "updateTime": int(time.time() * 1000)
+                }
+            )
+        except Exception as e:
+            log(f"Error saving timer {timer['key']}: {e}", level=ERROR)
+            raise
+
+    @staticmethod
+    def remove(key: str) -> bool:
+        """Delete a persisted timer, returns False if it did not exist"""
+        try:
+            return client.mutation("timers:remove", {"key": key})
+        except Exception as e:
+            log(f"Error removing timer {key}: {e}", level=ERROR)
+            raise
+
+    @staticmethod
+    def list_all() -> list[dict]:
+        try:
+            return client.query("timers:listAll", {})
+        except Exception as e:
+            log(f"Error listing timers: {e}", level=ERROR)
+            raise
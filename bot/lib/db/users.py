@@ -1,8 +1,11 @@
 from discord import Member, User
+from bot.lib.constants import DEFAULT_RATING
 from bot.lib.convex_client import client
-from bot.lib.log import log
+from bot.lib.log import log, ERROR
+from bot.lib.metrics import timed_service
 
 
+@timed_service
 class UsersServiceImpl:
 
     @staticmethod
@@ -12,7 +15,7 @@ class UsersServiceImpl:
             result = client.query("users:findById", {"userId": user_id})
             return result
         except Exception as e:
-            log(f"Error fetching user {user_id}: {e}")
+            log(f"Error fetching user {user_id}: {e}", level=ERROR)
             raise
 
     @staticmethod
@@ -22,7 +25,17 @@ class UsersServiceImpl:
             result = client.query("users:findByDiscordId", {"discordId": discord_id})
             return result
         except Exception as e:
-            log(f"Error fetching user by Discord ID {discord_id}: {e}")
+            log(f"Error fetching user by Discord ID {discord_id}: {e}", level=ERROR)
+            raise
+
+    @staticmethod
+    def get_ratings(discord_ids: list[int]) -> dict[int, float]:
+        """Get stored ratings by Discord ID, DEFAULT_RATING for unrated players"""
+        try:
+            result = client.query("users:ratingsByDiscordIds", {"discordIds": [str(d) for d in discord_ids]})
+            return {int(d): r if r is not None else DEFAULT_RATING for d, r in result.items()}
+        except Exception as e:
+            log(f"Error fetching ratings: {e}", level=ERROR)
             raise
 
     @staticmethod
@@ -39,5 +52,19 @@ class UsersServiceImpl:
             log(f"User {user.name} (ID: {user.id}) created/found")
             return result
         except Exception as e:
-            log(f"Error creating/finding user {user.id}: {e}")
+            log(f"Error creating/finding user {user.id}: {e}", level=ERROR)
+            raise
+
+    @staticmethod
+    def create_or_find_many(users: list[User | Member]) -> dict[int, str]:
+        """Create or find users in one mutation, returns user IDs by Discord ID"""
+        try:
+            result = client.mutation(
+                "users:createOrFindMany",
+                {"users": [{"discordId": str(u.id), "username": u.name} for u in users]}
+            )
+            log(f"{len(result)} users created/found")
+            return {int(d): user_id for d, user_id in result.items()}
+        except Exception as e:
+            log(f"Error creating/finding users: {e}", level=ERROR)
             raise
@@ -1,8 +1,10 @@
 from bot.lib.convex_client import client
-from bot.lib.log import log
+from bot.lib.log import log, ERROR
+from bot.lib.metrics import timed_service
 import time
 
 
+@timed_service
 class VetosServiceImpl:
 
     @staticmethod
@@ -22,19 +24,63 @@ class VetosServiceImpl:
             log(f"Veto created: match={match_id}, team={team_id}, action={action}, order={order}")
             return result
         except Exception as e:
-            log(f"Error creating veto: {e}")
+            log(f"Error creating veto: {e}", level=ERROR)
+            raise
+
+    @staticmethod
+    def record(match_id: str, team_id: str, action: str, order: int,
+               map_id: str | None = None, side: str | None = None) -> dict:
+        """Create a ban, pick or side pick with its selection in one mutation, returns both IDs"""
+        args = {
+            "matchId": match_id,
+            "teamId": team_id,
+            "action": action,
+            "order": order,
+            "updateTime": int(time.time() * 1000)
+        }
+        if map_id is not None:
+            args["mapId"] = map_id
+        if side is not None:
+            args["side"] = side
+        try:
+            result = client.mutation("vetos:record", args)
+            log(f"Veto recorded: match={match_id}, team={team_id}, action={action}, order={order}")
+            return result
+        except Exception as e:
+            log(f"Error recording veto: {e}", level=ERROR)
+            raise
+
+    @staticmethod
+    def list_by_match(match_id: str) -> list[dict]:
+        """Veto history of a match in order, with each step's map or side"""
+        try:
+            result = client.query("vetos:listByMatch", {"matchId": match_id})
+            return result
+        except Exception as e:
+            log(f"Error fetching vetos for match {match_id}: {e}", level=ERROR)
             raise
 
     @staticmethod
     def create_batch(match_id: str, veto_sequence: list[dict]) -> list[str]:
-        """Create multiple vetos from sequence"""
-        result_ids = []
-        for veto_step in veto_sequence:
-            veto_id = VetosServiceImpl.create(
-                match_id=match_id,
-                team_id=veto_step["team_id"],
-                action=veto_step["action"].value,
-                order=veto_step["order"]
+        """Create multiple vetos from sequence in one mutation, returns veto IDs in order"""
+        try:
+            result = client.mutation(
+                "vetos:createMany",
+                {
+                    "matchId": match_id,
+                    "vetos": [
+                        {
+                            "teamId": veto_step["team_id"],
+                            "action": veto_step["action"].value,
+                            "order": veto_step["order"]
+                        }
+                        for veto_step in veto_sequence
+                    ],
+                    "updateTime": int(time.time() * 1000)
+                }
             )
-            result_ids.append(veto_id)
-        return result_ids
+            log(f"{len(result)} vetos created: match={match_id}")
+            return result
+        except Exception as e:
+            log(f"Error creating vetos: {e}", level=ERROR)
+            raise
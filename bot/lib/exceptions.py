@@ -1,4 +1,4 @@
-from bot.lib.log import log
+from bot.lib.log import log, ERROR
 import discord
 
 class BotException(Exception):
@@ -37,17 +37,22 @@ class BotException(Exception):
         return self.ERROR_MESSAGES.get(self.code, "An error occurred.")
 
 
-async def handle_exception(interaction: discord.Interaction, exception: Exception) -> None:
+async def handle_exception(interaction: discord.Interaction, exception: Exception, reply=None) -> None:
+    """Log the exception and tell the user, through reply (an InteractionReply) when the command has one"""
     match exception:
         case BotException() as bot_exc:
             message = bot_exc.get_message()
             log(bot_exc.code + ": " + message)
         case _:
             message = "An unexpected error has occurred. Please try again later."
-            log(message)
-            log(str(exception))
-    
-    await interaction.response.send_message(message, ephemeral=True)
+            log(f"{message} {exception!r}", level=ERROR)
+
+    if reply is not None:
+        await reply.send(message, ephemeral=True)
+    elif interaction.response.is_done():
+        await interaction.followup.send(message, ephemeral=True)
+    else:
+        await interaction.response.send_message(message, ephemeral=True)
 
 def handle_exception2( exception: Exception) -> None:
     match exception:
@@ -56,6 +61,5 @@ def handle_exception2( exception: Exception) -> None:
             log(bot_exc.code + ": " + message)
         case _:
             message = "An unexpected error has occurred"
-            log(message)
-            log(str(exception))
+            log(f"{message} {exception!r}", level=ERROR)
     
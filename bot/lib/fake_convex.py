@@ -0,0 +1,507 @@
+"""In-process stand-in for the Convex deployment.
+
+Implements every query and mutation of convex/*.ts over in-memory tables,
+so the bot, benchmarks and the load simulator run without a network. Like
+the real ConvexClient it is synchronous, and the injected latency blocks
+the calling executor thread exactly like a round trip would. Selected with
+CONVEX_BACKEND=fake, see bot/lib/convex_client.py.
+"""
+import copy
+import random
+import threading
+import time
+from collections import Counter
+
+VALORANT_MAPS = ["ASCENT", "BIND", "HAVEN", "SPLIT", "FRACTURE", "LOTUS", "PEARL"]
+MAP_POOL_COUNT = 7
+# Mirrors the schema's single-field indexes so lookups stay O(1) as tables grow
+INDEXES = {
+    "users": "discordId",
+    "maps": "name",
+    "teams": "threadId",
+    "players": "teamId",
+    "matches": "threadId",
+    "vetos": "matchId",
+    "mapSelections": "vetoId",
+    "sideSelections": "vetoId",
+    "mmr": "matchId",
+    "seasonRatings": "userId",
+    "timers": "key",
+}
+TABLES = (
+    "users", "maps", "teams", "players", "matches", "vetos", "mapSelections", "sideSelections",
+    "games", "queueJournal", "queueSnapshots", "mmr", "seasonRatings", "timers",
+)
+# Order of the BO3 veto as (acting team, action), the team being 0 for the first pick holder
+VETO_STEPS = [(0, "ban"), (1, "ban"), (0, "pick"), (1, "side_pick"), (1, "pick"), (0, "side_pick"), (0, "ban"), (1, "ban")]
+
+
+def _now() -> int:
+    return int(time.time() * 1000)
+
+
+class FakeConvex:
+    """ConvexClient look-alike: query/mutation of "module:function" with an args dict"""
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, seed: int | None = None, seed_maps: bool = True):
+        self.latency = latency
+        self.jitter = jitter
+        self.calls: Counter[str] = Counter()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.tables: dict[str, dict[str, dict]] = {name: {} for name in TABLES}
+        self._table_of: dict[str, str] = {}
+        self._indexes: dict[str, dict] = {table: {} for table in INDEXES}
+        if seed_maps:
+            _ = self.maps__seedMaps({})
+
+    # ConvexClient interface
+
+    def query(self, name: str, args: dict | None = None):
+        return self._call(name, args or {})
+
+    def mutation(self, name: str, args: dict | None = None):
+        return self._call(name, args or {})
+
+    def _call(self, name: str, args: dict):
+        handler = getattr(self, name.replace(":", "__"), None)
+        if handler is None:
+            raise NotImplementedError(f"Fake Convex does not implement {name}")
+        if self.latency or self.jitter:
+            # Latency is sampled under the lock, the sleep itself runs concurrently
+            with self._lock:
+                delay = max(0.0, self._rng.gauss(self.latency, self.jitter))
+            time.sleep(delay)
+        # One lock for everything, so each function is a transaction like on Convex
+        with self._lock:
+            self.calls[name] += 1
+            # Arguments and results are copies, like documents crossing the wire
+            return copy.deepcopy(handler(copy.deepcopy(args)))
+
+    # Table helpers
+
+    def _insert(self, table: str, doc: dict) -> str:
+        doc_id = f"{self._rng.getrandbits(128):032x}"
+        self.tables[table][doc_id] = {"_id": doc_id, "_creationTime": time.time() * 1000, **doc}
+        self._table_of[doc_id] = table
+        self._index_add(table, self.tables[table][doc_id])
+        return doc_id
+
+    def _get(self, doc_id: str) -> dict | None:
+        table = self._table_of.get(doc_id)
+        return self.tables[table].get(doc_id) if table else None
+
+    def _patch(self, doc_id: str, **fields):
+        doc = self._get(doc_id)
+        if doc is None:
+            raise ValueError(f"Document {doc_id} not found")
+        table = self._table_of[doc_id]
+        self._index_remove(table, doc)
+        doc.update(fields)
+        self._index_add(table, doc)
+
+    def _delete(self, doc_id: str):
+        table = self._table_of.pop(doc_id)
+        self._index_remove(table, self.tables[table].pop(doc_id))
+
+    def _index_add(self, table: str, doc: dict):
+        field = INDEXES.get(table)
+        if field and doc.get(field) is not None:
+            self._indexes[table].setdefault(doc[field], []).append(doc["_id"])
+
+    def _index_remove(self, table: str, doc: dict):
+        field = INDEXES.get(table)
+        if field and doc.get(field) is not None:
+            self._indexes[table][doc[field]].remove(doc["_id"])
+
+    def _where(self, table: str, **fields) -> list[dict]:
+        """Documents in insertion order whose fields all match, through the index when it covers one"""
+        field = INDEXES.get(table)
+        if field in fields:
+            docs = [self.tables[table][i] for i in self._indexes[table].get(fields[field], [])]
+        else:
+            docs = self.tables[table].values()
+        return [d for d in docs if all(d.get(k) == v for k, v in fields.items())]
+
+    def _first(self, table: str, **fields) -> dict | None:
+        docs = self._where(table, **fields)
+        return docs[0] if docs else None
+
+    def _find_or_create_user(self, discord_id: str, username: str) -> str:
+        existing = self._first("users", discordId=discord_id)
+        if existing:
+            return existing["_id"]
+        return self._insert("users", {"discordId": discord_id, "username": username, "updateTime": _now()})
+
+    # users
+
+    def users__findById(self, args):
+        return self._get(args["userId"])
+
+    def users__findByDiscordId(self, args):
+        return self._first("users", discordId=args["discordId"])
+
+    def users__ratingsByDiscordIds(self, args):
+        ratings = {}
+        for discord_id in args["discordIds"]:
+            user = self._first("users", discordId=discord_id)
+            ratings[discord_id] = user.get("rating") if user else None
+        return ratings
+
+    def users__createOrFind(self, args):
+        return self._find_or_create_user(args["discordId"], args["username"])
+
+    def users__createOrFindMany(self, args):
+        return {u["discordId"]: self._find_or_create_user(u["discordId"], u["username"]) for u in args["users"]}
+
+    # teams
+
+    def teams__findById(self, args):
+        return self._get(args["teamId"])
+
+    def teams__findByThreadId(self, args):
+        return self._first("teams", threadId=args["threadId"])
+
+    def teams__create(self, args):
+        return self._insert("teams", args)
+
+    def teams__updateThreadId(self, args):
+        self._patch(args["teamId"], threadId=args["threadId"], updateTime=args["updateTime"])
+
+    def teams__updateVoiceChannelId(self, args):
+        self._patch(args["teamId"], voiceChannelId=args["voiceChannelId"], updateTime=args["updateTime"])
+
+    # players
+
+    def players__create(self, args):
+        return self._insert("players", args)
+
+    def players__createMany(self, args):
+        return [
+            self._insert("players", {"teamId": args["teamId"], "userId": user_id, "updateTime": args["updateTime"]})
+            for user_id in args["userIds"]
+        ]
+
+    # matches
+
+    def matches__findById(self, args):
+        return self._get(args["matchId"])
+
+    def matches__findByThreadId(self, args):
+        return self._first("matches", threadId=args["threadId"])
+
+    def matches__contextByThreadId(self, args):
+        match = self._first("matches", threadId=args["threadId"])
+        if match is None:
+            return None
+        result = {"match": match}
+        for number, team_id in ((1, match["team1"]), (2, match["team2"])):
+            team = self._get(team_id)
+            if team is None:
+                raise ValueError(f"Team {team_id} not found")
+            captain = self._get(team["captainId"])
+            roster = []
+            for player in self._where("players", teamId=team_id):
+                user = self._get(player["userId"])
+                if user:
+                    roster.append({"userId": user["_id"], "discordId": user["discordId"]})
+            result[f"team{number}"] = {
+                "team": team,
+                "captainDiscordId": captain["discordId"] if captain else None,
+                "roster": roster,
+            }
+        return result
+
+    def matches__create(self, args):
+        return self._insert("matches", args)
+
+    def matches__updateThreadId(self, args):
+        self._patch(args["matchId"], threadId=args["threadId"], updateTime=args["updateTime"])
+
+    def matches__updateStatus(self, args):
+        self._patch(args["matchId"], status=args["status"], updateTime=args["updateTime"])
+
+    def matches__setScore(self, args):
+        self._patch(
+            args["matchId"],
+            team1Score=args["team1Score"], team2Score=args["team2Score"],
+            status="finished", updateTime=args["updateTime"],
+        )
+
+    def matches__createMatch(self, args):
+        update_time = args["updateTime"]
+        teams = (args["team1"], args["team2"])
+        user_ids = {}
+        for team in teams:
+            for player in team["players"]:
+                user_ids[player["discordId"]] = self._find_or_create_user(player["discordId"], player["username"])
+
+        team_ids = []
+        for team in teams:
+            captain_id = user_ids.get(team["captainDiscordId"])
+            if captain_id is None:
+                raise ValueError(f"Captain {team['captainDiscordId']} is not in team \"{team['name']}\"")
+            team_ids.append(self._insert("teams", {
+                "name": team["name"],
+                "captainId": captain_id,
+                "hasFirstPick": team["hasFirstPick"],
+                "updateTime": update_time,
+            }))
+
+        match_id = self._insert("matches", {
+            "team1": team_ids[0],
+            "team2": team_ids[1],
+            "bestOf": args["bestOf"],
+            "status": "veto_phase",
+            "updateTime": update_time,
+        })
+        player_ids = [
+            self._insert("players", {"teamId": team_id, "userId": user_ids[p["discordId"]], "updateTime": update_time})
+            for team_id, team in zip(team_ids, teams)
+            for p in team["players"]
+        ]
+
+        decider = None
+        active = self._where("maps", isEnabled=True)
+        if args["bestOf"] == 1 and active:
+            chosen = self._rng.choice(active)
+            veto_id = self._insert("vetos", {
+                "matchId": match_id, "teamId": team_ids[0], "action": "decider", "order": 1, "updateTime": update_time,
+            })
+            _ = self._insert("mapSelections", {"vetoId": veto_id, "mapId": chosen["_id"], "updateTime": update_time})
+            decider = {"vetoId": veto_id, "mapId": chosen["_id"], "name": chosen["name"]}
+
+        return {
+            "matchId": match_id, "team1Id": team_ids[0], "team2Id": team_ids[1],
+            "userIds": user_ids, "playerIds": player_ids, "decider": decider,
+        }
+
+    # vetos and selections
+
+    def vetos__create(self, args):
+        return self._insert("vetos", args)
+
+    def vetos__record(self, args):
+        side_pick = args["action"] == "side_pick"
+        if not (args.get("side") if side_pick else args.get("mapId")):
+            raise ValueError(f"Veto {args['action']} needs a {'side' if side_pick else 'map'}")
+        existing = self._first("vetos", matchId=args["matchId"], order=args["order"])
+        if existing:
+            table = "sideSelections" if existing["action"] == "side_pick" else "mapSelections"
+            if self._first(table, vetoId=existing["_id"]):
+                raise ValueError(f"Veto step {args['order']} already recorded")
+            self._delete(existing["_id"])
+        veto_id = self._insert("vetos", {
+            "matchId": args["matchId"], "teamId": args["teamId"], "action": args["action"],
+            "order": args["order"], "updateTime": args["updateTime"],
+        })
+        if side_pick:
+            selection_id = self._insert("sideSelections", {"vetoId": veto_id, "side": args["side"], "updateTime": args["updateTime"]})
+        else:
+            selection_id = self._insert("mapSelections", {"vetoId": veto_id, "mapId": args["mapId"], "updateTime": args["updateTime"]})
+        return {"vetoId": veto_id, "selectionId": selection_id}
+
+    def vetos__createMany(self, args):
+        return [
+            self._insert("vetos", {"matchId": args["matchId"], **veto, "updateTime": args["updateTime"]})
+            for veto in args["vetos"]
+        ]
+
+    def vetos__listByMatch(self, args):
+        history = []
+        for veto in self._where("vetos", matchId=args["matchId"]):
+            map_selection = self._first("mapSelections", vetoId=veto["_id"])
+            side_selection = self._first("sideSelections", vetoId=veto["_id"])
+            history.append({
+                "vetoId": veto["_id"], "teamId": veto["teamId"], "action": veto["action"], "order": veto["order"],
+                "mapId": map_selection["mapId"] if map_selection else None,
+                "side": side_selection["side"] if side_selection else None,
+            })
+        return sorted(history, key=lambda h: h["order"])
+
+    def vetos__nextStep(self, args):
+        match = self._get(args["matchId"])
+        if match is None:
+            raise ValueError("Match not found")
+        if match["bestOf"] != 3:
+            return None
+        step = len(self._where("vetos", matchId=args["matchId"]))
+        team1, team2 = self._get(match["team1"]), self._get(match["team2"])
+        if team1 is None or team2 is None:
+            raise ValueError("Teams not found")
+        if step >= len(VETO_STEPS):
+            return None
+        acting, action = VETO_STEPS[step]
+        order = (team1, team2) if team1.get("hasFirstPick") else (team2, team1)
+        return {"captainId": order[acting]["captainId"], "action": action}
+
+    def mapSelections__create(self, args):
+        return self._insert("mapSelections", args)
+
+    def sideSelections__create(self, args):
+        return self._insert("sideSelections", args)
+
+    # maps
+
+    def maps__list(self, args):
+        return list(self.tables["maps"].values())
+
+    def maps__getActive(self, args):
+        return self._where("maps", isEnabled=True)
+
+    def maps__getByName(self, args):
+        return self._first("maps", name=args["name"])
+
+    def maps__create(self, args):
+        if self._first("maps", name=args["name"]):
+            raise ValueError(f"Map \"{args['name']}\" already exists")
+        return self._insert("maps", args)
+
+    def maps__seedMaps(self, args):
+        for doc in list(self.tables["maps"].values()):
+            if doc["name"] != doc["name"].upper():
+                self._patch(doc["_id"], name=doc["name"].upper(), updateTime=_now())
+        active = {d["name"] for d in self._where("maps", isEnabled=True)}
+        if len(active) > MAP_POOL_COUNT:
+            raise ValueError(f"Too many active maps: {len(active)} (expected {MAP_POOL_COUNT})")
+        if len(active) == MAP_POOL_COUNT:
+            return {"message": "Maps already seeded correctly", "count": len(active)}
+        created = [
+            {"name": name, "id": self._insert("maps", {"name": name, "isEnabled": True, "updateTime": _now()})}
+            for name in VALORANT_MAPS if name not in active
+        ]
+        return {"message": "Maps seeded successfully", "previousCount": len(active), "added": len(created), "maps": created}
+
+    def maps__validate(self, args):
+        return len(self._where("maps", isEnabled=True)) == MAP_POOL_COUNT
+
+    # queue journal
+
+    def queueState__appendEvents(self, args):
+        return self._insert("queueJournal", args)
+
+    def queueState__saveSnapshot(self, args):
+        snapshot_id = self._insert("queueSnapshots", args)
+        for doc in list(self.tables["queueSnapshots"].values()):
+            if doc["seq"] < args["seq"]:
+                self._delete(doc["_id"])
+        for doc in list(self.tables["queueJournal"].values()):
+            if doc["lastSeq"] <= args["seq"]:
+                self._delete(doc["_id"])
+        return snapshot_id
+
+    def queueState__load(self, args):
+        snapshots = sorted(self.tables["queueSnapshots"].values(), key=lambda s: s["seq"])
+        snapshot = snapshots[-1] if snapshots else None
+        from_seq = snapshot["seq"] if snapshot else 0
+        batches = sorted(
+            (b for b in self.tables["queueJournal"].values() if b["lastSeq"] > from_seq),
+            key=lambda b: b["lastSeq"],
+        )
+        return {"snapshot": snapshot, "batches": batches}
+
+    def queueState__latestSeq(self, args):
+        seqs = [s["seq"] for s in self.tables["queueSnapshots"].values()]
+        seqs += [b["lastSeq"] for b in self.tables["queueJournal"].values()]
+        return max(seqs, default=0)
+
+    # mmr and leaderboards
+
+    def _add_season_delta(self, season: str, user_id: str, delta: float, base_rating: float, update_time: int):
+        row = self._first("seasonRatings", season=season, userId=user_id)
+        if row:
+            self._patch(row["_id"], rating=row["rating"] + delta, updateTime=update_time)
+        else:
+            _ = self._insert("seasonRatings", {
+                "season": season, "userId": user_id, "rating": base_rating + delta, "updateTime": update_time,
+            })
+
+    def mmr__applyMatch(self, args):
+        existing = self._where("mmr", matchId=args["matchId"])
+        season = args["season"]
+        if existing:
+            if not args.get("replace"):
+                return {"applied": False, "ratings": []}
+            season = existing[0].get("season")
+            for row in existing:
+                if row.get("season") is not None:
+                    self._add_season_delta(row["season"], row["userId"], -row["delta"], args["baseRating"], args["updateTime"])
+                self._delete(row["_id"])
+
+        ratings = []
+        for update in args["updates"]:
+            rating = update.get("rating")
+            if rating is None:
+                user = self._get(update["userId"])
+                current = user.get("rating") if user else None
+                rating = round((args["baseRating"] if current is None else current) + update["delta"], 2)
+            _ = self._insert("mmr", {
+                "matchId": args["matchId"], "userId": update["userId"], "delta": update["delta"],
+                "rating": rating, "season": season, "updateTime": args["updateTime"],
+            })
+            self._patch(update["userId"], rating=rating, updateTime=args["updateTime"])
+            if season is not None:
+                self._add_season_delta(season, update["userId"], update["delta"], args["baseRating"], args["updateTime"])
+            ratings.append({"userId": update["userId"], "delta": update["delta"], "rating": rating})
+        return {"applied": True, "ratings": ratings}
+
+    def mmr__finishedMatchesPage(self, args):
+        matches = [m for m in self.tables["matches"].values() if m["status"] == "finished"]
+        options = args["paginationOpts"]
+        start = int(options.get("cursor") or 0)
+        end = start + options["numItems"]
+        page = []
+        for match in matches[start:end]:
+            if match.get("team1Score") is None or match.get("team2Score") is None:
+                continue
+            rosters = [[p["userId"] for p in self._where("players", teamId=t)] for t in (match["team1"], match["team2"])]
+            page.append({
+                "matchId": match["_id"],
+                "team1Score": match["team1Score"],
+                "team2Score": match["team2Score"],
+                "team1": rosters[0],
+                "team2": rosters[1],
+            })
+        return {"page": page, "isDone": end >= len(matches), "continueCursor": str(min(end, len(matches)))}
+
+    def leaderboard__ratingsPage(self, args):
+        if args["board"] == "alltime":
+            docs = list(self.tables["users"].values())
+        else:
+            docs = self._where("seasonRatings", season=args["season"])
+
+        # The cursor is the offset of the next page, opaque to the caller like Convex cursors
+        options = args["paginationOpts"]
+        start = int(options.get("cursor") or 0)
+        end = start + options["numItems"]
+        page = []
+        for doc in docs[start:end]:
+            user = doc if args["board"] == "alltime" else self._get(doc["userId"])
+            if user is None or doc.get("rating") is None:
+                continue
+            page.append({
+                "userId": user["_id"], "discordId": user["discordId"], "username": user["username"], "rating": doc["rating"],
+            })
+        return {"page": page, "isDone": end >= len(docs), "continueCursor": str(min(end, len(docs)))}
+
+    # timers
+
+    def timers__upsert(self, args):
+        existing = self._first("timers", key=args["key"])
+        if existing:
+            self._patch(
+                existing["_id"],
+                kind=args["kind"], dueAt=args["dueAt"], payload=args["payload"], updateTime=args["updateTime"],
+            )
+            return existing["_id"]
+        return self._insert("timers", args)
+
+    def timers__remove(self, args):
+        existing = self._first("timers", key=args["key"])
+        if existing is None:
+            return False
+        self._delete(existing["_id"])
+        return True
+
+    def timers__listAll(self, args):
+        return sorted(self.tables["timers"].values(), key=lambda t: t["dueAt"])
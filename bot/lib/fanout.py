@@ -0,0 +1,53 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Iterable, TypeVar
+from bot.lib.constants import FANOUT_CONCURRENCY
+from bot.lib.log import log
+
+K = TypeVar("K")
+
+
+class FanOutResult:
+    """Outcome of a fan-out: who was reached, who failed and how long it took"""
+
+    def __init__(self, sent: list, failed: dict, elapsed: float):
+        self.sent = sent
+        self.failed = failed
+        self.elapsed = elapsed
+
+    @property
+    def ok(self) -> bool:
+        return not self.failed
+
+
+async def fan_out(
+    label: str,
+    recipients: Iterable[K],
+    send: Callable[[K], Awaitable[object]],
+    limit: int = FANOUT_CONCURRENCY,
+) -> FanOutResult:
+    """Run send for every recipient concurrently, at most `limit` at a time.
+
+    A failing recipient never aborts the batch; its exception is collected
+    in FanOutResult.failed instead.
+    """
+    semaphore = asyncio.Semaphore(max(1, limit))
+    sent = []
+    failed = {}
+
+    async def run(recipient: K):
+        async with semaphore:
+            try:
+                _ = await send(recipient)
+                sent.append(recipient)
+            except Exception as e:
+                failed[recipient] = e
+
+    start = time.perf_counter()
+    _ = await asyncio.gather(*(run(r) for r in recipients))
+    elapsed = time.perf_counter() - start
+
+    log(f"Fan-out '{label}': {len(sent)} sent, {len(failed)} failed in {elapsed * 1000:.0f}ms")
+    for recipient, e in failed.items():
+        log(f"Fan-out '{label}' failed for {getattr(recipient, 'id', recipient)}: {e}")
+    return FanOutResult(sent, failed, elapsed)
@@ -0,0 +1,81 @@
+import asyncio
+import time
+import discord
+from bot.lib.constants import INTERACTION_ACK_DEADLINE, INTERACTION_DEFER_AFTER
+from bot.lib.log import log, WARNING
+from bot.lib.metrics import Metrics
+
+
+class InteractionReply:
+    """Answers an interaction in time, however long the handler takes.
+
+    Created as the handler starts, it arms a watchdog that defers the
+    interaction once INTERACTION_DEFER_AFTER seconds have passed since
+    Discord created it. send() is the single way to answer: the initial
+    response if nothing went out yet, the deferred message otherwise.
+    Watchdog and send() share a lock, so they never both acknowledge.
+    """
+
+    def __init__(self, interaction: discord.Interaction, ephemeral: bool = False):
+        self.interaction = interaction
+        self.command = getattr(interaction.command, "qualified_name", None) or "unknown"
+        # Visibility of the "thinking" message, fixed when deferring
+        self.ephemeral = ephemeral
+        self.deferred = False
+        self._acked = False
+        self._lock = asyncio.Lock()
+        self._watchdog = asyncio.create_task(self._defer_when_due())
+
+    def elapsed(self) -> float:
+        """Seconds since Discord created the interaction, clamped against clock skew"""
+        created_at = getattr(self.interaction, "created_at", None)
+        if created_at is None:
+            return 0.0
+        return max(0.0, time.time() - created_at.timestamp())
+
+    async def send(self, content: str, ephemeral: bool = False):
+        async with self._lock:
+            self._stop_watchdog()
+            response = self.interaction.response
+            if not response.is_done():
+                _ = await response.send_message(content, ephemeral=ephemeral)
+                self._record_ack()
+            elif self.deferred and ephemeral == self.ephemeral:
+                _ = await self.interaction.edit_original_response(content=content)
+            else:
+                _ = await self.interaction.followup.send(content, ephemeral=ephemeral)
+                if self.deferred:
+                    # The "thinking" message had the other visibility, do not leave it behind
+                    try:
+                        await self.interaction.delete_original_response()
+                    except discord.HTTPException:
+                        pass
+                    self.deferred = False
+
+    def _stop_watchdog(self):
+        if not self._watchdog.done():
+            self._watchdog.cancel()
+
+    def _record_ack(self):
+        if self._acked:
+            return
+        self._acked = True
+        elapsed = self.elapsed()
+        Metrics.interactions.inc(self.command)
+        Metrics.interaction_ack.observe(elapsed, self.command)
+        if elapsed > INTERACTION_ACK_DEADLINE:
+            log(f"Interaction {self.command} acknowledged after {elapsed:.2f}s", level=WARNING)
+
+    async def _defer_when_due(self):
+        await asyncio.sleep(max(0.0, INTERACTION_DEFER_AFTER - self.elapsed()))
+        async with self._lock:
+            if self.interaction.response.is_done():
+                return
+            try:
+                await self.interaction.response.defer(ephemeral=self.ephemeral, thinking=True)
+            except discord.HTTPException as e:
+                log(f"Could not defer {self.command}: {e}", level=WARNING)
+                return
+            self.deferred = True
+            Metrics.deferrals.inc(self.command)
+            self._record_ack()
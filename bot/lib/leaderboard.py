@@ -0,0 +1,208 @@
+import asyncio
+from typing import Any, Callable
+from sortedcontainers import SortedList
+from bot.lib.constants import (
+    CURRENT_SEASON, DEFAULT_RATING, LEADERBOARD_PAGE_SIZE, LEADERBOARD_PAGE_CACHE_SIZE,
+    LEADERBOARD_LOAD_RETRY_DELAY, LEADERBOARD_LOAD_MAX_RETRY_DELAY,
+)
+from bot.lib.db.db import async_db
+from bot.lib.log import log, ERROR
+from bot.lib.lru import LRUCache
+from bot.lib.user_identity import UserIdentities
+
+
+class RankedBoard:
+    """Players kept sorted by score: O(log n) updates and rank lookups, O(log n + page) top-N reads.
+
+    Entries are (-score, user_id) so ties are ranked deterministically.
+    """
+
+    def __init__(self):
+        self._order: SortedList = SortedList()
+        self._scores: dict[str, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def score(self, user_id: str) -> float | None:
+        return self._scores.get(user_id)
+
+    def update(self, user_id: str, score: float):
+        old = self._scores.get(user_id)
+        if old is not None:
+            self._order.remove((-old, user_id))
+        self._scores[user_id] = score
+        self._order.add((-score, user_id))
+
+    def rank(self, user_id: str) -> int | None:
+        """1-based rank, None if the player is not on the board"""
+        score = self._scores.get(user_id)
+        if score is None:
+            return None
+        return self._order.bisect_left((-score, user_id)) + 1
+
+    def page(self, page: int, size: int = LEADERBOARD_PAGE_SIZE) -> list[tuple[int, str, float]]:
+        """(rank, user_id, score) for a 0-based page"""
+        start = page * size
+        return [
+            (start + i + 1, user_id, -neg_score)
+            for i, (neg_score, user_id) in enumerate(self._order[start:start + size])
+        ]
+
+    def page_count(self, size: int = LEADERBOARD_PAGE_SIZE) -> int:
+        return max(1, -(-len(self._order) // size))
+
+
+class Leaderboards:
+    """Materialized all-time and current-season leaderboards.
+
+    Loaded once at startup, retried in the background until it succeeds,
+    then updated incrementally from every applied match. Boards are only
+    served once `available` is set. `version` increases with each change so
+    renderers can cache.
+    """
+
+    boards: dict[str, RankedBoard] = {"alltime": RankedBoard(), "seasonal": RankedBoard()}
+    season: str = CURRENT_SEASON
+    version: int = 0
+    available: bool = False
+    _load_task: asyncio.Task | None = None
+    _usernames: dict[str, str] = {}
+
+    @staticmethod
+    def start():
+        """Load the boards in the background, retrying with backoff until Convex answers"""
+        if Leaderboards._load_task and not Leaderboards._load_task.done():
+            return
+        Leaderboards._load_task = asyncio.create_task(Leaderboards._load_until_available())
+
+    @staticmethod
+    async def _load_until_available():
+        delay = LEADERBOARD_LOAD_RETRY_DELAY
+        while not Leaderboards.available:
+            try:
+                await Leaderboards.load()
+            except Exception as e:
+                log(f"Leaderboards unavailable, retrying in {delay:.0f}s: {e}", level=ERROR)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, LEADERBOARD_LOAD_MAX_RETRY_DELAY)
+
+    @staticmethod
+    async def load():
+        """Fetch both boards and swap them in whole, so a failed load never leaves a partial board"""
+        boards = {name: RankedBoard() for name in Leaderboards.boards}
+        for name, board in boards.items():
+            entries = await async_db.leaderboard.load_board(name, Leaderboards.season)
+            for entry in entries:
+                Leaderboards._remember(entry["userId"], entry["discordId"], entry.get("username"))
+                board.update(entry["userId"], entry["rating"])
+        Leaderboards.boards = boards
+        Leaderboards.available = True
+        Leaderboards._publish()
+        log(f"Leaderboards loaded: {len(Leaderboards.boards['alltime'])} all-time, "
+            f"{len(Leaderboards.boards['seasonal'])} in season {Leaderboards.season}")
+
+    @staticmethod
+    def apply_updates(updates: list[dict], discord_ids: dict[str, str]):
+        """Apply one match's rating updates, discord_ids maps userId -> discordId"""
+        if not Leaderboards.available:
+            # Already written to Convex, the pending load picks them up
+            return
+        seasonal = Leaderboards.boards["seasonal"]
+        for update in updates:
+            user_id = update["userId"]
+            Leaderboards._remember(user_id, discord_ids.get(user_id))
+            Leaderboards.boards["alltime"].update(user_id, update["rating"])
+            season_score = seasonal.score(user_id)
+            base = DEFAULT_RATING if season_score is None else season_score
+            seasonal.update(user_id, base + update["delta"])
+        Leaderboards._publish()
+
+    @staticmethod
+    async def ratings(discord_ids: list[int]) -> dict[int, float]:
+        """Current ratings by Discord ID, DEFAULT_RATING for unrated players.
+
+        Read from the all-time board, which holds every rated player, so a
+        known player missing from it is unrated. Only players missing from
+        the identity cache, or everyone while the boards are unavailable,
+        cost one users:ratingsByDiscordIds query.
+        """
+        if not Leaderboards.available:
+            return await async_db.users.get_ratings(discord_ids)
+        alltime = Leaderboards.boards["alltime"]
+        ratings, missing = {}, []
+        for discord_id in discord_ids:
+            user_id = UserIdentities.user_id(str(discord_id))
+            if user_id is None:
+                missing.append(discord_id)
+                continue
+            rating = alltime.score(user_id)
+            ratings[discord_id] = DEFAULT_RATING if rating is None else rating
+        if missing:
+            ratings.update(await async_db.users.get_ratings(missing))
+        return ratings
+
+    @staticmethod
+    async def rank_of(board: str, discord_id: str) -> tuple[int, float] | None:
+        """(rank, score) of a Discord user on a board, one query if the user is not cached"""
+        user_id = UserIdentities.user_id(discord_id)
+        if user_id is None:
+            user = await async_db.users.find_by_discord_id(discord_id)
+            if not user:
+                return None
+            user_id = user["_id"]
+            UserIdentities.put(discord_id, user_id)
+        ranked = Leaderboards.boards[board]
+        rank = ranked.rank(user_id)
+        if rank is None:
+            return None
+        return rank, ranked.score(user_id)
+
+    @staticmethod
+    def display_name(user_id: str) -> str:
+        if username := Leaderboards._usernames.get(user_id):
+            return username
+        if discord_id := UserIdentities.discord_id(user_id):
+            return f"<@{discord_id}>"
+        return "Unknown player"
+
+    @staticmethod
+    def _publish():
+        Leaderboards.version += 1
+        LeaderboardPages.invalidate()
+
+    @staticmethod
+    def _remember(user_id: str, discord_id: str | None, username: str | None = None):
+        if discord_id:
+            UserIdentities.put(discord_id, user_id)
+        if username:
+            Leaderboards._usernames[user_id] = username
+
+
+class LeaderboardPages:
+    """Rendered leaderboard pages keyed on (board, page) for the current version.
+
+    Pages are rendered on first request only, a hit touches neither Convex
+    nor the boards. Every published version drops all rendered pages.
+    """
+
+    _pages: LRUCache[tuple[str, int], tuple[int, Any]] = LRUCache(LEADERBOARD_PAGE_CACHE_SIZE)
+    hits: int = 0
+    misses: int = 0
+
+    @staticmethod
+    def get(board: str, page: int, render: Callable[[str, int], Any]) -> Any:
+        key = (board, page)
+        cached = LeaderboardPages._pages.get(key)
+        if cached is not None and cached[0] == Leaderboards.version:
+            LeaderboardPages.hits += 1
+            return cached[1]
+        LeaderboardPages.misses += 1
+        version = Leaderboards.version
+        rendered = render(board, page)
+        LeaderboardPages._pages.put(key, (version, rendered))
+        return rendered
+
+    @staticmethod
+    def invalidate():
+        LeaderboardPages._pages.clear()
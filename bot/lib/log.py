@@ -1,5 +1,136 @@
+import atexit
+import json
+import queue
+import random
 import sys
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable
+from bot.lib.constants import LOG_LEVEL, LOG_FORMAT, LOG_DEBUG_SAMPLE, LOG_BATCH_SIZE
 
-def log(message: str) -> None:
-    print(message, flush=True)
-    _ = sys.stdout.flush()
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+LEVEL_NAMES = {DEBUG: "debug", INFO: "info", WARNING: "warning", ERROR: "error"}
+
+_min_level = {name: level for level, name in LEVEL_NAMES.items()}.get(LOG_LEVEL.lower(), INFO)
+# Fields such as match_id and user_id attached to every record logged in the current task
+_context: ContextVar[dict] = ContextVar("log_context", default={})
+_records: queue.SimpleQueue = queue.SimpleQueue()
+_writer: threading.Thread | None = None
+_writer_lock = threading.Lock()
+
+
+class _Flush:
+    """Queue marker the writer acknowledges once every record before it is written"""
+
+    def __init__(self):
+        self.done = threading.Event()
+
+
+def enabled(level: int) -> bool:
+    return level >= _min_level
+
+
+def log(message: str | Callable[[], str], level: int = INFO, sample: float | None = None, **fields) -> None:
+    """Queue a record for the writer thread; a disabled level costs one comparison.
+
+    message may be a callable, formatted only if the record is kept. Debug
+    records are sampled at LOG_DEBUG_SAMPLE unless sample is given.
+    """
+    if level < _min_level:
+        return
+    if sample is None and level == DEBUG:
+        sample = LOG_DEBUG_SAMPLE
+    if sample is not None and sample < 1 and random.random() >= sample:
+        return
+    context = _context.get()
+    if context:
+        fields = {**context, **fields}
+    _records.put((time.time(), level, message() if callable(message) else message, fields))
+    if _writer is None:
+        _start_writer()
+
+
+@contextmanager
+def log_context(**fields):
+    """Attach fields to every record logged inside the block, including tasks it creates"""
+    token = _context.set({**_context.get(), **fields})
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+def flush(timeout: float = 5.0):
+    """Block until every record queued so far has been written"""
+    if _writer is None:
+        return
+    marker = _Flush()
+    _records.put(marker)
+    _ = marker.done.wait(timeout)
+
+
+def _format(record: tuple) -> str:
+    created, level, message, fields = record
+    if LOG_FORMAT == "text":
+        extra = "".join(f" {k}={v}" for k, v in fields.items())
+        return f"{time.strftime('%H:%M:%S', time.localtime(created))} {LEVEL_NAMES[level].upper()} {message}{extra}"
+    return json.dumps(
+        {"ts": round(created, 3), "level": LEVEL_NAMES[level], "msg": message, **fields},
+        ensure_ascii=False, default=str,
+    )
+
+
+def _format_failure(record: tuple, error: Exception) -> str:
+    try:
+        message = repr(record[2])
+    except Exception:
+        message = "<unprintable>"
+    return json.dumps({"ts": round(time.time(), 3), "level": "error", "msg": f"Unformattable log record {message}: {error!r}"})
+
+
+def _write():
+    while True:
+        batch = [_records.get()]
+        while len(batch) < LOG_BATCH_SIZE:
+            try:
+                batch.append(_records.get_nowait())
+            except queue.Empty:
+                break
+
+        lines = []
+        for record in batch:
+            if not isinstance(record, tuple):
+                continue
+            # A record that cannot be formatted must not take the writer thread down with it
+            try:
+                lines.append(_format(record))
+            except Exception as e:
+                lines.append(_format_failure(record, e))
+        if lines:
+            # Resolved per batch so redirect_stdout keeps working
+            out = sys.stdout
+            try:
+                _ = out.write("\n".join(lines) + "\n")
+                out.flush()
+            except Exception:
+                pass
+        for marker in batch:
+            if isinstance(marker, _Flush):
+                marker.done.set()
+
+
+def _start_writer():
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = threading.Thread(target=_write, name="log-writer", daemon=True)
+            _writer.start()
+
+
+# The writer is a daemon thread, so drain it before the interpreter exits
+_ = atexit.register(flush)
@@ -0,0 +1,89 @@
+from bot.lib.constants import MATCH_CONTEXT_CACHE_SIZE
+from bot.lib.log import log
+from bot.lib.lru import LRUCache
+from bot.lib.user_identity import UserIdentities
+
+
+class MatchContext:
+    """What veto and score commands need to know about a match thread"""
+
+    def __init__(
+        self,
+        thread_id: str,
+        match: dict,
+        teams: dict[int, dict],
+        captain_discord_ids: dict[int, str],
+        rosters: dict[int, list[dict]],
+    ):
+        self.thread_id = thread_id
+        self.match = match
+        self.teams = teams
+        self.captain_discord_ids = captain_discord_ids
+        self.rosters = rosters
+
+    @property
+    def match_id(self) -> str:
+        return self.match["_id"]
+
+    @property
+    def status(self) -> str:
+        return self.match["status"]
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in ("finished", "archived")
+
+    def team_id(self, team_number: int) -> str:
+        return self.match["team1"] if team_number == 1 else self.match["team2"]
+
+    def captain_discord_id(self, team_number: int) -> str | None:
+        return self.captain_discord_ids.get(team_number)
+
+    def is_captain(self, discord_id: str) -> bool:
+        return discord_id in self.captain_discord_ids.values()
+
+    @staticmethod
+    def from_query(thread_id: str, result: dict) -> "MatchContext":
+        """Build from a matches:contextByThreadId result"""
+        return MatchContext(
+            thread_id=thread_id,
+            match=result["match"],
+            teams={n: result[f"team{n}"]["team"] for n in (1, 2)},
+            captain_discord_ids={n: result[f"team{n}"]["captainDiscordId"] for n in (1, 2)},
+            rosters={n: result[f"team{n}"]["roster"] for n in (1, 2)},
+        )
+
+
+class MatchContextCache:
+    """Thread ID -> MatchContext, filled at match creation and loaded lazily after restarts"""
+
+    _by_thread: LRUCache[str, MatchContext] = LRUCache(MATCH_CONTEXT_CACHE_SIZE)
+    _thread_by_match: LRUCache[str, str] = LRUCache(MATCH_CONTEXT_CACHE_SIZE)
+
+    @staticmethod
+    def put(context: MatchContext):
+        MatchContextCache._by_thread.put(context.thread_id, context)
+        MatchContextCache._thread_by_match.put(context.match_id, context.thread_id)
+
+    @staticmethod
+    async def get(thread_id: str) -> MatchContext | None:
+        """Cached context for a thread, one Convex query on a miss, None if it is not a match thread"""
+        context = MatchContextCache._by_thread.get(thread_id)
+        if context is not None:
+            return context
+
+        from bot.lib.db.db import async_db
+        result = await async_db.matches.context_by_thread_id(thread_id)
+        if not result:
+            return None
+        context = MatchContext.from_query(thread_id, result)
+        MatchContextCache.put(context)
+        UserIdentities.put_many({p["discordId"]: p["userId"] for n in (1, 2) for p in context.rosters[n]})
+        return context
+
+    @staticmethod
+    def invalidate(match_id: str):
+        thread_id = MatchContextCache._thread_by_match.pop(match_id)
+        if thread_id is not None:
+            _ = MatchContextCache._by_thread.pop(thread_id)
+            log(f"Match context invalidated for match {match_id}")
@@ -0,0 +1,137 @@
+from itertools import islice
+
+
+class MatchQueue:
+    """Queue of Discord user IDs for one best-of mode.
+
+    Members live in an insertion-ordered dict, so join/leave/ready are O(1)
+    and taking the next batch of k players is O(k). Players are matched
+    first come, first served.
+    """
+
+    def __init__(self, best_of: int):
+        self.best_of = best_of
+        self._members: dict[int, None] = {}
+        self._ready: set[int] = set()
+
+    def __len__(self) -> int:
+        return len(self._members)
+
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self._members
+
+    def __iter__(self):
+        return iter(self._members)
+
+    def join(self, user_id: int) -> int:
+        """Append a player, returns the new queue size"""
+        self._members[user_id] = None
+        return len(self._members)
+
+    def leave(self, user_id: int) -> bool:
+        """Remove a player, returns False if they were not queued"""
+        if user_id not in self._members:
+            return False
+        del self._members[user_id]
+        self._ready.discard(user_id)
+        return True
+
+    def peek_batch(self, size: int) -> list[int]:
+        """Next `size` players in join order, without removing them"""
+        return list(islice(self._members, size))
+
+    def pop_batch(self, size: int) -> list[int]:
+        """Remove and return the next `size` players"""
+        batch = self.peek_batch(size)
+        for user_id in batch:
+            del self._members[user_id]
+            self._ready.discard(user_id)
+        return batch
+
+    def mark_ready(self, user_id: int) -> int:
+        """Mark a queued player as ready, returns the ready count"""
+        self._ready.add(user_id)
+        return len(self._ready)
+
+    def is_ready(self, user_id: int) -> bool:
+        return user_id in self._ready
+
+    def ready_players(self, size: int) -> list[int]:
+        return [uid for uid in self.peek_batch(size) if uid in self._ready]
+
+    def is_batch_ready(self, size: int) -> bool:
+        """True when the next `size` players are all ready"""
+        batch = self.peek_batch(size)
+        return len(batch) == size and all(uid in self._ready for uid in batch)
+
+    def clear_ready(self):
+        self._ready.clear()
+
+
+def serialize_queues(queues: dict[int, MatchQueue]) -> list[dict]:
+    """Snapshot form of the queues, Discord IDs as strings"""
+    return [
+        {
+            "bestOf": queue.best_of,
+            "members": [str(uid) for uid in queue],
+            "ready": [str(uid) for uid in queue if queue.is_ready(uid)],
+        }
+        for queue in queues.values()
+    ]
+
+
+def replay_queues(modes, snapshot: dict | None, batches: list[dict]) -> tuple[dict[int, MatchQueue], int]:
+    """Rebuild queues from a snapshot plus the journal batches written after it.
+
+    Returns the queues and the last sequence number they reflect.
+    """
+    queues = {bo: MatchQueue(bo) for bo in modes}
+    member_of: dict[int, int] = {}
+    seq = 0
+
+    if snapshot:
+        seq = int(snapshot["seq"])
+        for entry in snapshot["queues"]:
+            best_of = int(entry["bestOf"])
+            queue = queues.get(best_of)
+            if queue is None:
+                continue
+            for discord_id in entry["members"]:
+                _ = queue.join(int(discord_id))
+                member_of[int(discord_id)] = best_of
+            for discord_id in entry["ready"]:
+                _ = queue.mark_ready(int(discord_id))
+
+    for batch in sorted(batches, key=lambda b: b["lastSeq"]):
+        for event in batch["events"]:
+            _apply_event(queues, member_of, event)
+        seq = max(seq, int(batch["lastSeq"]))
+
+    return queues, seq
+
+
+def _apply_event(queues: dict[int, MatchQueue], member_of: dict[int, int], event: dict):
+    kind = event["kind"]
+    user_id = int(event["discordId"]) if "discordId" in event else None
+    best_of = int(event["bestOf"]) if "bestOf" in event else None
+
+    match kind:
+        case "join":
+            if best_of not in queues:
+                return
+            old_best_of = member_of.get(user_id)
+            if old_best_of is not None:
+                _ = queues[old_best_of].leave(user_id)
+            _ = queues[best_of].join(user_id)
+            member_of[user_id] = best_of
+        case "leave":
+            old_best_of = member_of.pop(user_id, None)
+            if old_best_of is not None:
+                _ = queues[old_best_of].leave(user_id)
+        case "ready":
+            current = member_of.get(user_id)
+            if current is not None:
+                _ = queues[current].mark_ready(user_id)
+        case "clear_ready":
+            if best_of in queues:
+                queues[best_of].clear_ready()
@@ -0,0 +1,212 @@
+import asyncio
+import functools
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable
+from aiohttp import web
+import discord
+from discord import app_commands
+from bot.lib.constants import METRICS_HOST, METRICS_PORT, LOOP_LAG_INTERVAL
+from bot.lib.log import log, log_context
+
+# Upper bounds in seconds, from sub-millisecond cache hits to the 3s interaction deadline and beyond
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(pairs: list[tuple[str, str]]) -> str:
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}" if pairs else ""
+
+
+class Histogram:
+    """Cumulative histogram per label set, rendered in the Prometheus text format.
+
+    Observed from the event loop and from the Convex executor threads, so
+    updates are guarded by a lock.
+    """
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = (), buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        # label values -> (count per bucket, sum, count)
+        self._series: dict[tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((k, [list(v[0]), v[1], v[2]]) for k, v in self._series.items())
+        for label_values, (counts, total, count) in series:
+            pairs = list(zip(self.labels, label_values))
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                lines.append(f"{self.name}_bucket{_labels(pairs + [('le', repr(bound))])} {cumulative}")
+            lines.append(f"{self.name}_bucket{_labels(pairs + [('le', '+Inf')])} {count}")
+            lines.append(f"{self.name}_sum{_labels(pairs)} {total}")
+            lines.append(f"{self.name}_count{_labels(pairs)} {count}")
+        return lines
+
+
+class Counter:
+    """Monotonic count per label set"""
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values: dict[tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values: str) -> float:
+        return self._values.get(label_values, 0)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = sorted(self._values.items())
+        for label_values, value in values:
+            lines.append(f"{self.name}{_labels(list(zip(self.labels, label_values)))} {value}")
+        return lines
+
+
+class Gauge:
+    """Current value per label set, read from a callback on each scrape"""
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...], read: Callable[[], dict[tuple[str, ...], float]]):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._read = read
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        for label_values, value in sorted(self._read().items()):
+            lines.append(f"{self.name}{_labels(list(zip(self.labels, label_values)))} {value}")
+        return lines
+
+
+class Metrics:
+    """Process-wide latency histograms, counters and the HTTP endpoint that exposes them"""
+
+    command_latency = Histogram("bot_command_seconds", "App command handler latency", ("command",))
+    service_latency = Histogram("bot_service_seconds", "ServiceImpl call latency", ("service", "method"))
+    convex_rtt = Histogram("bot_convex_rtt_seconds", "Convex query and mutation round trip", ("function",))
+    discord_wait = Histogram("bot_discord_wait_seconds", "Time Discord writes spent queued in Outbound", ("priority",))
+    discord_request = Histogram("bot_discord_request_seconds", "Discord write duration once started", ("route",))
+    loop_lag = Histogram("bot_event_loop_lag_seconds", "Oversleep of a periodic timer on the event loop")
+    interaction_ack = Histogram("bot_interaction_ack_seconds", "Interaction creation to first acknowledgement", ("command",))
+    interactions = Counter("bot_interactions_total", "Interactions answered through InteractionReply", ("command",))
+    deferrals = Counter("bot_interaction_deferrals_total", "Interactions deferred because the ack budget ran low", ("command",))
+    identity_lookups = Counter("bot_user_identity_lookups_total", "Discord ID to Convex user ID lookups", ("result",))
+    collectors = [
+        command_latency, service_latency, convex_rtt, discord_wait, discord_request, loop_lag,
+        interaction_ack, interactions, deferrals, identity_lookups,
+    ]
+
+    _runner: web.AppRunner | None = None
+    _lag_task: asyncio.Task | None = None
+
+    @staticmethod
+    @contextmanager
+    def timer(histogram: Histogram, *label_values: str):
+        """Observe the wall time of the with block, also when it raises"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            histogram.observe(time.perf_counter() - start, *label_values)
+
+    @staticmethod
+    def render() -> str:
+        return "\n".join(line for c in Metrics.collectors for line in c.render()) + "\n"
+
+    @staticmethod
+    def instrument_commands(tree):
+        """Time the callback of every app command registered on the tree, and log in the invoking user's context"""
+        for command in tree.walk_commands():
+            # Groups have no callback, and a command is wrapped only once
+            if isinstance(command, app_commands.Command) and not getattr(command._callback, "timed", False):
+                # discord.py calls _callback directly; `callback` is a read-only view of it
+                command._callback = Metrics._timed_command(command._callback, command.qualified_name)
+
+    @staticmethod
+    def _timed_command(callback, name: str):
+        @functools.wraps(callback)
+        async def timed(*args, **kwargs):
+            # Cog commands get (cog, interaction, ...), free functions (interaction, ...)
+            user = next((a.user for a in args if isinstance(a, discord.Interaction)), None)
+            with log_context(command=name, user_id=str(user.id) if user else None), Metrics.timer(Metrics.command_latency, name):
+                return await callback(*args, **kwargs)
+
+        timed.timed = True
+        return timed
+
+    @staticmethod
+    async def start():
+        """Serve /metrics on METRICS_HOST:METRICS_PORT and sample event loop lag, disabled when the port is 0"""
+        if Metrics._lag_task is None or Metrics._lag_task.done():
+            Metrics._lag_task = asyncio.create_task(Metrics._monitor_loop_lag())
+        if METRICS_PORT <= 0 or Metrics._runner is not None:
+            return
+
+        async def handle(request: web.Request) -> web.Response:
+            return web.Response(text=Metrics.render(), content_type="text/plain", charset="utf-8",
+                                headers={"X-Content-Type-Options": "nosniff"})
+
+        app = web.Application()
+        _ = app.router.add_get("/metrics", handle)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, METRICS_HOST, METRICS_PORT).start()
+        Metrics._runner = runner
+        log(f"Metrics served on http://{METRICS_HOST}:{METRICS_PORT}/metrics")
+
+    @staticmethod
+    async def _monitor_loop_lag():
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(LOOP_LAG_INTERVAL)
+            Metrics.loop_lag.observe(max(0.0, time.perf_counter() - start - LOOP_LAG_INTERVAL))
+
+
+def timed_service(cls):
+    """Class decorator timing every public static method of a *ServiceImpl"""
+    # MapSelectionsServiceImpl -> map_selections, the attribute name on DbServiceImpl
+    service = re.sub(r"(?<!^)(?=[A-Z])", "_", cls.__name__.removesuffix("ServiceImpl")).lower()
+    for name, attr in list(vars(cls).items()):
+        if not name.startswith("_") and isinstance(attr, staticmethod):
+            setattr(cls, name, staticmethod(_timed_method(attr.__func__, service, name)))
+    return cls
+
+
+def _timed_method(func, service: str, name: str):
+    @functools.wraps(func)
+    def timed(*args, **kwargs):
+        with Metrics.timer(Metrics.service_latency, service, name):
+            return func(*args, **kwargs)
+
+    return timed
@@ -0,0 +1,94 @@
+from bot.lib.constants import DEFAULT_RATING, MMR_K_FACTOR
+from bot.lib.db.db import async_db, db
+from bot.lib.leaderboard import Leaderboards
+from bot.lib.log import log
+from bot.lib.match_context import MatchContext
+
+
+class MmrEngine:
+    """Team Elo: both teams are rated by their average and every player of a
+    team moves by the same delta. Updates only touch the ten players of the
+    match, and their running rating is stored on the user."""
+
+    @staticmethod
+    def expected_score(rating: float, opponent_rating: float) -> float:
+        return 1 / (1 + 10 ** ((opponent_rating - rating) / 400))
+
+    @staticmethod
+    def compute_match(
+        team1: dict[str, float],
+        team2: dict[str, float],
+        team1_score: int,
+        team2_score: int,
+    ) -> list[dict]:
+        """Rating updates for one match, teams as player -> current rating"""
+        team1_avg = sum(team1.values()) / len(team1)
+        team2_avg = sum(team2.values()) / len(team2)
+        if team1_score == team2_score:
+            actual = 0.5
+        else:
+            actual = 1.0 if team1_score > team2_score else 0.0
+        delta = round(MMR_K_FACTOR * (actual - MmrEngine.expected_score(team1_avg, team2_avg)), 2)
+
+        updates = []
+        for team, team_delta in ((team1, delta), (team2, -delta)):
+            for user_id, rating in team.items():
+                updates.append({"userId": user_id, "delta": team_delta, "rating": round(rating + team_delta, 2)})
+        return updates
+
+    @staticmethod
+    async def apply_confirmed_score(context: MatchContext, team1_score: int, team2_score: int) -> list[dict]:
+        """Update the ten players of a match once its score is confirmed"""
+        discord_to_user = {p["discordId"]: p["userId"] for n in (1, 2) for p in context.rosters[n]}
+        ratings = await Leaderboards.ratings([int(d) for d in discord_to_user])
+
+        teams = [
+            {p["userId"]: ratings.get(int(p["discordId"]), DEFAULT_RATING) for p in context.rosters[n]}
+            for n in (1, 2)
+        ]
+        updates = MmrEngine.compute_match(teams[0], teams[1], team1_score, team2_score)
+        # Only the deltas are sent, the mutation adds them to the stored ratings
+        applied = await async_db.mmr.apply_match(
+            context.match_id, [{"userId": u["userId"], "delta": u["delta"]} for u in updates]
+        )
+        if applied is None:
+            return []
+        Leaderboards.apply_updates(applied, {u: d for d, u in discord_to_user.items()})
+        return applied
+
+    @staticmethod
+    def replay(
+        matches: list[dict], ratings: dict[str, float] | None = None
+    ) -> tuple[dict[str, float], list[tuple[str, list[dict]]]]:
+        """Recompute ratings in match order, continuing from ratings if given. Deterministic for the same input."""
+        ratings = {} if ratings is None else ratings
+        history = []
+        for match in matches:
+            if not match["team1"] or not match["team2"]:
+                continue
+            teams = [{uid: ratings.get(uid, DEFAULT_RATING) for uid in match[f"team{n}"]} for n in (1, 2)]
+            updates = MmrEngine.compute_match(teams[0], teams[1], match["team1Score"], match["team2Score"])
+            for update in updates:
+                ratings[update["userId"]] = update["rating"]
+            history.append((match["matchId"], updates))
+        return ratings, history
+
+    @staticmethod
+    def backfill():
+        """Replay every finished match page by page and rewrite the mmr table and user ratings"""
+        ratings: dict[str, float] = {}
+        replayed = 0
+        cursor = None
+        while True:
+            result = db.mmr.finished_matches_page(cursor)
+            ratings, history = MmrEngine.replay(result["page"], ratings)
+            for match_id, updates in history:
+                _ = db.mmr.apply_match(match_id, updates, replace=True)
+            replayed += len(history)
+            if result["isDone"]:
+                break
+            cursor = result["continueCursor"]
+        log(f"MMR backfill done: {replayed} matches, {len(ratings)} players")
+
+if __name__ == "__main__":
+    MmrEngine.backfill()
@@ -1,4 +1,5 @@
 from bot.lib.log import log
+from bot.lib.match_queue import MatchQueue
 from bot.lib.test_constants import TEST_USER_IDS
 
 
@@ -21,26 +22,35 @@ class MockReady:
     
     @staticmethod
     def auto_ready_mock_users(bestof: int):
-        """Auto-mark all test users as ready"""
+        """Auto-mark all queued test users as ready"""
         from bot.lib.player_queue import PlayerContext
         
-        match bestof:
-            case 1:
-                ready_set = PlayerContext._best_of_1_ready
-            case 3:
-                ready_set = PlayerContext._best_of_3_ready
-            case 5:
-                ready_set = PlayerContext._best_of_5_ready
-            case _:
-                return
+        queue = PlayerContext._queues.get(bestof)
+        if queue is None:
+            return
         
         # Add all test users to ready set
         for user_id in TEST_USER_IDS:
-            ready_set.add(user_id)
+            if user_id in queue:
+                _ = queue.mark_ready(user_id)
         
         log(f"[MOCK] Auto-marked {len(TEST_USER_IDS)} test users as ready for BO{bestof}")
 
 
+class MockQueue:
+    """Queues pre-filled with ready test users so one real player can pop a match"""
+    
+    SEEDED_MODES = (1, 3)
+    
+    @staticmethod
+    def seeded(bestof: int) -> MatchQueue:
+        queue = MatchQueue(bestof)
+        for user_id in TEST_USER_IDS:
+            _ = queue.join(user_id)
+            _ = queue.mark_ready(user_id)
+        return queue
+
+
 class MockTeamBalancer:
     """Mock team balancer for testing"""
     
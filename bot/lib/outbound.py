@@ -0,0 +1,247 @@
+import asyncio
+import heapq
+import itertools
+import time
+from enum import IntEnum
+from typing import Any, Awaitable, Callable
+from bot.lib.constants import OUTBOUND_CONCURRENCY, OUTBOUND_ROUTE_LIMITS, OUTBOUND_GLOBAL_LIMIT
+from bot.lib.log import log
+from bot.lib.metrics import Gauge, Metrics
+
+# Discord rejects messages longer than this, coalesced texts must stay below it
+MESSAGE_LIMIT = 2000
+
+
+class Priority(IntEnum):
+    # An interaction is waiting on the result and has to answer within 3s
+    INTERACTION = 0
+    READY_CHECK = 1
+    MATCH_SETUP = 2
+    NOTIFY = 3
+    SUMMARY = 4
+    CLEANUP = 5
+    BACKGROUND = 6
+
+
+class TokenBucket:
+    """`capacity` requests per `period` seconds, refilled continuously"""
+
+    def __init__(self, capacity: int, period: float):
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until a token is available, 0 if one is available now"""
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+
+class _Job:
+    def __init__(self, route: str, priority: Priority, factory: Callable[[], Awaitable[Any]], coalesce_key: str | None = None):
+        self.route = route
+        self.priority = priority
+        self.factory = factory
+        self.coalesce_key = coalesce_key
+        self.texts: list[str] = []
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.enqueued_at = time.monotonic()
+
+
+class Outbound:
+    """Every Discord REST write of the bot goes through here.
+
+    Work is queued by priority and only started when both the global budget
+    and the budget of its route (dm:{user}, message:{channel}, ...) have a
+    token, so bursts from several queue pops are spread out instead of
+    hitting 429s. Text messages queued for the same channel are coalesced.
+    Interaction responses are not routed here, they must answer within 3s.
+
+    Each route keeps its own small job heap. Routes whose head job may run
+    sit in a ready heap keyed by that job's (priority, seq), routes out of
+    budget in a heap keyed by the time their bucket refills, so picking the
+    next job is O(log n) however many jobs are throttled.
+    """
+
+    _routes: dict[str, list[tuple[int, int, _Job]]] = {}
+    # (priority, seq, route) of each route's head job; entries whose head has moved on are skipped
+    _ready: list[tuple[int, int, str]] = []
+    # (monotonic time the route bucket has a token, seq, route)
+    _waiting: list[tuple[float, int, str]] = []
+    _queued: int = 0
+    _counter = itertools.count()
+    _buckets: dict[str, TokenBucket] = {}
+    _global: TokenBucket = TokenBucket(*OUTBOUND_GLOBAL_LIMIT)
+    _pending_texts: dict[str, _Job] = {}
+    _in_flight: int = 0
+    _wakeup: asyncio.Event | None = None
+    _task: asyncio.Task | None = None
+    # Metrics
+    _waits: dict[Priority, list[float]] = {p: [0, 0.0, 0.0] for p in Priority}  # count, total, max
+    _coalesced: int = 0
+    _throttled: int = 0
+
+    @staticmethod
+    async def call(route: str, priority: Priority, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Queue factory() on route, e.g. f"dm:{user.id}" or f"message:{channel.id}", and return its result"""
+        job = _Job(route, priority, factory)
+        Outbound._push(job)
+        # A cancelled caller must not cancel the shared future under the dispatcher
+        return await asyncio.shield(job.future)
+
+    @staticmethod
+    async def send_message(channel: Any, text: str, priority: Priority) -> Any:
+        """channel.send(text), merged with texts still queued for the same channel"""
+        key = f"message:{channel.id}"
+        job = Outbound._pending_texts.get(key)
+        if job is not None and job.priority == priority and len("\n\n".join(job.texts + [text])) <= MESSAGE_LIMIT:
+            job.texts.append(text)
+            Outbound._coalesced += 1
+            return await asyncio.shield(job.future)
+
+        job = _Job(key, priority, lambda: channel.send("\n\n".join(job.texts)), coalesce_key=key)
+        job.texts.append(text)
+        Outbound._pending_texts[key] = job
+        Outbound._push(job)
+        return await asyncio.shield(job.future)
+
+    @staticmethod
+    def stats() -> dict:
+        """Queue depth per priority and time spent queued, in seconds"""
+        depth = {p.name: 0 for p in Priority}
+        for jobs in Outbound._routes.values():
+            for _, _, job in jobs:
+                depth[job.priority.name] += 1
+        return {
+            "depth": depth,
+            "in_flight": Outbound._in_flight,
+            "waits": {
+                p.name: {"count": int(c), "total": total, "max": peak}
+                for p, (c, total, peak) in Outbound._waits.items()
+            },
+            "coalesced": Outbound._coalesced,
+            "throttled": Outbound._throttled,
+        }
+
+    @staticmethod
+    def _push(job: _Job):
+        seq = next(Outbound._counter)
+        jobs = Outbound._routes.setdefault(job.route, [])
+        heapq.heappush(jobs, (job.priority, seq, job))
+        Outbound._queued += 1
+        if jobs[0][2] is job:
+            # New head of its route; if the route is throttled this entry just moves it back there
+            heapq.heappush(Outbound._ready, (job.priority, seq, job.route))
+        if Outbound._task is None or Outbound._task.done():
+            Outbound._wakeup = asyncio.Event()
+            Outbound._task = asyncio.create_task(Outbound._run())
+        Outbound._wakeup.set()
+
+    @staticmethod
+    def _bucket(route: str) -> TokenBucket:
+        family = route.split(":", 1)[0]
+        bucket = Outbound._buckets.get(route)
+        if bucket is None:
+            bucket = Outbound._buckets[route] = TokenBucket(*OUTBOUND_ROUTE_LIMITS.get(family, OUTBOUND_GLOBAL_LIMIT))
+        return bucket
+
+    @staticmethod
+    def _next_ready(now: float) -> tuple[_Job | None, float]:
+        """Highest-priority job with budget left, else the shortest wait for one"""
+        global_wait = Outbound._global.wait_time(now)
+        if global_wait > 0:
+            return None, global_wait
+
+        waiting, ready = Outbound._waiting, Outbound._ready
+        while waiting and waiting[0][0] <= now:
+            _, _, route = heapq.heappop(waiting)
+            jobs = Outbound._routes.get(route)
+            if jobs:
+                heapq.heappush(ready, (jobs[0][0], jobs[0][1], route))
+
+        while ready:
+            priority, seq, route = heapq.heappop(ready)
+            jobs = Outbound._routes.get(route)
+            if not jobs or jobs[0][1] != seq:
+                continue
+            wait = Outbound._bucket(route).wait_time(now)
+            if wait > 0:
+                heapq.heappush(waiting, (now + wait, seq, route))
+                continue
+            _, _, job = heapq.heappop(jobs)
+            if jobs:
+                heapq.heappush(ready, (jobs[0][0], jobs[0][1], route))
+            else:
+                del Outbound._routes[route]
+            Outbound._queued -= 1
+            return job, 0.0
+
+        return None, (waiting[0][0] - now) if waiting else float("inf")
+
+    @staticmethod
+    async def _run():
+        while True:
+            Outbound._wakeup.clear()
+            timeout = None
+            if Outbound._queued and Outbound._in_flight < OUTBOUND_CONCURRENCY:
+                job, wait = Outbound._next_ready(time.monotonic())
+                if job is not None:
+                    Outbound._start(job)
+                    continue
+                Outbound._throttled += 1
+                timeout = wait if wait != float("inf") else None
+            try:
+                _ = await asyncio.wait_for(Outbound._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    @staticmethod
+    def _start(job: _Job):
+        Outbound._global.take()
+        Outbound._bucket(job.route).take()
+        if job.coalesce_key and Outbound._pending_texts.get(job.coalesce_key) is job:
+            del Outbound._pending_texts[job.coalesce_key]
+
+        waited = time.monotonic() - job.enqueued_at
+        stats = Outbound._waits[job.priority]
+        stats[0] += 1
+        stats[1] += waited
+        stats[2] = max(stats[2], waited)
+        Metrics.discord_wait.observe(waited, job.priority.name)
+        if waited > 5:
+            log(f"Outbound {job.route} ({job.priority.name}) waited {waited:.1f}s, {Outbound._queued} queued")
+
+        Outbound._in_flight += 1
+        _ = asyncio.create_task(Outbound._execute(job))
+
+    @staticmethod
+    async def _execute(job: _Job):
+        try:
+            with Metrics.timer(Metrics.discord_request, job.route.split(":", 1)[0]):
+                result = await job.factory()
+            if not job.future.done():
+                job.future.set_result(result)
+        except Exception as e:
+            if not job.future.done():
+                job.future.set_exception(e)
+        finally:
+            Outbound._in_flight -= 1
+            Outbound._wakeup.set()
+
+
+Metrics.collectors.append(Gauge(
+    "bot_outbound_queued", "Discord writes waiting in Outbound", ("priority",),
+    lambda: {(name,): n for name, n in Outbound.stats()["depth"].items()},
+))
+Metrics.collectors.append(Gauge(
+    "bot_outbound_in_flight", "Discord writes started and not yet finished", (),
+    lambda: {(): Outbound._in_flight},
+))
@@ -0,0 +1,84 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable
+from bot.lib.constants import PIPELINE_RETRIES, PIPELINE_RETRY_DELAY
+from bot.lib.log import log
+
+
+class StepSkipped(Exception):
+    """A dependency of the step failed, so the step never ran"""
+
+
+class PipelineResult:
+    """Per-step results, failures and wall times of a pipeline run"""
+
+    def __init__(self, results: dict, failed: dict, timings: dict, elapsed: float):
+        self.results = results
+        self.failed = failed
+        self.timings = timings
+        self.elapsed = elapsed
+
+    @property
+    def ok(self) -> bool:
+        return not self.failed
+
+
+class Pipeline:
+    """Dependency-aware set of async steps.
+
+    Each step starts as soon as all of its dependencies finished, so
+    independent steps run concurrently. A step receives the results of its
+    dependencies as keyword arguments and is retried on failure; if it still
+    fails, every step depending on it is skipped and the rest carry on.
+    """
+
+    def __init__(self, label: str):
+        self.label = label
+        self._steps: dict[str, tuple[Callable[..., Awaitable[Any]], tuple[str, ...], int]] = {}
+
+    def step(self, name: str, func: Callable[..., Awaitable[Any]], deps: tuple[str, ...] = (), retries: int = PIPELINE_RETRIES):
+        for dep in deps:
+            if dep not in self._steps:
+                raise ValueError(f"Step {name} depends on unknown step {dep}")
+        self._steps[name] = (func, deps, retries)
+        return self
+
+    async def run(self) -> PipelineResult:
+        results: dict[str, Any] = {}
+        failed: dict[str, Exception] = {}
+        timings: dict[str, float] = {}
+        tasks: dict[str, asyncio.Task] = {}
+
+        async def run_step(name: str):
+            func, deps, retries = self._steps[name]
+            for dep in deps:
+                await asyncio.gather(tasks[dep], return_exceptions=True)
+            if any(dep in failed for dep in deps):
+                failed[name] = StepSkipped(", ".join(d for d in deps if d in failed))
+                return
+
+            start = time.perf_counter()
+            for attempt in range(retries + 1):
+                try:
+                    results[name] = await func(**{dep: results[dep] for dep in deps})
+                    break
+                except Exception as e:
+                    if attempt == retries:
+                        failed[name] = e
+                    else:
+                        log(f"Pipeline '{self.label}' step {name} failed (attempt {attempt + 1}), retrying: {e}")
+                        await asyncio.sleep(PIPELINE_RETRY_DELAY * 2 ** attempt)
+            timings[name] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        # Steps are registered after their dependencies, so every dependency task exists first
+        for name in self._steps:
+            tasks[name] = asyncio.create_task(run_step(name))
+        _ = await asyncio.gather(*tasks.values())
+        elapsed = time.perf_counter() - start
+
+        stages = ", ".join(f"{name} {seconds * 1000:.0f}ms" for name, seconds in timings.items())
+        log(f"Pipeline '{self.label}': {len(results)} ok, {len(failed)} failed in {elapsed * 1000:.0f}ms ({stages})")
+        for name, e in failed.items():
+            log(f"Pipeline '{self.label}' step {name} failed: {e!r}")
+        return PipelineResult(results, failed, timings, elapsed)
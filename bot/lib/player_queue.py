@@ -1,35 +1,47 @@
-from bot.lib.constants import PLAYER_REQUIRED, READY_TIMEOUT
+from bot.lib.constants import PLAYER_REQUIRED, READY_TIMEOUT, QUEUE_MODES, VOICE_CHANNEL_LIFETIME
 import asyncio
 import random
+import time
 import os
 import discord
 from discord import Member, User
-from bot.lib.db.db import db
-from bot.lib.db.maps import MapsServiceImpl
-from bot.lib.db.map_selections import MapSelectionsServiceImpl
+from bot.lib.db.db import async_db
 from bot.lib.exceptions import BotException, handle_exception2
-from bot.lib.log import log
+from bot.lib.fanout import fan_out
+from bot.lib.leaderboard import Leaderboards
+from bot.lib.log import log, log_context, DEBUG, ERROR
+from bot.lib.match_context import MatchContext, MatchContextCache
+from bot.lib.match_queue import MatchQueue
+from bot.lib.outbound import Outbound, Priority
+from bot.lib.pipeline import Pipeline
+from bot.lib.queue_journal import QueueJournal
+from bot.lib.resource_pool import ResourcePool
+from bot.lib.scheduler import Scheduler
 from bot.lib.team_balancer import TeamBalancer
-from bot.lib.mock import MockUser, MockTeamBalancer, MockReady
+from bot.lib.user_identity import UserIdentities
+from bot.lib.mock import MockUser, MockTeamBalancer, MockReady, MockQueue
 from bot.lib.test_constants import TEST_USER_IDS
 
-PLAYER_REQUIRED = 10
-READY_TIMEOUT = 30
-
 class PlayerContext:
     bot: discord.Client | None = None
     users: dict[int, User | Member | None] = {uid: MockUser(uid) for uid in TEST_USER_IDS}
-    _best_of_1_ready: set[int] = set(TEST_USER_IDS)
-    _best_of_1: list[int] = TEST_USER_IDS.copy()
-    _best_of_3_ready: set[int] = set(TEST_USER_IDS)
-    _best_of_3: list[int] = TEST_USER_IDS.copy()
-    _best_of_5_ready: set[int] = set()
-    _best_of_5: list[int] = []
+    _queues: dict[int, MatchQueue] = {
+        bo: MockQueue.seeded(bo) if bo in MockQueue.SEEDED_MODES else MatchQueue(bo)
+        for bo in QUEUE_MODES
+    }
     _user_id_to_best_of: dict[int, int] = {}
-    _active_ready_checks: dict[int, asyncio.Task] = {}
+    _queue_popped_at: dict[int, float] = {}
+
+    @staticmethod
+    def _get_queue(bestof: int) -> MatchQueue:
+        queue = PlayerContext._queues.get(bestof)
+        if queue is None:
+            raise BotException("INVALID_BESTOF")
+        return queue
 
     @staticmethod
     def add_player(user: User | Member, bestof: int):
+        queue = PlayerContext._get_queue(bestof)
         if user.id in PlayerContext.users:
             old_bestof = PlayerContext._user_id_to_best_of.get(user.id)
             if old_bestof == bestof:
@@ -38,18 +50,8 @@ class PlayerContext:
 
         PlayerContext.users[user.id] = user
         PlayerContext._user_id_to_best_of[user.id] = bestof
-        match bestof:
-            case 1:
-                PlayerContext._best_of_1.append(user.id)
-                player_count = len(PlayerContext._best_of_1)
-            case 3:
-                PlayerContext._best_of_3.append(user.id)
-                player_count = len(PlayerContext._best_of_3)
-            case 5:
-                PlayerContext._best_of_5.append(user.id)
-                player_count = len(PlayerContext._best_of_5)
-            case _:
-                raise BotException("INVALID_BESTOF")
+        player_count = queue.join(user.id)
+        QueueJournal.record("join", user.id, bestof)
 
         if player_count == PLAYER_REQUIRED:
             _ = asyncio.create_task(PlayerContext.trigger_queue(bestof))
@@ -58,167 +60,150 @@ class PlayerContext:
 
     @staticmethod
     def _peek_current_batch_ids(bestOf: int):
-        match bestOf:
-            case 1:
-                return PlayerContext._best_of_1[-PLAYER_REQUIRED:]
-            case 3:
-                return PlayerContext._best_of_3[-PLAYER_REQUIRED:]
-            case 5:
-                return PlayerContext._best_of_5[-PLAYER_REQUIRED:]
-            case _:
-                raise BotException("INVALID_BESTOF")
+        return PlayerContext._get_queue(bestOf).peek_batch(PLAYER_REQUIRED)
 
     @staticmethod
     def removePlayer(id: int):
         bestOf = PlayerContext._user_id_to_best_of.get(id)
-        match bestOf:
-            case 1:
-                PlayerContext._removePlayerBo1(id)
-            case 3:
-                PlayerContext._removePlayerBo3(id)
-            case 5:
-                PlayerContext._removePlayerBo5(id)
-            case _:
-                raise BotException("INVALID_BESTOF")
+        queue = PlayerContext._get_queue(bestOf)
+        _ = queue.leave(id)
+        _ = PlayerContext._user_id_to_best_of.pop(id, None)
+        _ = PlayerContext.users.pop(id, None)
+        QueueJournal.record("leave", id)
 
     @staticmethod
-    async def trigger_queue(bestOf: int):
-        match bestOf:
-            case 1:
-                await PlayerContext._triggerQueueBo1()
-            case 3:
-                await PlayerContext._triggerQueueBo3()
-            case 5:
-                await PlayerContext._triggerQueueBo5()
-            case _:
-                await PlayerContext._triggerQueueBo1()
+    async def restore():
+        """Rebuild queues from the persisted journal and start journaling"""
+        restored = True
+        try:
+            queues = await QueueJournal.restore()
+        except Exception as e:
+            log(f"Could not restore queue state, starting empty: {e}", level=ERROR)
+            queues = None
+            restored = False
 
-    @staticmethod
-    async def _triggerQueueBo1():
-        players = PlayerContext._best_of_1[-PLAYER_REQUIRED:]
-        if len(players) < PLAYER_REQUIRED:
-            raise BotException("NOT_ENOUGH_PLAYERS")
+        if queues is not None:
+            PlayerContext._queues = queues
+            PlayerContext._user_id_to_best_of = {uid: bo for bo, q in queues.items() for uid in q}
+            # Discord users are resolved lazily when they are next contacted
+            for uid in PlayerContext._user_id_to_best_of:
+                PlayerContext.users.setdefault(uid, None)
 
-        log(f"Queue pop! Sending ready checks to {len(players)} players (Best of 1)")
-        await PlayerContext.send_ready_check(players)
+        # Without the persisted seq, journaling from 0 would be shadowed by the old snapshot
+        QueueJournal.start(lambda: PlayerContext._queues, fenced=not restored)
 
-        task = asyncio.create_task(PlayerContext._ready_timeout(1, players))
-        PlayerContext._active_ready_checks[1] = task
+        for bestof, queue in PlayerContext._queues.items():
+            if len(queue) >= PLAYER_REQUIRED and not Scheduler.pending(f"ready:{bestof}"):
+                _ = asyncio.create_task(PlayerContext.trigger_queue(bestof))
 
     @staticmethod
-    async def _triggerQueueBo3():
-        players = PlayerContext._best_of_3[-PLAYER_REQUIRED:]
-        if len(players) < PLAYER_REQUIRED:
-            raise BotException("NOT_ENOUGH_PLAYERS")
-
-        log(f"Queue pop! Sending ready checks to {len(players)} players (Best of 3)")
-        await PlayerContext.send_ready_check(players)
-
-        task = asyncio.create_task(PlayerContext._ready_timeout(3, players))
-        PlayerContext._active_ready_checks[3] = task
+    async def _resolve_user(id: int) -> User | Member | None:
+        user = PlayerContext.users.get(id)
+        if user is None and PlayerContext.bot is not None:
+            user = PlayerContext.bot.get_user(id)
+            if user is None:
+                try:
+                    user = await PlayerContext.bot.fetch_user(id)
+                except Exception:
+                    user = None
+            if user is not None and id in PlayerContext.users:
+                PlayerContext.users[id] = user
+        return user
 
     @staticmethod
-    async def _triggerQueueBo5():
-        players = PlayerContext._best_of_5[-PLAYER_REQUIRED:]
+    async def trigger_queue(bestOf: int):
+        players = PlayerContext._peek_current_batch_ids(bestOf)
         if len(players) < PLAYER_REQUIRED:
             raise BotException("NOT_ENOUGH_PLAYERS")
 
-        log(f"Queue pop! Sending ready checks to {len(players)} players (Best of 5)")
+        log(f"Queue pop! Sending ready checks to {len(players)} players (Best of {bestOf})")
+        PlayerContext._queue_popped_at[bestOf] = time.perf_counter()
+        Scheduler.schedule(f"ready:{bestOf}", "ready_timeout", READY_TIMEOUT, {"bestOf": bestOf, "playerIds": players})
         await PlayerContext.send_ready_check(players)
 
-        task = asyncio.create_task(PlayerContext._ready_timeout(5, players))
-        PlayerContext._active_ready_checks[5] = task
-
     @staticmethod
-    async def _ready_timeout(bestof: int, player_ids: list[int]):
-        await asyncio.sleep(READY_TIMEOUT)
+    async def _ready_timeout(payload: dict):
+        """Only reached when the batch did not fully ready up, otherwise it is cancelled"""
+        bestof = payload["bestOf"]
 
         # Auto-mark test users as ready for testing
         MockReady.auto_ready_mock_users(bestof)
 
-        ready_set = PlayerContext._get_ready_set(bestof)
-        not_ready = [pid for pid in player_ids if pid not in ready_set]
+        await PlayerContext._resolve_ready_check(bestof, payload["playerIds"])
+
+    @staticmethod
+    def _on_player_ready(bestof: int):
+        """Resolve the pending ready check as soon as the whole batch is ready"""
+        queue = PlayerContext._get_queue(bestof)
+        if not queue.is_batch_ready(PLAYER_REQUIRED):
+            return
+
+        if not Scheduler.cancel(f"ready:{bestof}"):
+            return
+        player_ids = queue.peek_batch(PLAYER_REQUIRED)
+        _ = asyncio.create_task(PlayerContext._resolve_ready_check(bestof, player_ids))
+
+    @staticmethod
+    async def _resolve_ready_check(bestof: int, player_ids: list[int]):
+        queue = PlayerContext._get_queue(bestof)
+        not_ready = [pid for pid in player_ids if not queue.is_ready(pid)]
 
         if not not_ready:
             log(f"All {len(player_ids)} players ready! Creating match (Best of {bestof})")
-            ready_set.clear()
-            match bestof:
-                case 1:
-                    PlayerContext._best_of_1 = PlayerContext._best_of_1[:-PLAYER_REQUIRED]
-                case 3:
-                    PlayerContext._best_of_3 = PlayerContext._best_of_3[:-PLAYER_REQUIRED]
-                case 5:
-                    PlayerContext._best_of_5 = PlayerContext._best_of_5[:-PLAYER_REQUIRED]
+            _ = queue.pop_batch(PLAYER_REQUIRED)
+            for pid in player_ids:
+                QueueJournal.record("leave", pid)
             await PlayerContext.create_match(player_ids, bestof)
+            # Matched players are no longer queued and may join again
+            for pid in player_ids:
+                if pid not in queue and PlayerContext._user_id_to_best_of.get(pid) == bestof:
+                    _ = PlayerContext._user_id_to_best_of.pop(pid, None)
+                    _ = PlayerContext.users.pop(pid, None)
+            popped_at = PlayerContext._queue_popped_at.pop(bestof, None)
+            if popped_at is not None:
+                log(f"Queue pop to match latency: {time.perf_counter() - popped_at:.2f}s (Best of {bestof})")
+
+            # Players who joined while this batch was checked never hit the join trigger
+            if len(queue) >= PLAYER_REQUIRED:
+                await PlayerContext.trigger_queue(bestof)
         else:
             log(f"Ready timeout! {len(not_ready)} players not ready (Best of {bestof})")
+            not_ready_users = [u for u in (PlayerContext.users.get(pid) for pid in not_ready) if u]
             for pid in not_ready:
-                user = PlayerContext.users.get(pid)
-                if user:
-                    try:
-                        await user.send("You were not ready in time and have been removed from the queue.")
-                    except:
-                        pass
                 PlayerContext.removePlayer(pid)
+            _ = await fan_out(
+                "not ready",
+                not_ready_users,
+                lambda user: Outbound.call(
+                    f"dm:{user.id}", Priority.NOTIFY,
+                    lambda: user.send("You were not ready in time and have been removed from the queue."),
+                )
+            )
 
-            ready_set.clear()
+            queue.clear_ready()
+            QueueJournal.record("clear_ready", best_of=bestof)
 
             remaining_queue = PlayerContext._peek_current_batch_ids(bestof)
             if len(remaining_queue) >= PLAYER_REQUIRED:
                 log(f"Retriggering queue for Best of {bestof} with {len(remaining_queue)} remaining players")
                 await PlayerContext.trigger_queue(bestof)
 
-    @staticmethod
-    def _get_ready_set(bestof: int):
-        match bestof:
-            case 1:
-                return PlayerContext._best_of_1_ready
-            case 3:
-                return PlayerContext._best_of_3_ready
-            case 5:
-                return PlayerContext._best_of_5_ready
-            case _:
-                return set()
-
-    @staticmethod
-    def _removePlayerBo1(id: int):
-        if id in PlayerContext._best_of_1:
-            PlayerContext._best_of_1.remove(id)
-        if id in PlayerContext._user_id_to_best_of:
-            del PlayerContext._user_id_to_best_of[id]
-        if id in PlayerContext.users:
-            del PlayerContext.users[id]
-
-    @staticmethod
-    def _removePlayerBo3(id: int):
-        if id in PlayerContext._best_of_3:
-            PlayerContext._best_of_3.remove(id)
-        if id in PlayerContext._user_id_to_best_of:
-            del PlayerContext._user_id_to_best_of[id]
-        if id in PlayerContext.users:
-            del PlayerContext.users[id]
-
-    @staticmethod
-    def _removePlayerBo5(id: int):
-        if id in PlayerContext._best_of_5:
-            PlayerContext._best_of_5.remove(id)
-        if id in PlayerContext._user_id_to_best_of:
-            del PlayerContext._user_id_to_best_of[id]
-        if id in PlayerContext.users:
-            del PlayerContext.users[id]
-
     @staticmethod
     async def send_ready_check(playerIds: list[int]):
-        for id in playerIds:
-            log(f"Sending ready check to player {id}")
-            user = PlayerContext.users[id]
-            if user is not None:
-                try:
-                    _ = await user.send("Ready check! Type `/queue ready` within 30 seconds to confirm.")
-                except Exception as e:
-                    raise BotException("FAILED_TO_SEND_READY_CHECK") from e
-            else:
+        """DM every player concurrently; players that could not be reached simply never ready up"""
+        async def send(id: int):
+            user = await PlayerContext._resolve_user(id)
+            if user is None:
                 raise BotException("USER_NOT_FOUND")
+            try:
+                _ = await Outbound.call(
+                    f"dm:{user.id}", Priority.READY_CHECK,
+                    lambda: user.send(f"Ready check! Type `/queue ready` within {READY_TIMEOUT} seconds to confirm."),
+                )
+            except Exception as e:
+                raise BotException("FAILED_TO_SEND_READY_CHECK") from e
+
+        return await fan_out("ready check", playerIds, send)
 
     @staticmethod
     async def set_player_as_ready(id: int):
@@ -226,51 +211,48 @@ class PlayerContext:
         if best_of is None:
             raise BotException("PLAYER_NOT_IN_QUEUE")
 
-        match best_of:
-            case 1:
-                return await PlayerContext._set_player_as_ready_bo1(id)
-            case 3:
-                return await PlayerContext._set_player_as_ready_bo3(id)
-            case 5:
-                return await PlayerContext._set_player_as_ready_bo5(id)
-            case _:
-                raise BotException("PLAYER_NOT_ELIGIBLE")
-
-    @staticmethod
-    async def _set_player_as_ready_bo1(id: int):
-        bestOf = 1
-        playerIds = PlayerContext._peek_current_batch_ids(bestOf)
-        if id not in playerIds:
+        queue = PlayerContext._queues.get(best_of)
+        if queue is None or id not in queue.peek_batch(PLAYER_REQUIRED):
             raise BotException("PLAYER_NOT_ELIGIBLE")
-        if id in PlayerContext._best_of_1_ready:
+        if queue.is_ready(id):
             raise BotException("PLAYER_ALREADY_READY")
 
-        PlayerContext._best_of_1_ready.add(id)
-        return len(PlayerContext._best_of_1_ready)
+        ready_count = queue.mark_ready(id)
+        QueueJournal.record("ready", id)
+        PlayerContext._on_player_ready(best_of)
+        return ready_count
 
     @staticmethod
-    async def _set_player_as_ready_bo3(id: int):
-        bestOf = 3
-        playerIds = PlayerContext._peek_current_batch_ids(bestOf)
-        if id not in playerIds:
-            raise BotException("PLAYER_NOT_ELIGIBLE")
-        if id in PlayerContext._best_of_3_ready:
-            raise BotException("PLAYER_ALREADY_READY")
+    async def _release_voice_channels(payloads: list[dict]) -> list[dict]:
+        """Hand the voice channels of every match released this tick back to the pool.
+
+        Returns the payloads that failed, the scheduler retries those.
+        """
+        bot_client = PlayerContext.bot
+        if bot_client is None:
+            raise BotException("BAD_PROJECT_CONFIGURATION")
+
+        async def resolve(channel_id: int):
+            channel = bot_client.get_channel(channel_id)
+            if channel is None:
+                try:
+                    channel = await bot_client.fetch_channel(channel_id)
+                except discord.NotFound:
+                    return None
+            return channel
 
-        PlayerContext._best_of_3_ready.add(id)
-        return len(PlayerContext._best_of_3_ready)
+        # Keyed on the full match ID, the short one shown in threads can collide
+        by_match = {p["matchId"]: p for p in payloads}
 
-    @staticmethod
-    async def _set_player_as_ready_bo5(id: int):
-        bestOf = 5
-        playerIds = PlayerContext._peek_current_batch_ids(bestOf)
-        if id not in playerIds:
-            raise BotException("PLAYER_NOT_ELIGIBLE")
-        if id in PlayerContext._best_of_5_ready:
-            raise BotException("PLAYER_ALREADY_READY")
+        async def release(match_id: str):
+            channels = await asyncio.gather(*(resolve(int(cid)) for cid in by_match[match_id]["channelIds"]))
+            await ResourcePool.release_voice([c for c in channels if c is not None])
 
-        PlayerContext._best_of_5_ready.add(id)
-        return len(PlayerContext._best_of_5_ready)
+        # Fanned out by match ID, fan_out keys its failures by recipient
+        result = await fan_out("voice release", by_match, release)
+        if result.sent:
+            log(f"Released voice channels for matches {', '.join(result.sent)}")
+        return [by_match[match_id] for match_id in result.failed]
 
     @staticmethod
     def status(user: User | Member):
@@ -292,22 +274,234 @@ class PlayerContext:
 
     @staticmethod
     def _find_ready_players(bestOf: int):
-        batch = PlayerContext._peek_current_batch_ids(bestOf)
-        match bestOf:
-            case 1:
-                ready = PlayerContext._best_of_1_ready
-            case 3:
-                ready = PlayerContext._best_of_3_ready
-            case 5:
-                ready = PlayerContext._best_of_5_ready
-            case _:
-                ready = set()
-        return [pid for pid in batch if pid in ready]
+        return PlayerContext._get_queue(bestOf).ready_players(PLAYER_REQUIRED)
 
     @staticmethod
     def find_ready_players(bestOf: int):
         return PlayerContext._find_ready_players(bestOf)
 
+    @staticmethod
+    def _build_match_context(thread_id: str, created: dict, best_of: int, *teams: tuple) -> MatchContext:
+        """MatchContext from a createMatch result, teams as (name, players, captain_id, has_first_pick)"""
+        user_ids = created["userIds"]
+        team_ids = {1: created["team1Id"], 2: created["team2Id"]}
+        match = {
+            "_id": created["matchId"],
+            "team1": team_ids[1],
+            "team2": team_ids[2],
+            "bestOf": best_of,
+            "status": "veto_phase",
+            "threadId": thread_id,
+        }
+        team_docs, captains, rosters = {}, {}, {}
+        for number, (name, players, captain_id, has_first_pick) in enumerate(teams, start=1):
+            team_docs[number] = {
+                "_id": team_ids[number],
+                "name": name,
+                "captainId": user_ids[str(captain_id)],
+                "hasFirstPick": has_first_pick,
+            }
+            captains[number] = str(captain_id)
+            rosters[number] = [{"userId": user_ids[str(p.id)], "discordId": str(p.id)} for p in players]
+        return MatchContext(thread_id, match, team_docs, captains, rosters)
+
+    @staticmethod
+    async def _provision_match(created: dict, best_of: int, player_ids: list[int], team_a_first_pick: bool,
+                               team1: tuple, team2: tuple) -> str | None:
+        """Create the match thread and voice channels, returns the thread URL if a thread was created.
+
+        Teams are (name, player_ids, players, captain_id). Steps that do not
+        depend on each other, e.g. member invites, the thread ID write and the
+        voice channels, run concurrently.
+        """
+        bot_client = PlayerContext.bot
+        if not isinstance(bot_client, discord.Client):
+            log("Discord client not available to create thread")
+            return None
+        channel_id = int(os.getenv("DISCORD_MATCH_THREAD_CHANNEL_ID", "0"))
+        if channel_id == 0:
+            log("DISCORD_MATCH_THREAD_CHANNEL_ID is not set; skipping thread creation")
+            return None
+        category_id = int(os.getenv("DISCORD_MATCH_CATEGORY_ID", "0"))
+
+        match_db_id = created["matchId"]
+        match_id_short = match_db_id[:6] if match_db_id else "XXXXXX"
+        team1_name, team1_player_ids, team1_players, team1_captain_id = team1
+        team2_name, team2_player_ids, team2_players, team2_captain_id = team2
+
+        async def get_channel(cid: int):
+            channel = bot_client.get_channel(cid)
+            if channel is None:
+                channel = await bot_client.fetch_channel(cid)
+            return channel
+
+        async def resolve_channel():
+            channel = await get_channel(channel_id)
+            if not isinstance(channel, (discord.TextChannel, discord.ForumChannel)):
+                raise ValueError("Configured DISCORD_MATCH_THREAD_CHANNEL_ID not found or invalid type")
+            return channel
+
+        async def resolve_category():
+            if category_id <= 0:
+                log("DISCORD_MATCH_CATEGORY_ID not set; skipping voice channel creation")
+                return None
+            category = await get_channel(category_id)
+            if not isinstance(category, discord.CategoryChannel):
+                log("Category channel not found or invalid")
+                return None
+            return category
+
+        async def create_thread(channel):
+            thread_name = f"{team1_name} vs {team2_name} (BO{best_of}) | MATCH ID: {match_id_short}"
+            if pooled := ResourcePool.acquire_thread(channel):
+                try:
+                    return await ResourcePool.rename(pooled, thread_name)
+                except discord.NotFound:
+                    raise
+                except Exception:
+                    # Still named standby-*, park it again so the retry does not orphan it
+                    ResourcePool.return_thread(pooled)
+                    raise
+            if isinstance(channel, discord.TextChannel):
+                # Create a private thread from the channel
+                return await Outbound.call(
+                    f"thread_create:{channel.id}", Priority.MATCH_SETUP,
+                    lambda: channel.create_thread(
+                        name=thread_name,
+                        type=discord.ChannelType.private_thread,
+                        invitable=False
+                    ),
+                )
+            # Forum: create a post directly as thread
+            return await Outbound.call(
+                f"thread_create:{channel.id}", Priority.MATCH_SETUP,
+                lambda: channel.create_thread(name=thread_name, content="Match thread"),
+            )
+
+        async def add_bot(thread):
+            # Add bot to thread (for private threads)
+            if isinstance(thread, discord.Thread) and bot_client.user:
+                await Outbound.call(
+                    f"thread_member:{thread.id}", Priority.MATCH_SETUP,
+                    lambda: thread.add_user(bot_client.user),
+                )
+
+        members = [m for m in (PlayerContext.users.get(pid) for pid in player_ids)
+                   if isinstance(m, (discord.User, discord.Member))]
+        added: set[int] = set()
+
+        async def add_members(thread):
+            # A retry only invites the members that failed last time
+            result = await fan_out(
+                "thread members",
+                [m for m in members if m.id not in added],
+                lambda m: Outbound.call(f"thread_member:{thread.id}", Priority.MATCH_SETUP, lambda: thread.add_user(m)),
+            )
+            added.update(m.id for m in result.sent)
+            if not result.ok:
+                raise RuntimeError(f"{len(result.failed)} members could not be added")
+
+        def roster(team_player_ids: list[int], captain_id: int) -> list[str]:
+            lines = []
+            for pid in team_player_ids:
+                member = PlayerContext.users.get(pid)
+                if member:
+                    captain_marker = " 👑" if pid == captain_id else ""
+                    # Handle both real Discord users and MockUsers
+                    mention = member.mention if hasattr(member, 'mention') else f"<@{pid}>"
+                    lines.append(f"{mention}{captain_marker}")
+            return lines
+
+        async def post_roster(thread):
+            first_pick_team = team1_name if team_a_first_pick else team2_name
+            match_message = f"""# 🎮 Match Started!
+## Best of {best_of}
+
+### **{team1_name}**
+{chr(10).join(roster(team1_player_ids, team1_captain_id))}
+
+### **{team2_name}**
+{chr(10).join(roster(team2_player_ids, team2_captain_id))}
+
+**First Pick:** {first_pick_team}
+**Match ID:** `{match_id_short}`"""
+            await Outbound.send_message(thread, match_message, Priority.SUMMARY)
+
+        async def save_thread_id(thread):
+            # Veto and score commands read this instead of querying Convex
+            MatchContextCache.put(PlayerContext._build_match_context(
+                str(thread.id), created, best_of,
+                (team1_name, team1_players, team1_captain_id, team_a_first_pick),
+                (team2_name, team2_players, team2_captain_id, not team_a_first_pick),
+            ))
+            await async_db.matches.update_thread_id(match_db_id, str(thread.id))
+
+        voice_names = {
+            "team1": team1_name,
+            "team2": team2_name,
+            "common": f"Common Chat | {team1_name} | {team2_name}",
+        }
+        created_voice: dict[str, discord.VoiceChannel] = {}
+
+        async def create_voice(category):
+            if category is None:
+                return None
+
+            if not created_voice and (pooled := ResourcePool.acquire_voice()):
+                created_voice.update(zip(voice_names, pooled))
+
+            async def provide(key: str):
+                if key in created_voice:
+                    if created_voice[key].name != voice_names[key]:
+                        created_voice[key] = await ResourcePool.rename(created_voice[key], voice_names[key])
+                    return
+                created_voice[key] = await Outbound.call(
+                    f"voice_create:{category.guild.id}", Priority.MATCH_SETUP,
+                    lambda: category.guild.create_voice_channel(name=voice_names[key], category=category),
+                )
+
+            # Pooled channels are renamed, a retry only creates the channels that are still missing
+            outcomes = await asyncio.gather(*(provide(k) for k in voice_names), return_exceptions=True)
+            if created_voice:
+                # Persisted, so the channels are still deleted after a restart
+                Scheduler.schedule(
+                    f"voice:{match_db_id}",
+                    "voice_cleanup",
+                    VOICE_CHANNEL_LIFETIME,
+                    {"matchId": match_db_id, "channelIds": [str(c.id) for c in created_voice.values()]},
+                    persist=True,
+                )
+            for outcome in outcomes:
+                if isinstance(outcome, Exception):
+                    raise outcome
+            log(lambda: f"Voice channels ready: {', '.join(str(c.id) for c in created_voice.values())}", level=DEBUG)
+            return [created_voice[k] for k in voice_names]
+
+        async def post_voice_links(thread, voice):
+            if voice is None:
+                return
+            voice_message = "**Voice Channels:**\n" + "\n".join(c.mention for c in voice)
+            await Outbound.send_message(thread, voice_message, Priority.SUMMARY)
+
+        result = await (
+            Pipeline(f"provision {match_id_short}")
+            .step("channel", resolve_channel)
+            .step("category", resolve_category)
+            .step("thread", create_thread, deps=("channel",))
+            .step("bot_member", add_bot, deps=("thread",))
+            .step("members", add_members, deps=("thread",))
+            .step("roster", post_roster, deps=("thread",))
+            .step("thread_id", save_thread_id, deps=("thread",))
+            .step("voice", create_voice, deps=("category",))
+            .step("voice_links", post_voice_links, deps=("thread", "voice"))
+            .run()
+        )
+
+        thread = result.results.get("thread")
+        if thread is None:
+            return None
+        return f"https://discord.com/channels/{result.results['channel'].guild.id}/{thread.id}"
+
     @staticmethod
     async def create_match(player_ids: list[int], best_of: int):
 
@@ -317,9 +511,13 @@ class PlayerContext:
         team1_name = TeamBalancer.generate_team_name()
         team2_name = TeamBalancer.generate_team_name()
 
-        # Balance teams - MOCK VERSION
-        team1_player_ids, team2_player_ids = MockTeamBalancer.balance_teams_mock(player_ids)
-        # Original: team1_player_ids, team2_player_ids = TeamBalancer.balance_teams(player_ids)
+        # Balance teams on current ratings, unrated players count as DEFAULT_RATING
+        try:
+            ratings = await Leaderboards.ratings(player_ids)
+        except Exception as e:
+            log(f"Could not load ratings, balancing with defaults: {e}")
+            ratings = {}
+        team1_player_ids, team2_player_ids = TeamBalancer.balance_teams(player_ids, ratings)
 
         # Pick captains - MOCK VERSION
         team1_captain_id = MockTeamBalancer.pick_captain_mock(team1_player_ids)
@@ -332,261 +530,66 @@ class PlayerContext:
         team_a_first_pick = MockTeamBalancer.get_first_pick_mock()
         # Original: team_a_first_pick = random.choice([True, False])
 
-        log(f"Teams: {team1_name} vs {team2_name}")
-        log(f"Captains: {team1_captain_id} vs {team2_captain_id}")
-        log(f"First pick: {'Team A' if team_a_first_pick else 'Team B'}")
-
-        # Create or find users in DB
-        user_to_db_id = {}
-        for pid in player_ids:
-            user = PlayerContext.users.get(pid)
-            if user:
-                try:
-                    db_user_id = db.users.createOrFind(user)
-                    user_to_db_id[pid] = db_user_id
-                except Exception as e:
-                    log(f"Error creating/finding user {pid}: {e}")
+        log(f"Teams: {team1_name} vs {team2_name}", level=DEBUG)
+        log(f"Captains: {team1_captain_id} vs {team2_captain_id}", level=DEBUG)
+        log(f"First pick: {'Team A' if team_a_first_pick else 'Team B'}", level=DEBUG)
 
-        # Create teams in DB
-        try:
-            # Find valid captain IDs from created users
-            team1_captain_db_id = user_to_db_id.get(team1_captain_id)
-            if not team1_captain_db_id:
-                # Use first available player from team1
-                for pid in team1_player_ids:
-                    if pid in user_to_db_id:
-                        team1_captain_db_id = user_to_db_id[pid]
-                        break
-            
-            team2_captain_db_id = user_to_db_id.get(team2_captain_id)
-            if not team2_captain_db_id:
-                # Use first available player from team2
-                for pid in team2_player_ids:
-                    if pid in user_to_db_id:
-                        team2_captain_db_id = user_to_db_id[pid]
-                        break
-            
-            team1_db_id = db.teams.create(
-                name=team1_name,
-                captain_id=team1_captain_db_id,
-                has_first_pick=team_a_first_pick
-            )
-            team2_db_id = db.teams.create(
-                name=team2_name,
-                captain_id=team2_captain_db_id,
-                has_first_pick=not team_a_first_pick
-            )
-            log(f"Teams saved to DB: {team1_db_id} vs {team2_db_id}")
-        except Exception as e:
-            log(f"Error creating teams in DB: {e}")
+        # Users, teams, match, players and BO1 decider are written in one transaction
+        team1_players = [u for u in (PlayerContext.users.get(pid) for pid in team1_player_ids) if u]
+        team2_players = [u for u in (PlayerContext.users.get(pid) for pid in team2_player_ids) if u]
+        if not team1_players or not team2_players:
+            log("Cannot create match: a team has no known players")
             return
 
-        # Create match in DB
+        # Fall back to the first available player if a captain is unknown
+        if team1_captain_id not in {u.id for u in team1_players}:
+            team1_captain_id = team1_players[0].id
+        if team2_captain_id not in {u.id for u in team2_players}:
+            team2_captain_id = team2_players[0].id
+
         try:
-            match_db_id = db.matches.create(
-                team1_id=team1_db_id,
-                team2_id=team2_db_id,
-                best_of=best_of
+            created = await async_db.matches.create_with_roster(
+                best_of=best_of,
+                team1_name=team1_name,
+                team1_players=team1_players,
+                team1_captain_id=team1_captain_id,
+                team2_name=team2_name,
+                team2_players=team2_players,
+                team2_captain_id=team2_captain_id,
+                team1_has_first_pick=team_a_first_pick
             )
-            log(f"Match saved to DB: {match_db_id}")
-
-            # BO1: immediately choose decider map on match creation
-            if best_of == 1 and match_db_id and team1_db_id:
-                try:
-                    active_maps = MapsServiceImpl.get_active_maps()
-                    if not active_maps:
-                        log("No active maps available for BO1 decider")
-                    else:
-                        selected = random.choice(active_maps)
-                        veto_id = db.vetos.create(match_db_id, team1_db_id, "decider", 1)
-                        MapSelectionsServiceImpl.create(veto_id, selected["_id"])
-                        log(f"BO1 decider selected: {selected['name']} (mapId={selected['_id']})")
-                except Exception as e:
-                    log(f"Error selecting BO1 decider: {e}")
         except Exception as e:
-            log(f"Error creating match in DB: {e}")
+            log(f"Error creating match in DB: {e}", level=ERROR)
             return
 
-        # Add players to teams
-        try:
-            for pid in team1_player_ids:
-                if pid in user_to_db_id:
-                    db.players.create(
-                        team_id=team1_db_id,
-                        user_id=user_to_db_id[pid]
-                    )
-            for pid in team2_player_ids:
-                if pid in user_to_db_id:
-                    db.players.create(
-                        team_id=team2_db_id,
-                        user_id=user_to_db_id[pid]
-                    )
-            log(f"Players added to teams")
-        except Exception as e:
-            log(f"Error adding players to teams: {e}")
-
-        # Create a private thread in the configured channel and invite players
-        thread_url = None
-        try:
-            channel_id = int(os.getenv("DISCORD_MATCH_THREAD_CHANNEL_ID", "0"))
-            if channel_id == 0:
-                log("DISCORD_MATCH_THREAD_CHANNEL_ID is not set; skipping thread creation")
-            else:
-                bot_client = PlayerContext.bot
-                if isinstance(bot_client, discord.Client):
-                    channel = bot_client.get_channel(channel_id)
-                    if channel is None:
-                        try:
-                            channel = await bot_client.fetch_channel(channel_id)
-                        except Exception:
-                            channel = None
-                    if channel and isinstance(channel, (discord.TextChannel, discord.ForumChannel)):
-                        match_id_short = match_db_id[:6] if match_db_id else "XXXXXX"
-                        thread_name = f"{team1_name} vs {team2_name} (BO{best_of}) | MATCH ID: {match_id_short}"
-                        if isinstance(channel, discord.TextChannel):
-                            # Create a private thread from the channel
-                            thread = await channel.create_thread(
-                                name=thread_name,
-                                type=discord.ChannelType.private_thread,
-                                invitable=False
-                            )
-                        else:
-                            # Forum: create a post directly as thread
-                            thread = await channel.create_thread(name=thread_name, content="Match thread")
-                        
-                        # Store thread URL for notifications
-                        thread_url = f"https://discord.com/channels/{channel.guild.id}/{thread.id}"
-                        
-                        # Add bot to thread (for private threads)
-                        try:
-                            if isinstance(thread, discord.Thread) and bot_client.user:
-                                await thread.add_user(bot_client.user)
-                        except Exception as e:
-                            log(f"Could not add bot to thread: {e}")
-                        
-                        # Add members
-                        for pid in player_ids:
-                            member = PlayerContext.users.get(pid)
-                            if isinstance(member, (discord.User, discord.Member)):
-                                try:
-                                    await thread.add_user(member)
-                                except Exception:
-                                    pass
-                        
-                        # Post match details in the thread
-                        try:
-                            # Build team rosters with mentions
-                            team1_roster = []
-                            for pid in team1_player_ids:
-                                member = PlayerContext.users.get(pid)
-                                if member:
-                                    captain_marker = " 👑" if pid == team1_captain_id else ""
-                                    # Handle both real Discord users and MockUsers
-                                    if hasattr(member, 'mention'):
-                                        team1_roster.append(f"{member.mention}{captain_marker}")
-                                    else:
-                                        team1_roster.append(f"<@{pid}>{captain_marker}")
-                            
-                            team2_roster = []
-                            for pid in team2_player_ids:
-                                member = PlayerContext.users.get(pid)
-                                if member:
-                                    captain_marker = " 👑" if pid == team2_captain_id else ""
-                                    # Handle both real Discord users and MockUsers
-                                    if hasattr(member, 'mention'):
-                                        team2_roster.append(f"{member.mention}{captain_marker}")
-                                    else:
-                                        team2_roster.append(f"<@{pid}>{captain_marker}")
-                            
-                            first_pick_team = team1_name if team_a_first_pick else team2_name
-                            
-                            match_message = f"""# 🎮 Match Started!
-## Best of {best_of}
-
-### **{team1_name}**
-{chr(10).join(team1_roster)}
+        # createMatch upserted every player, so the next pop finds them in the cache
+        UserIdentities.put_many(created["userIds"])
+        match_db_id = created["matchId"]
+        # Every record of the match setup, including its pipeline tasks, carries the match ID
+        with log_context(match_id=match_db_id):
+            log(f"Match saved to DB: {match_db_id} ({created['team1Id']} vs {created['team2Id']})")
+            if decider := created.get("decider"):
+                log(f"BO1 decider selected: {decider['name']} (mapId={decider['mapId']})", level=DEBUG)
+            elif best_of == 1:
+                log("No active maps available for BO1 decider")
+
+            thread_url = await PlayerContext._provision_match(
+                created, best_of, player_ids, team_a_first_pick,
+                (team1_name, team1_player_ids, team1_players, team1_captain_id),
+                (team2_name, team2_player_ids, team2_players, team2_captain_id),
+            )
 
-### **{team2_name}**
-{chr(10).join(team2_roster)}
+            # Notify players
+            message = f"Match created! Best of {best_of}\nTeam A: {team1_name}\nTeam B: {team2_name}"
+            if thread_url:
+                message += f"\n\nJoin the match thread: {thread_url}"
+            users = [u for u in (PlayerContext.users.get(pid) for pid in player_ids) if u]
+            _ = await fan_out(
+                "match created",
+                users,
+                lambda user: Outbound.call(f"dm:{user.id}", Priority.SUMMARY, lambda: user.send(message)),
+            )
 
-**First Pick:** {first_pick_team}
-**Match ID:** `{match_id_short}`"""
-                            
-                            await thread.send(match_message)
-                        except Exception as e:
-                            log(f"Error posting match details to thread: {e}")
-                        
-                        # Persist thread ID
-                        try:
-                            await db.matches.update_thread_id(match_db_id, str(thread.id))
-                        except Exception as e:
-                            log(f"Failed to save thread id: {e}")
-                        
-                        # Create voice channels for the match
-                        try:
-                            category_id = int(os.getenv("DISCORD_MATCH_CATEGORY_ID", "0"))
-                            if category_id > 0 and channel.guild:
-                                category = bot_client.get_channel(category_id)
-                                if category is None:
-                                    try:
-                                        category = await bot_client.fetch_channel(category_id)
-                                    except Exception:
-                                        category = None
-                                
-                                if category and isinstance(category, discord.CategoryChannel):
-                                    # Create team voice channels
-                                    team1_voice = await channel.guild.create_voice_channel(
-                                        name=f"{team1_name}",
-                                        category=category
-                                    )
-                                    team2_voice = await channel.guild.create_voice_channel(
-                                        name=f"{team2_name}",
-                                        category=category
-                                    )
-                                    common_voice = await channel.guild.create_voice_channel(
-                                        name=f"Common Chat | {team1_name} | {team2_name}",
-                                        category=category
-                                    )
-                                    
-                                    log(f"Created voice channels: {team1_voice.id}, {team2_voice.id}, {common_voice.id}")
-                                    
-                                    # Schedule automatic deletion after 2 hours
-                                    async def delete_voice_channels():
-                                        await asyncio.sleep(2 * 60 * 60)  # 2 hours
-                                        try:
-                                            await team1_voice.delete(reason="Match ended - 2 hour limit")
-                                            await team2_voice.delete(reason="Match ended - 2 hour limit")
-                                            await common_voice.delete(reason="Match ended - 2 hour limit")
-                                            log(f"Deleted voice channels for match {match_id_short}")
-                                        except Exception as e:
-                                            log(f"Error deleting voice channels: {e}")
-                                    
-                                    asyncio.create_task(delete_voice_channels())
-                                    
-                                    # Post voice channel links in thread
-                                    voice_message = f"\n\n**Voice Channels:**\n{team1_voice.mention}\n{team2_voice.mention}\n{common_voice.mention}"
-                                    await thread.send(voice_message)
-                                else:
-                                    log("Category channel not found or invalid")
-                            else:
-                                log("DISCORD_MATCH_CATEGORY_ID not set; skipping voice channel creation")
-                        except Exception as e:
-                            log(f"Error creating voice channels: {e}")
-                    else:
-                        log("Configured DISCORD_MATCH_THREAD_CHANNEL_ID not found or invalid type")
-                else:
-                    log("Discord client not available to create thread")
-        except Exception as e:
-            log(f"Error creating private thread: {e}")
 
-        # Notify players
-        for pid in player_ids:
-            user = PlayerContext.users.get(pid)
-            if user:
-                try:
-                    message = f"Match created! Best of {best_of}\nTeam A: {team1_name}\nTeam B: {team2_name}"
-                    if thread_url:
-                        message += f"\n\nJoin the match thread: {thread_url}"
-                    await user.send(message)
-                except:
-                    pass
+Scheduler.register("ready_timeout", PlayerContext._ready_timeout)
+Scheduler.register("voice_cleanup", PlayerContext._release_voice_channels, coalesce=True)
@@ -0,0 +1,165 @@
+import asyncio
+from typing import Callable
+from bot.lib.constants import (
+    QUEUE_JOURNAL_FLUSH_INTERVAL, QUEUE_JOURNAL_BATCH_SIZE, QUEUE_SNAPSHOT_EVERY, QUEUE_MODES,
+    QUEUE_RESTORE_RETRIES, QUEUE_RESTORE_RETRY_DELAY,
+)
+from bot.lib.db.db import async_db
+from bot.lib.log import log, ERROR
+from bot.lib.match_queue import MatchQueue, serialize_queues, replay_queues
+
+
+class QueueJournal:
+    """Write-behind journal of queue membership changes.
+
+    Events are buffered in memory and flushed to Convex in batches by a
+    background task. Every QUEUE_SNAPSHOT_EVERY events a full snapshot is
+    written, which compacts the journal behind it.
+
+    Sequence numbers must continue from what Convex already holds, or new
+    batches sort below the existing snapshot and are ignored on load. When
+    the startup restore failed the journal is fenced: nothing is written
+    until the persisted seq is known, then a snapshot of the live state
+    supersedes the old one.
+    """
+
+    _buffer: list[dict] = []
+    _seq: int = 0
+    _snapshot_seq: int = 0
+    _get_queues: Callable[[], dict[int, MatchQueue]] | None = None
+    _lock: asyncio.Lock | None = None
+    _wakeup: asyncio.Event | None = None
+    _task: asyncio.Task | None = None
+    _fenced: bool = False
+
+    @staticmethod
+    def record(kind: str, user_id: int | None = None, best_of: int | None = None):
+        event: dict = {"kind": kind}
+        if user_id is not None:
+            event["discordId"] = str(user_id)
+        if best_of is not None:
+            event["bestOf"] = best_of
+        QueueJournal._buffer.append(event)
+        QueueJournal._seq += 1
+
+        if len(QueueJournal._buffer) >= QUEUE_JOURNAL_BATCH_SIZE and QueueJournal._wakeup:
+            QueueJournal._wakeup.set()
+
+    @staticmethod
+    def start(get_queues: Callable[[], dict[int, MatchQueue]], fenced: bool = False):
+        """Start the background flusher, get_queues provides the live state for snapshots.
+
+        fenced is set when the persisted state could not be restored, see the class docstring.
+        """
+        if QueueJournal._task and not QueueJournal._task.done():
+            return
+        QueueJournal._get_queues = get_queues
+        QueueJournal._fenced = fenced
+        QueueJournal._lock = asyncio.Lock()
+        QueueJournal._wakeup = asyncio.Event()
+        QueueJournal._task = asyncio.create_task(QueueJournal._run())
+
+    @staticmethod
+    async def _run():
+        if QueueJournal._fenced:
+            await QueueJournal._resume_from_server()
+        while True:
+            try:
+                _ = await asyncio.wait_for(QueueJournal._wakeup.wait(), QUEUE_JOURNAL_FLUSH_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            QueueJournal._wakeup.clear()
+
+            if QueueJournal._seq - QueueJournal._snapshot_seq >= QUEUE_SNAPSHOT_EVERY:
+                await QueueJournal.snapshot()
+            else:
+                await QueueJournal.flush()
+
+    @staticmethod
+    async def flush():
+        """Append all buffered events as one journal batch"""
+        async with QueueJournal._lock:
+            if not QueueJournal._buffer:
+                return
+            events, QueueJournal._buffer = QueueJournal._buffer, []
+            last_seq = QueueJournal._seq
+            try:
+                _ = await async_db.queue_state.append_events(last_seq, events)
+            except Exception as e:
+                # Keep the events so the next flush retries them in order
+                QueueJournal._buffer = events + QueueJournal._buffer
+                log(f"Queue journal flush failed, {len(QueueJournal._buffer)} events pending: {e}")
+
+    @staticmethod
+    async def snapshot():
+        """Persist the full queue state; buffered events are covered by it and dropped"""
+        if QueueJournal._get_queues is None:
+            return
+        async with QueueJournal._lock:
+            # State, seq and buffer are captured together, without awaiting in between
+            seq = QueueJournal._seq
+            queues = serialize_queues(QueueJournal._get_queues())
+            pending, QueueJournal._buffer = QueueJournal._buffer, []
+            try:
+                _ = await async_db.queue_state.save_snapshot(seq, queues)
+                QueueJournal._snapshot_seq = seq
+            except Exception as e:
+                QueueJournal._buffer = pending + QueueJournal._buffer
+                log(f"Queue snapshot failed: {e}")
+
+    @staticmethod
+    async def _resume_from_server():
+        """Continue the sequence after the persisted one, retrying until Convex answers"""
+        delay = QUEUE_RESTORE_RETRY_DELAY
+        while True:
+            try:
+                latest = await async_db.queue_state.latest_seq()
+                break
+            except Exception as e:
+                log(f"Queue journal fenced, latest seq unknown, retrying in {delay:.0f}s: {e}", level=ERROR)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, QUEUE_JOURNAL_FLUSH_INTERVAL * 60)
+
+        async with QueueJournal._lock:
+            # Events recorded while fenced keep their order, shifted past the persisted ones.
+            # The extra 1 makes the snapshot below strictly newer than any existing one.
+            QueueJournal._seq += latest + 1
+            QueueJournal._snapshot_seq = latest
+        QueueJournal._fenced = False
+        log(f"Queue journal resumed after persisted seq {latest}")
+        # Until this snapshot lands, a load would still return the stale one
+        delay = QUEUE_RESTORE_RETRY_DELAY
+        while True:
+            await QueueJournal.snapshot()
+            if QueueJournal._snapshot_seq > latest:
+                return
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, QUEUE_JOURNAL_FLUSH_INTERVAL * 60)
+
+    @staticmethod
+    async def restore() -> dict[int, MatchQueue] | None:
+        """Rebuild queues from the latest snapshot and journal, None if nothing was persisted.
+
+        Retried QUEUE_RESTORE_RETRIES times, raises the last error.
+        """
+        delay = QUEUE_RESTORE_RETRY_DELAY
+        for attempt in range(1, QUEUE_RESTORE_RETRIES + 1):
+            try:
+                state = await async_db.queue_state.load()
+                break
+            except Exception as e:
+                if attempt == QUEUE_RESTORE_RETRIES:
+                    raise
+                log(f"Queue state load failed (attempt {attempt}), retrying in {delay:.1f}s: {e}")
+                await asyncio.sleep(delay)
+                delay *= 2
+        snapshot = state.get("snapshot")
+        batches = state.get("batches", [])
+        if not snapshot and not batches:
+            return None
+
+        queues, seq = replay_queues(QUEUE_MODES, snapshot, batches)
+        QueueJournal._seq = seq
+        QueueJournal._snapshot_seq = int(snapshot["seq"]) if snapshot else 0
+        log(f"Queue state restored at seq {seq}: {sum(len(q) for q in queues.values())} players")
+        return queues
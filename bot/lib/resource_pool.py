@@ -0,0 +1,212 @@
+import asyncio
+import os
+from collections import deque
+import discord
+from bot.lib.constants import THREAD_POOL_SIZE, VOICE_POOL_SIZE, POOL_PREFIX
+from bot.lib.fanout import fan_out
+from bot.lib.log import log
+from bot.lib.outbound import Outbound, Priority
+
+# Longest auto-archive Discord allows, parked threads are unarchived when assigned
+THREAD_ARCHIVE_MINUTES = 10080
+VOICE_KEYS = ("team1", "team2", "common")
+
+
+class ResourcePool:
+    """Warm pool of parked match threads and voice channel triples.
+
+    A background task keeps THREAD_POOL_SIZE private threads in the match
+    channel and VOICE_POOL_SIZE voice triples in the match category, named
+    with POOL_PREFIX so they are adopted again after a restart. Matches
+    take a parked resource and rename it instead of waiting on channel
+    creation. Voice triples are recycled when a match releases them; threads
+    keep their match history and members, so they are never reused.
+    """
+
+    bot: discord.Client | None = None
+    _threads: deque[discord.Thread] = deque()
+    _voice: deque[list[discord.VoiceChannel]] = deque()
+    _wakeup: asyncio.Event | None = None
+    _task: asyncio.Task | None = None
+
+    @staticmethod
+    def start(bot: discord.Client):
+        if ResourcePool._task and not ResourcePool._task.done():
+            return
+        ResourcePool.bot = bot
+        ResourcePool._wakeup = asyncio.Event()
+        ResourcePool._task = asyncio.create_task(ResourcePool._run())
+
+    @staticmethod
+    def acquire_thread(channel) -> discord.Thread | None:
+        """A parked thread of channel, None if the pool is empty"""
+        thread = None
+        while ResourcePool._threads and thread is None:
+            candidate = ResourcePool._threads.popleft()
+            if candidate.parent_id == channel.id:
+                thread = candidate
+        ResourcePool._refill()
+        return thread
+
+    @staticmethod
+    def return_thread(thread: discord.Thread):
+        """Park an acquired thread again, e.g. when renaming it for a match failed"""
+        if thread.id not in {t.id for t in ResourcePool._threads}:
+            ResourcePool._threads.appendleft(thread)
+
+    @staticmethod
+    def acquire_voice() -> list[discord.VoiceChannel] | None:
+        """A parked (team1, team2, common) voice triple, None if the pool is empty"""
+        triple = ResourcePool._voice.popleft() if ResourcePool._voice else None
+        ResourcePool._refill()
+        return triple
+
+    @staticmethod
+    async def release_voice(channels: list[discord.VoiceChannel]):
+        """Park a match's voice triple again, or delete it if the pool is full or it is still in use.
+
+        Raises if a channel could not be deleted.
+        """
+        reusable = (
+            len(channels) == len(VOICE_KEYS)
+            and len(ResourcePool._voice) < VOICE_POOL_SIZE
+            and not any(c.members for c in channels)
+        )
+        if reusable:
+            try:
+                parked = await ResourcePool._rename_all(channels, ResourcePool._standby_names())
+                ResourcePool._voice.append(parked)
+                return
+            except Exception as e:
+                log(f"Could not recycle voice channels, deleting them: {e}")
+
+        result = await fan_out(
+            "voice cleanup",
+            channels,
+            lambda c: Outbound.call(
+                "channel_delete", Priority.CLEANUP,
+                lambda: c.delete(reason="Match ended - voice channel lifetime reached"),
+            ),
+        )
+        if not result.ok:
+            # Raised so the cleanup timer is retried, deleted channels resolve to nothing next time
+            raise next(iter(result.failed.values()))
+
+    @staticmethod
+    async def rename(channel, name: str):
+        """Rename a pooled channel or thread, archived threads are reopened"""
+        kwargs = {"archived": False} if isinstance(channel, discord.Thread) else {}
+        edited = await Outbound.call(
+            f"channel_edit:{channel.id}", Priority.MATCH_SETUP,
+            lambda: channel.edit(name=name, **kwargs),
+        )
+        return edited or channel
+
+    @staticmethod
+    async def _rename_all(channels: list, names: list[str]) -> list:
+        return list(await asyncio.gather(*(ResourcePool.rename(c, n) for c, n in zip(channels, names))))
+
+    @staticmethod
+    def _standby_name() -> str:
+        # Random, so names never collide with resources adopted after a restart
+        return f"{POOL_PREFIX}-{os.urandom(3).hex()}"
+
+    @staticmethod
+    def _standby_names() -> list[str]:
+        name = ResourcePool._standby_name()
+        return [f"{name}-{key}" for key in VOICE_KEYS]
+
+    @staticmethod
+    def _refill():
+        if ResourcePool._wakeup:
+            ResourcePool._wakeup.set()
+
+    @staticmethod
+    async def _resolve(env_name: str):
+        channel_id = int(os.getenv(env_name, "0"))
+        if channel_id <= 0:
+            return None
+        channel = ResourcePool.bot.get_channel(channel_id)
+        if channel is None:
+            channel = await ResourcePool.bot.fetch_channel(channel_id)
+        return channel
+
+    @staticmethod
+    async def _adopt(channel, category):
+        """Take over resources parked before a restart, including threads that archived meanwhile"""
+        if isinstance(channel, discord.TextChannel):
+            known = {t.id for t in ResourcePool._threads}
+            threads = list(channel.threads)
+            try:
+                # channel.threads only holds the cached active threads
+                threads += [t async for t in channel.archived_threads(private=True, limit=None)]
+            except discord.HTTPException as e:
+                log(f"Could not list archived standby threads: {e}")
+            for thread in threads:
+                if thread.name.startswith(POOL_PREFIX) and thread.id not in known:
+                    ResourcePool._threads.append(thread)
+                    known.add(thread.id)
+
+        if isinstance(category, discord.CategoryChannel):
+            known = {c.id for triple in ResourcePool._voice for c in triple}
+            parked: dict[str, dict[str, discord.VoiceChannel]] = {}
+            for voice in category.voice_channels:
+                parts = voice.name.split("-")
+                if voice.id in known or len(parts) != 3 or parts[0] != POOL_PREFIX:
+                    continue
+                parked.setdefault(parts[1], {})[parts[2]] = voice
+            for group in parked.values():
+                if all(key in group for key in VOICE_KEYS):
+                    ResourcePool._voice.append([group[key] for key in VOICE_KEYS])
+
+        log(f"Resource pool adopted {len(ResourcePool._threads)} threads, {len(ResourcePool._voice)} voice triples")
+
+    @staticmethod
+    async def _run():
+        try:
+            channel = await ResourcePool._resolve("DISCORD_MATCH_THREAD_CHANNEL_ID")
+            category = await ResourcePool._resolve("DISCORD_MATCH_CATEGORY_ID")
+        except Exception as e:
+            log(f"Resource pool disabled, could not resolve match channels: {e}")
+            return
+        await ResourcePool._adopt(channel, category)
+
+        while True:
+            ResourcePool._wakeup.clear()
+            try:
+                # Forum posts need content and are created on demand instead
+                while isinstance(channel, discord.TextChannel) and len(ResourcePool._threads) < THREAD_POOL_SIZE:
+                    name = ResourcePool._standby_name()
+                    thread = await Outbound.call(
+                        f"thread_create:{channel.id}", Priority.BACKGROUND,
+                        lambda: channel.create_thread(
+                            name=name,
+                            type=discord.ChannelType.private_thread,
+                            invitable=False,
+                            auto_archive_duration=THREAD_ARCHIVE_MINUTES,
+                        ),
+                    )
+                    ResourcePool._threads.append(thread)
+
+                while isinstance(category, discord.CategoryChannel) and len(ResourcePool._voice) < VOICE_POOL_SIZE:
+                    names = ResourcePool._standby_names()
+                    triple = await asyncio.gather(*(
+                        Outbound.call(
+                            f"voice_create:{category.guild.id}", Priority.BACKGROUND,
+                            lambda name=name: category.guild.create_voice_channel(name=name, category=category),
+                        )
+                        for name in names
+                    ), return_exceptions=True)
+                    errors = [t for t in triple if isinstance(t, Exception)]
+                    if errors:
+                        # An incomplete triple is never adopted, remove what was created
+                        for voice in triple:
+                            if not isinstance(voice, Exception):
+                                _ = await Outbound.call("channel_delete", Priority.BACKGROUND, voice.delete)
+                        raise errors[0]
+                    ResourcePool._voice.append(list(triple))
+            except Exception as e:
+                log(f"Resource pool refill failed: {e}")
+                await asyncio.sleep(30)
+                continue
+            _ = await ResourcePool._wakeup.wait()
@@ -0,0 +1,250 @@
+import asyncio
+import heapq
+import time
+from collections import defaultdict
+from typing import Any, Awaitable, Callable
+from bot.lib.constants import SCHEDULER_MAX_SLEEP, SCHEDULER_RETRY_DELAY, SCHEDULER_MAX_RETRY_DELAY
+from bot.lib.db.db import async_db
+from bot.lib.log import log, ERROR, WARNING
+
+# Coalesced handlers may return the payloads that failed, only those are retried
+Handler = Callable[[Any], Awaitable[Any]]
+
+
+class Timer:
+    def __init__(self, key: str, kind: str, due_at: float, payload: dict, persist: bool, attempts: int = 0):
+        self.key = key
+        self.kind = kind
+        self.due_at = due_at
+        self.payload = payload
+        self.persist = persist
+        # Failed handler runs so far, drives the retry backoff
+        self.attempts = attempts
+
+    def to_record(self) -> dict:
+        return {"key": self.key, "kind": self.kind, "dueAt": int(self.due_at * 1000), "payload": self.payload}
+
+
+class Scheduler:
+    """Single timer heap for every deadline in the bot.
+
+    Modules register a handler per timer kind and schedule timers by key;
+    scheduling an existing key replaces it. One background task sleeps until
+    the earliest deadline. Persistent timers are written behind to Convex and
+    resumed by restore(), overdue ones fire on the first tick. Handlers
+    registered with coalesce=True receive every payload due in the same tick
+    in a single call.
+
+    A persistent timer stays in Convex until its handler succeeds; a failed
+    run is retried with backoff, so handlers must tolerate running twice.
+    Timer writes are flushed by their own task and never delay a due timer.
+    """
+
+    _handlers: dict[str, tuple[Handler, bool]] = {}
+    _timers: dict[str, Timer] = {}
+    _heap: list[tuple[float, int, str]] = []
+    _counter: int = 0
+    # key -> timer to upsert, or None to delete, flushed by the background task
+    _dirty: dict[str, Timer | None] = {}
+    _wakeup: asyncio.Event | None = None
+    _flush_wakeup: asyncio.Event | None = None
+    _task: asyncio.Task | None = None
+    _flush_task: asyncio.Task | None = None
+
+    @staticmethod
+    def register(kind: str, handler: Handler, coalesce: bool = False):
+        """handler(payload), or handler(list of payloads) when coalesce is set"""
+        Scheduler._handlers[kind] = (handler, coalesce)
+
+    @staticmethod
+    def schedule(key: str, kind: str, delay: float, payload: dict | None = None, persist: bool = False):
+        Scheduler._add(Timer(key, kind, time.time() + delay, payload or {}, persist))
+        if persist:
+            Scheduler._mark_dirty(key, Scheduler._timers[key])
+        Scheduler._wake()
+
+    @staticmethod
+    def cancel(key: str) -> bool:
+        """Drop a pending timer, False if there was none"""
+        timer = Scheduler._timers.pop(key, None)
+        if timer is None:
+            return False
+        if timer.persist:
+            Scheduler._mark_dirty(key, None)
+        return True
+
+    @staticmethod
+    def expedite(key: str, delay: float) -> bool:
+        """Bring a pending timer forward to fire within delay, never later than it would have"""
+        timer = Scheduler._timers.get(key)
+        if timer is None:
+            return False
+        due_at = time.time() + delay
+        if due_at < timer.due_at:
+            Scheduler.schedule(key, timer.kind, delay, timer.payload, timer.persist)
+        return True
+
+    @staticmethod
+    def pending(key: str) -> bool:
+        return key in Scheduler._timers
+
+    @staticmethod
+    def start():
+        if Scheduler._task and not Scheduler._task.done():
+            return
+        Scheduler._wakeup = asyncio.Event()
+        Scheduler._flush_wakeup = asyncio.Event()
+        Scheduler._task = asyncio.create_task(Scheduler._run())
+        Scheduler._flush_task = asyncio.create_task(Scheduler._run_flusher())
+
+    @staticmethod
+    async def restore():
+        """Load persisted timers, timers scheduled since startup take precedence"""
+        records = await async_db.timers.list_all()
+        for record in records:
+            if record["key"] in Scheduler._timers:
+                continue
+            Scheduler._add(Timer(record["key"], record["kind"], record["dueAt"] / 1000, record.get("payload") or {}, True))
+        overdue = sum(1 for r in records if r["dueAt"] / 1000 <= time.time())
+        log(f"Scheduler restored {len(records)} timers, {overdue} overdue")
+        Scheduler._wake()
+
+    @staticmethod
+    def _add(timer: Timer):
+        Scheduler._timers[timer.key] = timer
+        Scheduler._counter += 1
+        heapq.heappush(Scheduler._heap, (timer.due_at, Scheduler._counter, timer.key))
+
+    @staticmethod
+    def _mark_dirty(key: str, timer: Timer | None):
+        Scheduler._dirty[key] = timer
+        if Scheduler._flush_wakeup:
+            Scheduler._flush_wakeup.set()
+
+    @staticmethod
+    def _wake():
+        if Scheduler._wakeup:
+            Scheduler._wakeup.set()
+
+    @staticmethod
+    def _pop_due(now: float) -> list[Timer]:
+        due: list[Timer] = []
+        heap = Scheduler._heap
+        while heap and heap[0][0] <= now:
+            due_at, _, key = heapq.heappop(heap)
+            timer = Scheduler._timers.get(key)
+            # Cancelled or rescheduled timers leave stale heap entries behind
+            if timer is None or timer.due_at != due_at:
+                continue
+            del Scheduler._timers[key]
+            due.append(timer)
+        return due
+
+    @staticmethod
+    async def _run():
+        while True:
+            Scheduler._dispatch(Scheduler._pop_due(time.time()))
+
+            timeout = SCHEDULER_MAX_SLEEP
+            if Scheduler._heap:
+                timeout = min(timeout, max(0.0, Scheduler._heap[0][0] - time.time()))
+            try:
+                _ = await asyncio.wait_for(Scheduler._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            Scheduler._wakeup.clear()
+
+    @staticmethod
+    def _dispatch(due: list[Timer]):
+        """Run the handlers for this tick, one call per coalesced kind"""
+        grouped: dict[str, list[Timer]] = defaultdict(list)
+        for timer in due:
+            grouped[timer.kind].append(timer)
+
+        for kind, timers in grouped.items():
+            entry = Scheduler._handlers.get(kind)
+            if entry is None:
+                log(f"No scheduler handler for {kind}, dropping {len(timers)} timers")
+                continue
+            handler, coalesce = entry
+            if coalesce:
+                _ = asyncio.create_task(Scheduler._call_coalesced(kind, handler, timers))
+            else:
+                for timer in timers:
+                    _ = asyncio.create_task(Scheduler._call(kind, handler, timer))
+
+    @staticmethod
+    async def _call(kind: str, handler: Handler, timer: Timer):
+        try:
+            _ = await handler(timer.payload)
+        except Exception as e:
+            log(f"Scheduler handler {kind} failed for {timer.key}: {e}", level=ERROR)
+            Scheduler._retry(timer)
+            return
+        Scheduler._done(timer)
+
+    @staticmethod
+    async def _call_coalesced(kind: str, handler: Handler, timers: list[Timer]):
+        try:
+            failed = await handler([t.payload for t in timers]) or []
+        except Exception as e:
+            log(f"Scheduler handler {kind} failed for {len(timers)} timers: {e}", level=ERROR)
+            failed = [t.payload for t in timers]
+        else:
+            if failed:
+                log(f"Scheduler handler {kind} failed for {len(failed)} of {len(timers)} timers", level=ERROR)
+
+        failed_ids = {id(p) for p in failed}
+        for timer in timers:
+            if id(timer.payload) in failed_ids:
+                Scheduler._retry(timer)
+            else:
+                Scheduler._done(timer)
+
+    @staticmethod
+    def _done(timer: Timer):
+        """Forget a persistent timer once handled, unless its key was scheduled again meanwhile"""
+        if timer.persist and timer.key not in Scheduler._timers:
+            Scheduler._mark_dirty(timer.key, None)
+
+    @staticmethod
+    def _retry(timer: Timer):
+        """Run a failed persistent timer again after a doubling delay, volatile ones are dropped"""
+        if not timer.persist or timer.key in Scheduler._timers:
+            return
+        delay = min(SCHEDULER_RETRY_DELAY * 2 ** timer.attempts, SCHEDULER_MAX_RETRY_DELAY)
+        retry = Timer(timer.key, timer.kind, time.time() + delay, timer.payload, True, timer.attempts + 1)
+        Scheduler._add(retry)
+        Scheduler._mark_dirty(retry.key, retry)
+        Scheduler._wake()
+        log(f"Timer {timer.key} retried in {delay:.0f}s (attempt {retry.attempts + 1})", level=WARNING)
+
+    @staticmethod
+    async def _run_flusher():
+        """Persist timer changes in the background, waiting SCHEDULER_RETRY_DELAY after a failed write"""
+        while True:
+            _ = await Scheduler._flush_wakeup.wait()
+            Scheduler._flush_wakeup.clear()
+            if not await Scheduler._flush():
+                await asyncio.sleep(SCHEDULER_RETRY_DELAY)
+                Scheduler._flush_wakeup.set()
+
+    @staticmethod
+    async def _flush() -> bool:
+        """Write persistent timer changes to Convex, False if any write failed and was kept for retry"""
+        if not Scheduler._dirty:
+            return True
+        ok = True
+        dirty, Scheduler._dirty = Scheduler._dirty, {}
+        for key, timer in dirty.items():
+            try:
+                if timer is None:
+                    _ = await async_db.timers.remove(key)
+                else:
+                    _ = await async_db.timers.upsert(timer.to_record())
+            except Exception as e:
+                # A newer change for the same key wins over the failed one
+                _ = Scheduler._dirty.setdefault(key, timer)
+                ok = False
+                log(f"Error persisting timer {key}: {e}", level=ERROR)
+        return ok
@@ -1,4 +1,8 @@
 import random
+from functools import lru_cache
+from itertools import combinations
+from bot.lib.constants import DEFAULT_RATING, ROLE_DUPLICATE_PENALTY
+from bot.lib.log import log, DEBUG
 
 ADJECTIVES = [
     "Angry", "Brave", "Clever", "Daring", "Energetic", "Fearless", "Gentle",
@@ -26,15 +30,83 @@ class TeamBalancer:
         return random.choice(player_ids)
     
     @staticmethod
-    def balance_teams(player_ids: list[int]) -> tuple[list[int], list[int]]:
-        shuffled = player_ids.copy()
-        random.shuffle(shuffled)
-        mid = len(shuffled) // 2
-        teams = shuffled[:mid], shuffled[mid:]
-        print(f"Team 1:")
-        for p in teams[0]:
-            print(f" - {p}")
-        print(f"Team 2:")
-        for p in teams[1]:
-            print(f" - {p}")
+    def balance_teams(
+        player_ids: list[int],
+        ratings: dict[int, float] | None = None,
+        parties: list[set[int]] | None = None,
+        roles: dict[int, str] | None = None,
+    ) -> tuple[list[int], list[int]]:
+        """Split players into the two teams with the smallest rating difference.
+
+        Every split is scored: |rating sum difference| plus ROLE_DUPLICATE_PENALTY
+        per duplicated role inside a team. Splits that break up a party are
+        skipped unless no split keeps every party together.
+        """
+        ratings = ratings or {}
+        values = [ratings.get(pid, DEFAULT_RATING) for pid in player_ids]
+        index_of = {pid: i for i, pid in enumerate(player_ids)}
+        party_indexes = [
+            [index_of[pid] for pid in party if pid in index_of]
+            for party in parties or []
+        ]
+        player_roles = [roles.get(pid) if roles else None for pid in player_ids]
+
+        total = sum(values)
+        best_score, best = None, []
+        for team1 in _splits(len(player_ids)):
+            if party_indexes and any(_splits_party(team1, party) for party in party_indexes):
+                continue
+            team1_sum = 0.0
+            for i in team1:
+                team1_sum += values[i]
+            score = abs(total - 2 * team1_sum)
+            if roles:
+                score += ROLE_DUPLICATE_PENALTY * _duplicate_roles(team1, player_roles)
+            if best_score is None or score < best_score:
+                best_score, best = score, [team1]
+            elif score == best_score:
+                best.append(team1)
+
+        if not best:
+            log("No split keeps every party together, balancing without parties")
+            return TeamBalancer.balance_teams(player_ids, ratings, None, roles)
+
+        # Equal splits are common with default ratings, vary who plays with whom
+        team1 = random.choice(best)
+        team1_set = set(team1)
+        teams = (
+            [player_ids[i] for i in team1],
+            [pid for i, pid in enumerate(player_ids) if i not in team1_set],
+        )
+        log(lambda: f"Balanced teams: rating difference {best_score:.0f}", level=DEBUG)
         return teams
+
+
+@lru_cache(maxsize=None)
+def _splits(player_count: int) -> tuple[frozenset[int], ...]:
+    """Every distinct team1 of size player_count // 2, player 0 is always on team1 to skip mirrors"""
+    team_size = player_count // 2
+    if player_count < 2:
+        return (frozenset(range(player_count)),)
+    return tuple(
+        frozenset((0, *rest))
+        for rest in combinations(range(1, player_count), team_size - 1)
+    )
+
+
+def _splits_party(team1: frozenset[int], party: list[int]) -> bool:
+    on_team1 = sum(1 for i in party if i in team1)
+    return 0 < on_team1 < len(party)
+
+
+def _duplicate_roles(team1: frozenset[int], roles: list[str | None]) -> int:
+    duplicates = 0
+    for in_team1 in (True, False):
+        seen = set()
+        for i, role in enumerate(roles):
+            if role is None or (i in team1) != in_team1:
+                continue
+            if role in seen:
+                duplicates += 1
+            seen.add(role)
+    return duplicates
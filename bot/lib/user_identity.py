@@ -0,0 +1,39 @@
+from bot.lib.constants import USER_IDENTITY_CACHE_SIZE
+from bot.lib.lru import LRUCache
+from bot.lib.metrics import Metrics
+
+
+class UserIdentities:
+    """Discord ID <-> Convex user ID, so known players cost no round trip.
+
+    A pair never changes once the user exists, so entries are never stale:
+    the two directions may evict independently, which only causes a miss.
+    Filled from the leaderboard load, every created match and every loaded
+    match context.
+    """
+
+    _user_by_discord: LRUCache[str, str] = LRUCache(USER_IDENTITY_CACHE_SIZE)
+    _discord_by_user: LRUCache[str, str] = LRUCache(USER_IDENTITY_CACHE_SIZE)
+
+    @staticmethod
+    def put(discord_id: str, user_id: str):
+        UserIdentities._user_by_discord.put(str(discord_id), user_id)
+        UserIdentities._discord_by_user.put(user_id, str(discord_id))
+
+    @staticmethod
+    def put_many(user_ids: dict[str, str]):
+        """Remember pairs given as Discord ID -> user ID, e.g. the userIds of a createMatch result"""
+        for discord_id, user_id in user_ids.items():
+            UserIdentities.put(discord_id, user_id)
+
+    @staticmethod
+    def user_id(discord_id: str) -> str | None:
+        user_id = UserIdentities._user_by_discord.get(str(discord_id))
+        Metrics.identity_lookups.inc("miss" if user_id is None else "hit")
+        return user_id
+
+    @staticmethod
+    def discord_id(user_id: str) -> str | None:
+        discord_id = UserIdentities._discord_by_user.get(user_id)
+        Metrics.identity_lookups.inc("miss" if discord_id is None else "hit")
+        return discord_id
@@ -1,6 +1,9 @@
 from enum import Enum
 from typing import Optional
-from bot.lib.log import log
+from bot.lib.constants import VETO_CACHE_SIZE
+from bot.lib.db.db import async_db
+from bot.lib.log import log, WARNING
+from bot.lib.lru import LRUCache
 
 
 class VetoAction(Enum):
@@ -52,6 +55,33 @@ class VetoStateMachine:
         else:
             raise ValueError(f"BO{best_of} veto not implemented yet")
     
+    @classmethod
+    def from_history(cls, match_id: str, best_of: int, history: list[dict]) -> "VetoStateMachine":
+        """Rebuild the state machine by replaying persisted veto rows in order.
+
+        Replay stops at a step without its map or side: such a row was left by
+        a failed write, and the team still has to make that choice.
+        """
+        veto = cls(match_id, best_of)
+        for step in sorted(history, key=lambda s: s["order"]):
+            choice = step.get("side") if step["action"] == "side_pick" else step.get("mapId")
+            if step["action"] in ("ban", "pick", "side_pick") and choice is None:
+                log(f"Match {match_id}: veto step {step['order']} ({step['action']}) has no selection, replay stops there",
+                    level=WARNING)
+                break
+            match step["action"]:
+                case "ban":
+                    valid = veto.ban_map(step["mapId"])
+                case "pick":
+                    valid = veto.pick_map(step["mapId"])
+                case "side_pick":
+                    valid = veto.pick_side(step["side"])
+                case _:
+                    continue
+            if not valid:
+                log(f"Match {match_id}: could not replay veto step {step['order']} ({step['action']})")
+        return veto
+
     def get_current_phase(self) -> Optional[VetoPhase]:
         """Get the current phase, or None if veto is complete"""
         if self.is_complete or self.current_order > len(self.sequence):
@@ -166,3 +196,24 @@ class VetoStateMachine:
             "picked_maps": self.picked_maps,
             "side_picks": self.side_picks,
         }
+
+
+class VetoStateCache:
+    """Bounded cache of live veto state machines, rebuilt from Convex on a miss"""
+
+    _states: LRUCache[str, VetoStateMachine] = LRUCache(VETO_CACHE_SIZE)
+
+    @staticmethod
+    async def get(match: dict) -> VetoStateMachine:
+        match_id = match["_id"]
+        veto = VetoStateCache._states.get(match_id)
+        if veto is None:
+            history = await async_db.vetos.list_by_match(match_id)
+            veto = VetoStateMachine.from_history(match_id, match["bestOf"], history)
+            VetoStateCache._states.put(match_id, veto)
+        return veto
+
+    @staticmethod
+    def evict(match_id: str):
+        """Drop a match's state, e.g. once it is finished or a write failed"""
+        _ = VetoStateCache._states.pop(match_id)
@@ -6,9 +6,15 @@ from dotenv import load_dotenv
 from bot.lib.exceptions import BotException
 from bot.lib.db.maps import MapsServiceImpl
 from bot.lib.log import log
+from bot.lib.metrics import Metrics
+from bot.lib.leaderboard import Leaderboards
+from bot.lib.player_queue import PlayerContext
+from bot.lib.resource_pool import ResourcePool
+from bot.lib.scheduler import Scheduler
 
 _ = load_dotenv(".env.local")
 
+CONVEX_BACKEND = os.getenv("CONVEX_BACKEND", "convex")
 CONVEX_URL = os.getenv("CONVEX_URL")
 DISCORD_BOT_TOKEN = os.getenv("DISCORD_BOT_TOKEN")
 DISCORD_MATCH_THREAD_CHANNEL_ID = os.getenv("DISCORD_MATCH_THREAD_CHANNEL_ID")
@@ -22,14 +28,38 @@ bot = commands.Bot(intents=intents, command_prefix="/")
 async def on_ready():
     _ = await bot.tree.sync()
     log(f"✅ Logged in as {bot.user}")
+    # Needs the gateway cache, so it starts once the bot is ready
+    ResourcePool.start(bot)
+
+async def setup_hook():
+    # Runs inside the bot's event loop, so background tasks outlive startup
+    try:
+        await Metrics.start()
+    except Exception as e:
+        log(f"Could not start the metrics endpoint: {e}")
+    Scheduler.start()
+    try:
+        await Scheduler.restore()
+    except Exception as e:
+        log(f"Could not restore scheduled timers: {e}")
+    await PlayerContext.restore()
+    Leaderboards.start()
+
+bot.setup_hook = setup_hook
 
 async def setup():
     await bot.load_extension("bot.commands.queue")
     await bot.load_extension("bot.commands.map")
+    await bot.load_extension("bot.commands.game")
     await bot.load_extension("bot.commands.leaderboard")
+    Metrics.instrument_commands(bot.tree)
 
 def validate():
-    for var in [ CONVEX_URL, DISCORD_BOT_TOKEN, DISCORD_MATCH_THREAD_CHANNEL_ID ]:
+    required = [ DISCORD_BOT_TOKEN, DISCORD_MATCH_THREAD_CHANNEL_ID ]
+    # The in-process fake backend needs no deployment
+    if CONVEX_BACKEND == "convex":
+        required.append(CONVEX_URL)
+    for var in required:
         if not var:
             raise BotException("BAD_PROJECT_CONFIGURATION")
 
@@ -37,6 +67,7 @@ def initialize_maps():
     isValid = MapsServiceImpl.validate()
     if not isValid:
         raise BotException("MAPS_VALIDATION_FAILED")
+    _ = MapsServiceImpl.load_catalogue()
 
 def main():
     validate()
@@ -0,0 +1,45 @@
+import { query } from "./_generated/server";
+import { paginationOptsValidator } from "convex/server";
+import { v } from "convex/values";
+
+// One page of rated players, used to materialize the leaderboards in the bot
+export const ratingsPage = query({
+  args: {
+    board: v.union(v.literal("alltime"), v.literal("seasonal")),
+    season: v.string(),
+    paginationOpts: paginationOptsValidator,
+  },
+  async handler(ctx, args) {
+    if (args.board === "alltime") {
+      const result = await ctx.db.query("users").paginate(args.paginationOpts);
+      return {
+        ...result,
+        page: result.page
+          .filter((user) => user.rating !== undefined)
+          .map((user) => ({
+            userId: user._id,
+            discordId: user.discordId,
+            username: user.username,
+            rating: user.rating,
+          })),
+      };
+    }
+
+    const result = await ctx.db
+      .query("seasonRatings")
+      .withIndex("by_season_userId", (q) => q.eq("season", args.season))
+      .paginate(args.paginationOpts);
+    const page = [];
+    for (const row of result.page) {
+      const user = await ctx.db.get(row.userId);
+      if (!user) continue;
+      page.push({
+        userId: user._id,
+        discordId: user.discordId,
+        username: user.username,
+        rating: row.rating,
+      });
+    }
+    return { ...result, page };
+  },
+});
@@ -31,11 +31,10 @@ export const getActive = query({
 export const getByName = query({
   args: { name: v.string() },
   async handler(ctx, args) {
-    const results = await ctx.db
+    return await ctx.db
       .query("maps")
-      .filter((q) => q.eq(q.field("name"), args.name))
-      .collect();
-    return results.length > 0 ? results[0] : null;
+      .withIndex("by_name", (q) => q.eq("name", args.name))
+      .first();
   },
 });
 
@@ -48,10 +47,10 @@ export const create = mutation({
   async handler(ctx, args) {
     const existing = await ctx.db
       .query("maps")
-      .filter((q) => q.eq(q.field("name"), args.name))
-      .collect();
+      .withIndex("by_name", (q) => q.eq("name", args.name))
+      .first();
 
-    if (existing.length > 0) {
+    if (existing) {
       throw new Error(`Map "${args.name}" already exists`);
     }
 
@@ -1,5 +1,19 @@
 import { mutation, query } from "./_generated/server";
 import { v } from "convex/values";
+import { Id } from "./_generated/dataModel";
+import { findOrCreateUser } from "./users";
+
+const RosterTeam = v.object({
+  name: v.string(),
+  captainDiscordId: v.string(),
+  hasFirstPick: v.boolean(),
+  players: v.array(
+    v.object({
+      discordId: v.string(),
+      username: v.string(),
+    }),
+  ),
+});
 
 export const findById = query({
   args: { matchId: v.id("matches") },
@@ -13,8 +27,39 @@ export const findByThreadId = query({
   async handler(ctx, args) {
     return await ctx.db
       .query("matches")
-      .filter((q) => q.eq(q.field("threadId"), args.threadId))
+      .withIndex("by_threadId", (q) => q.eq("threadId", args.threadId))
+      .first();
+  },
+});
+
+// Match, both teams, captains' Discord IDs and rosters for a match thread
+export const contextByThreadId = query({
+  args: { threadId: v.string() },
+  async handler(ctx, args) {
+    const match = await ctx.db
+      .query("matches")
+      .withIndex("by_threadId", (q) => q.eq("threadId", args.threadId))
       .first();
+    if (!match) return null;
+
+    const teams = [];
+    for (const teamId of [match.team1, match.team2]) {
+      const team = await ctx.db.get(teamId);
+      if (!team) throw new Error(`Team ${teamId} not found`);
+      const captain = await ctx.db.get(team.captainId);
+      const players = await ctx.db
+        .query("players")
+        .withIndex("by_teamId", (q) => q.eq("teamId", teamId))
+        .collect();
+      const roster = [];
+      for (const player of players) {
+        const user = await ctx.db.get(player.userId);
+        if (user) roster.push({ userId: user._id, discordId: user.discordId });
+      }
+      teams.push({ team, captainDiscordId: captain?.discordId ?? null, roster });
+    }
+
+    return { match, team1: teams[0], team2: teams[1] };
   },
 });
 
@@ -83,3 +128,91 @@ export const setScore = mutation({
     });
   },
 });
+
+// Creates users, both teams, the match, players and the BO1 decider in a
+// single transaction so a queue pop costs one round trip.
+export const createMatch = mutation({
+  args: {
+    team1: RosterTeam,
+    team2: RosterTeam,
+    bestOf: v.union(v.literal(1), v.literal(3), v.literal(5)),
+    updateTime: v.number(),
+  },
+  async handler(ctx, args) {
+    const userIds: Record<string, Id<"users">> = {};
+    for (const team of [args.team1, args.team2]) {
+      for (const player of team.players) {
+        userIds[player.discordId] = await findOrCreateUser(
+          ctx,
+          player.discordId,
+          player.username,
+        );
+      }
+    }
+
+    const teamIds = [];
+    for (const team of [args.team1, args.team2]) {
+      const captainId = userIds[team.captainDiscordId];
+      if (!captainId) {
+        throw new Error(`Captain ${team.captainDiscordId} is not in team "${team.name}"`);
+      }
+      teamIds.push(
+        await ctx.db.insert("teams", {
+          name: team.name,
+          captainId,
+          hasFirstPick: team.hasFirstPick,
+          updateTime: args.updateTime,
+        }),
+      );
+    }
+    const [team1Id, team2Id] = teamIds;
+
+    const matchId = await ctx.db.insert("matches", {
+      team1: team1Id,
+      team2: team2Id,
+      bestOf: args.bestOf,
+      status: "veto_phase",
+      updateTime: args.updateTime,
+    });
+
+    const playerIds = [];
+    for (const [teamId, team] of [[team1Id, args.team1], [team2Id, args.team2]] as const) {
+      for (const player of team.players) {
+        playerIds.push(
+          await ctx.db.insert("players", {
+            teamId,
+            userId: userIds[player.discordId],
+            updateTime: args.updateTime,
+          }),
+        );
+      }
+    }
+
+    // BO1: the decider map is chosen as soon as the match exists
+    let decider = null;
+    if (args.bestOf === 1) {
+      const activeMaps = await ctx.db
+        .query("maps")
+        .filter((q) => q.eq(q.field("isEnabled"), true))
+        .collect();
+      if (activeMaps.length > 0) {
+        const map = activeMaps[Math.floor(Math.random() * activeMaps.length)];
+        const vetoId = await ctx.db.insert("vetos", {
+          matchId,
+          teamId: team1Id,
+          action: "decider",
+          order: 1,
+          updateTime: args.updateTime,
+        });
+        await ctx.db.insert("mapSelections", {
+          vetoId,
+          mapId: map._id,
+          updateTime: args.updateTime,
+        });
+        decider = { vetoId, mapId: map._id, name: map.name };
+      }
+    }
+
+    return { matchId, team1Id, team2Id, userIds, playerIds, decider };
+  },
+});
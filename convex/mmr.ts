@@ -0,0 +1,131 @@
+import { mutation, query, MutationCtx } from "./_generated/server";
+import { paginationOptsValidator } from "convex/server";
+import { v } from "convex/values";
+import { Id } from "./_generated/dataModel";
+
+async function addSeasonDelta(
+  ctx: MutationCtx,
+  season: string,
+  userId: Id<"users">,
+  delta: number,
+  baseRating: number,
+  updateTime: number,
+) {
+  const row = await ctx.db
+    .query("seasonRatings")
+    .withIndex("by_season_userId", (q) => q.eq("season", season).eq("userId", userId))
+    .first();
+  if (row) {
+    await ctx.db.patch(row._id, { rating: row.rating + delta, updateTime });
+  } else {
+    await ctx.db.insert("seasonRatings", {
+      season,
+      userId,
+      rating: baseRating + delta,
+      updateTime,
+    });
+  }
+}
+
+// Writes every rating change of a match, the players' running ratings and
+// their season ratings in one transaction. Live updates carry only the delta,
+// which is added to the rating read here so concurrent matches of the same
+// player don't overwrite each other. Full replays set `replace` and pass the
+// replayed absolute rating instead. Re-applying a match is a no-op unless
+// `replace` is set, and a replaced match keeps the season it was first
+// applied in.
+export const applyMatch = mutation({
+  args: {
+    matchId: v.id("matches"),
+    updates: v.array(
+      v.object({
+        userId: v.id("users"),
+        delta: v.number(),
+        rating: v.optional(v.number()),
+      }),
+    ),
+    replace: v.optional(v.boolean()),
+    season: v.string(),
+    baseRating: v.number(),
+    updateTime: v.number(),
+  },
+  async handler(ctx, args) {
+    const existing = await ctx.db
+      .query("mmr")
+      .withIndex("by_matchId", (q) => q.eq("matchId", args.matchId))
+      .collect();
+
+    let season: string | undefined = args.season;
+    if (existing.length > 0) {
+      if (!args.replace) return { applied: false, ratings: [] };
+      season = existing[0].season;
+      for (const row of existing) {
+        if (row.season !== undefined) {
+          await addSeasonDelta(ctx, row.season, row.userId, -row.delta, args.baseRating, args.updateTime);
+        }
+        await ctx.db.delete(row._id);
+      }
+    }
+
+    const ratings = [];
+    for (const update of args.updates) {
+      let rating = update.rating;
+      if (rating === undefined) {
+        const user = await ctx.db.get(update.userId);
+        rating = Math.round(((user?.rating ?? args.baseRating) + update.delta) * 100) / 100;
+      }
+      await ctx.db.insert("mmr", {
+        matchId: args.matchId,
+        userId: update.userId,
+        delta: update.delta,
+        rating,
+        season,
+        updateTime: args.updateTime,
+      });
+      await ctx.db.patch(update.userId, {
+        rating,
+        updateTime: args.updateTime,
+      });
+      if (season !== undefined) {
+        await addSeasonDelta(ctx, season, update.userId, update.delta, args.baseRating, args.updateTime);
+      }
+      ratings.push({ userId: update.userId, delta: update.delta, rating });
+    }
+
+    return { applied: true, ratings };
+  },
+});
+
+// One page of finished matches in creation order with both rosters, for replays
+export const finishedMatchesPage = query({
+  args: { paginationOpts: paginationOptsValidator },
+  async handler(ctx, args) {
+    const result = await ctx.db
+      .query("matches")
+      .withIndex("by_status", (q) => q.eq("status", "finished"))
+      .paginate(args.paginationOpts);
+
+    const page = [];
+    for (const match of result.page) {
+      if (match.team1Score === undefined || match.team2Score === undefined) continue;
+
+      const rosters = [];
+      for (const teamId of [match.team1, match.team2]) {
+        const players = await ctx.db
+          .query("players")
+          .withIndex("by_teamId", (q) => q.eq("teamId", teamId))
+          .collect();
+        rosters.push(players.map((p) => p.userId));
+      }
+
+      page.push({
+        matchId: match._id,
+        team1Score: match.team1Score,
+        team2Score: match.team2Score,
+        team1: rosters[0],
+        team2: rosters[1],
+      });
+    }
+    return { ...result, page };
+  },
+});
@@ -17,3 +17,26 @@ export const create = mutation({
     return playerId;
   },
 });
+
+// Adds every user to the team in one transaction, returns player IDs in input order
+export const createMany = mutation({
+  args: {
+    teamId: v.id("teams"),
+    userIds: v.array(v.id("users")),
+    updateTime: v.number(),
+  },
+  async handler(ctx, args) {
+    const playerIds = [];
+    for (const userId of args.userIds) {
+      playerIds.push(
+        await ctx.db.insert("players", {
+          teamId: args.teamId,
+          userId,
+          updateTime: args.updateTime,
+        }),
+      );
+    }
+
+    return playerIds;
+  },
+});
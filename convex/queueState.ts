@@ -0,0 +1,105 @@
+import { mutation, query } from "./_generated/server";
+import { v } from "convex/values";
+
+const QueueEvent = v.object({
+  kind: v.union(
+    v.literal("join"),
+    v.literal("leave"),
+    v.literal("ready"),
+    v.literal("clear_ready"),
+  ),
+  discordId: v.optional(v.string()),
+  bestOf: v.optional(v.number()),
+});
+
+export const appendEvents = mutation({
+  args: {
+    lastSeq: v.number(),
+    events: v.array(QueueEvent),
+    updateTime: v.number(),
+  },
+  async handler(ctx, args) {
+    return await ctx.db.insert("queueJournal", {
+      lastSeq: args.lastSeq,
+      events: args.events,
+      updateTime: args.updateTime,
+    });
+  },
+});
+
+// Stores a full snapshot and drops every journal batch it already covers
+export const saveSnapshot = mutation({
+  args: {
+    seq: v.number(),
+    queues: v.array(
+      v.object({
+        bestOf: v.number(),
+        members: v.array(v.string()),
+        ready: v.array(v.string()),
+      }),
+    ),
+    updateTime: v.number(),
+  },
+  async handler(ctx, args) {
+    const snapshotId = await ctx.db.insert("queueSnapshots", {
+      seq: args.seq,
+      queues: args.queues,
+      updateTime: args.updateTime,
+    });
+
+    const oldSnapshots = await ctx.db
+      .query("queueSnapshots")
+      .withIndex("by_seq", (q) => q.lt("seq", args.seq))
+      .collect();
+    for (const snapshot of oldSnapshots) {
+      await ctx.db.delete(snapshot._id);
+    }
+
+    const covered = await ctx.db
+      .query("queueJournal")
+      .withIndex("by_lastSeq", (q) => q.lte("lastSeq", args.seq))
+      .collect();
+    for (const batch of covered) {
+      await ctx.db.delete(batch._id);
+    }
+
+    return snapshotId;
+  },
+});
+
+export const load = query({
+  args: {},
+  async handler(ctx) {
+    const snapshot = await ctx.db
+      .query("queueSnapshots")
+      .withIndex("by_seq")
+      .order("desc")
+      .first();
+    const fromSeq = snapshot ? snapshot.seq : 0;
+
+    const batches = await ctx.db
+      .query("queueJournal")
+      .withIndex("by_lastSeq", (q) => q.gt("lastSeq", fromSeq))
+      .collect();
+
+    return { snapshot, batches };
+  },
+});
+
+// Highest sequence number persisted in either table, 0 when nothing was written yet
+export const latestSeq = query({
+  args: {},
+  async handler(ctx) {
+    const snapshot = await ctx.db
+      .query("queueSnapshots")
+      .withIndex("by_seq")
+      .order("desc")
+      .first();
+    const batch = await ctx.db
+      .query("queueJournal")
+      .withIndex("by_lastSeq")
+      .order("desc")
+      .first();
+    return Math.max(snapshot?.seq ?? 0, batch?.lastSeq ?? 0);
+  },
+});
@@ -0,0 +1,133 @@
+import { defineSchema, defineTable } from "convex/server";
+import { v } from "convex/values";
+
+const BestOf = v.union(v.literal(1), v.literal(3), v.literal(5));
+
+export default defineSchema({
+  users: defineTable({
+    discordId: v.string(),
+    username: v.string(),
+    rating: v.optional(v.number()),
+    updateTime: v.number(),
+  }).index("by_discordId", ["discordId"]),
+  maps: defineTable({
+    name: v.string(),
+    isEnabled: v.boolean(),
+    updateTime: v.number(),
+  }).index("by_name", ["name"]),
+  teams: defineTable({
+    name: v.string(),
+    captainId: v.id("users"),
+    hasFirstPick: v.boolean(),
+    threadId: v.optional(v.string()),
+    voiceChannelId: v.optional(v.string()),
+    updateTime: v.number(),
+  }).index("by_threadId", ["threadId"]),
+  players: defineTable({
+    teamId: v.id("teams"),
+    userId: v.id("users"),
+    updateTime: v.number(),
+  })
+    .index("by_teamId", ["teamId"])
+    .index("by_userId", ["userId"]),
+  matches: defineTable({
+    team1: v.id("teams"),
+    team2: v.id("teams"),
+    bestOf: BestOf,
+    threadId: v.optional(v.string()),
+    status: v.union(
+      v.literal("veto_phase"),
+      v.literal("in_progress"),
+      v.literal("finished"),
+      v.literal("archived"),
+    ),
+    team1Score: v.optional(v.number()),
+    team2Score: v.optional(v.number()),
+    updateTime: v.number(),
+  })
+    .index("by_threadId", ["threadId"])
+    .index("by_status", ["status"]),
+  vetos: defineTable({
+    matchId: v.id("matches"),
+    teamId: v.id("teams"),
+    action: v.union(
+      v.literal("ban"),
+      v.literal("pick"),
+      v.literal("side_pick"),
+      v.literal("decider"),
+    ),
+    order: v.number(),
+    updateTime: v.number(),
+  })
+    .index("by_matchId", ["matchId"])
+    .index("by_teamId", ["teamId"]),
+  mapSelections: defineTable({
+    vetoId: v.id("vetos"),
+    mapId: v.id("maps"),
+    updateTime: v.number(),
+  }).index("by_vetoId", ["vetoId"]),
+  sideSelections: defineTable({
+    vetoId: v.id("vetos"),
+    side: v.union(v.literal("ATK"), v.literal("DEF")),
+    updateTime: v.number(),
+  }).index("by_vetoId", ["vetoId"]),
+  games: defineTable({
+    matchId: v.number(),
+    team1: v.number(),
+    team2: v.number(),
+    order: v.number(),
+    updateTime: v.number(),
+  }),
+  queueJournal: defineTable({
+    lastSeq: v.number(),
+    events: v.array(
+      v.object({
+        kind: v.union(
+          v.literal("join"),
+          v.literal("leave"),
+          v.literal("ready"),
+          v.literal("clear_ready"),
+        ),
+        discordId: v.optional(v.string()),
+        bestOf: v.optional(v.number()),
+      }),
+    ),
+    updateTime: v.number(),
+  }).index("by_lastSeq", ["lastSeq"]),
+  queueSnapshots: defineTable({
+    seq: v.number(),
+    queues: v.array(
+      v.object({
+        bestOf: v.number(),
+        members: v.array(v.string()),
+        ready: v.array(v.string()),
+      }),
+    ),
+    updateTime: v.number(),
+  }).index("by_seq", ["seq"]),
+  mmr: defineTable({
+    matchId: v.id("matches"),
+    userId: v.id("users"),
+    delta: v.number(),
+    rating: v.number(),
+    season: v.optional(v.string()),
+    updateTime: v.number(),
+  })
+    .index("by_matchId", ["matchId"])
+    .index("by_userId", ["userId"]),
+  seasonRatings: defineTable({
+    season: v.string(),
+    userId: v.id("users"),
+    rating: v.number(),
+    updateTime: v.number(),
+  }).index("by_season_userId", ["season", "userId"]),
+  timers: defineTable({
+    key: v.string(),
+    kind: v.string(),
+    dueAt: v.number(),
+    payload: v.any(),
+    updateTime: v.number(),
+  })
+    .index("by_key", ["key"])
+    .index("by_dueAt", ["dueAt"]),
+});
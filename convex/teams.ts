@@ -13,7 +13,7 @@ export const findByThreadId = query({
   async handler(ctx, args) {
     return await ctx.db
       .query("teams")
-      .filter((q) => q.eq(q.field("threadId"), args.threadId))
+      .withIndex("by_threadId", (q) => q.eq("threadId", args.threadId))
       .first();
   },
 });
@@ -0,0 +1,50 @@
+import { mutation, query } from "./_generated/server";
+import { v } from "convex/values";
+
+export const upsert = mutation({
+  args: {
+    key: v.string(),
+    kind: v.string(),
+    dueAt: v.number(),
+    payload: v.any(),
+    updateTime: v.number(),
+  },
+  async handler(ctx, args) {
+    const existing = await ctx.db
+      .query("timers")
+      .withIndex("by_key", (q) => q.eq("key", args.key))
+      .unique();
+    if (existing) {
+      await ctx.db.patch(existing._id, {
+        kind: args.kind,
+        dueAt: args.dueAt,
+        payload: args.payload,
+        updateTime: args.updateTime,
+      });
+      return existing._id;
+    }
+    return await ctx.db.insert("timers", args);
+  },
+});
+
+export const remove = mutation({
+  args: { key: v.string() },
+  async handler(ctx, args) {
+    const existing = await ctx.db
+      .query("timers")
+      .withIndex("by_key", (q) => q.eq("key", args.key))
+      .unique();
+    if (!existing) {
+      return false;
+    }
+    await ctx.db.delete(existing._id);
+    return true;
+  },
+});
+
+export const listAll = query({
+  args: {},
+  async handler(ctx) {
+    return await ctx.db.query("timers").withIndex("by_dueAt").collect();
+  },
+});
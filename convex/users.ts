@@ -1,5 +1,27 @@
-import { mutation, query } from "./_generated/server";
+import { mutation, query, MutationCtx } from "./_generated/server";
 import { v } from "convex/values";
+import { Id } from "./_generated/dataModel";
+
+export async function findOrCreateUser(
+  ctx: MutationCtx,
+  discordId: string,
+  username: string,
+) {
+  const existing = await ctx.db
+    .query("users")
+    .withIndex("by_discordId", (q) => q.eq("discordId", discordId))
+    .first();
+
+  if (existing) {
+    return existing._id;
+  }
+
+  return await ctx.db.insert("users", {
+    discordId,
+    username,
+    updateTime: Date.now(),
+  });
+}
 
 export const findById = query({
   args: { userId: v.id("users") },
@@ -13,32 +35,52 @@ export const findByDiscordId = query({
   async handler(ctx, args) {
     return await ctx.db
       .query("users")
-      .filter((q) => q.eq(q.field("discordId"), args.discordId))
+      .withIndex("by_discordId", (q) => q.eq("discordId", args.discordId))
       .first();
   },
 });
 
+// Stored rating per Discord ID, null for players who have none yet
+export const ratingsByDiscordIds = query({
+  args: { discordIds: v.array(v.string()) },
+  async handler(ctx, args) {
+    const ratings: Record<string, number | null> = {};
+    for (const discordId of args.discordIds) {
+      const user = await ctx.db
+        .query("users")
+        .withIndex("by_discordId", (q) => q.eq("discordId", discordId))
+        .first();
+      ratings[discordId] = user?.rating ?? null;
+    }
+    return ratings;
+  },
+});
+
 export const createOrFind = mutation({
   args: {
     discordId: v.string(),
     username: v.string(),
   },
   async handler(ctx, args) {
-    const existing = await ctx.db
-      .query("users")
-      .filter((q) => q.eq(q.field("discordId"), args.discordId))
-      .first();
+    return await findOrCreateUser(ctx, args.discordId, args.username);
+  },
+});
 
-    if (existing) {
-      return existing._id;
+// Upserts a batch of users in one transaction, returns user IDs keyed by Discord ID
+export const createOrFindMany = mutation({
+  args: {
+    users: v.array(
+      v.object({
+        discordId: v.string(),
+        username: v.string(),
+      }),
+    ),
+  },
+  async handler(ctx, args) {
+    const userIds: Record<string, Id<"users">> = {};
+    for (const user of args.users) {
+      userIds[user.discordId] = await findOrCreateUser(ctx, user.discordId, user.username);
     }
-
-    const newUserId = await ctx.db.insert("users", {
-      discordId: args.discordId,
-      username: args.username,
-      updateTime: Date.now(),
-    });
-
-    return newUserId;
+    return userIds;
   },
 });
@@ -1,11 +1,13 @@
 import { mutation, query } from "./_generated/server";
 import { v } from "convex/values";
 
+const VetoAction = v.union(v.literal("ban"), v.literal("pick"), v.literal("side_pick"), v.literal("decider"));
+
 export const create = mutation({
   args: {
     matchId: v.id("matches"),
     teamId: v.id("teams"),
-    action: v.union(v.literal("ban"), v.literal("pick"), v.literal("side_pick"), v.literal("decider")),
+    action: VetoAction,
     order: v.number(),
     updateTime: v.number(),
   },
@@ -22,6 +24,116 @@ export const create = mutation({
   },
 });
 
+// Records one ban, pick or side pick together with its map or side selection, so a
+// failure can never leave a veto row without the choice it stands for
+export const record = mutation({
+  args: {
+    matchId: v.id("matches"),
+    teamId: v.id("teams"),
+    action: v.union(v.literal("ban"), v.literal("pick"), v.literal("side_pick")),
+    order: v.number(),
+    mapId: v.optional(v.id("maps")),
+    side: v.optional(v.union(v.literal("ATK"), v.literal("DEF"))),
+    updateTime: v.number(),
+  },
+  async handler(ctx, args) {
+    if (args.action === "side_pick" ? !args.side : !args.mapId) {
+      throw new Error(`Veto ${args.action} needs a ${args.action === "side_pick" ? "side" : "map"}`);
+    }
+    const existing = await ctx.db
+      .query("vetos")
+      .withIndex("by_matchId", (q) => q.eq("matchId", args.matchId))
+      .filter((q) => q.eq(q.field("order"), args.order))
+      .first();
+    if (existing) {
+      // A row without a selection is a leftover of the old two-write path, replace it
+      const selection = await ctx.db
+        .query(existing.action === "side_pick" ? "sideSelections" : "mapSelections")
+        .withIndex("by_vetoId", (q) => q.eq("vetoId", existing._id))
+        .first();
+      if (selection) throw new Error(`Veto step ${args.order} already recorded`);
+      await ctx.db.delete(existing._id);
+    }
+
+    const vetoId = await ctx.db.insert("vetos", {
+      matchId: args.matchId,
+      teamId: args.teamId,
+      action: args.action,
+      order: args.order,
+      updateTime: args.updateTime,
+    });
+    const selectionId = args.action === "side_pick"
+      ? await ctx.db.insert("sideSelections", { vetoId, side: args.side!, updateTime: args.updateTime })
+      : await ctx.db.insert("mapSelections", { vetoId, mapId: args.mapId!, updateTime: args.updateTime });
+
+    return { vetoId, selectionId };
+  },
+});
+
+// Inserts a whole veto sequence in one transaction, returns veto IDs in input order
+export const createMany = mutation({
+  args: {
+    matchId: v.id("matches"),
+    vetos: v.array(
+      v.object({
+        teamId: v.id("teams"),
+        action: VetoAction,
+        order: v.number(),
+      }),
+    ),
+    updateTime: v.number(),
+  },
+  async handler(ctx, args) {
+    const vetoIds = [];
+    for (const veto of args.vetos) {
+      vetoIds.push(
+        await ctx.db.insert("vetos", {
+          matchId: args.matchId,
+          teamId: veto.teamId,
+          action: veto.action,
+          order: veto.order,
+          updateTime: args.updateTime,
+        }),
+      );
+    }
+
+    return vetoIds;
+  },
+});
+
+// Full veto history of a match with the selected map or side of each step
+export const listByMatch = query({
+  args: { matchId: v.id("matches") },
+  async handler(ctx, args) {
+    const vetos = await ctx.db
+      .query("vetos")
+      .withIndex("by_matchId", (q) => q.eq("matchId", args.matchId))
+      .collect();
+
+    const history = [];
+    for (const veto of vetos) {
+      const mapSelection = await ctx.db
+        .query("mapSelections")
+        .withIndex("by_vetoId", (q) => q.eq("vetoId", veto._id))
+        .first();
+      const sideSelection = await ctx.db
+        .query("sideSelections")
+        .withIndex("by_vetoId", (q) => q.eq("vetoId", veto._id))
+        .first();
+      history.push({
+        vetoId: veto._id,
+        teamId: veto.teamId,
+        action: veto.action,
+        order: veto.order,
+        mapId: mapSelection?.mapId ?? null,
+        side: sideSelection?.side ?? null,
+      });
+    }
+
+    return history.sort((a, b) => a.order - b.order);
+  },
+});
+
 export const nextStep = query({
   args: { matchId: v.id("matches") },
   async handler(ctx, args) {
@@ -30,14 +142,11 @@ export const nextStep = query({
     if (match.bestOf !== 3) return null;
 
     // Count existing vetos for this match
-    let count = 0;
-    const vetos = await ctx.db.query("vetos").withIndex("by_matchId", q => q.eq("matchId", args.matchId)).collect().catch(async () => {
-      // Fallback without index
-      const all = await ctx.db.query("vetos").collect();
-      return all.filter(v => v.matchId === args.matchId);
-    });
-    count = vetos.length;
-    const step = count + 1;
+    const vetos = await ctx.db
+      .query("vetos")
+      .withIndex("by_matchId", (q) => q.eq("matchId", args.matchId))
+      .collect();
+    const step = vetos.length + 1;
 
     // Fetch teams and determine who has first pick
     const team1 = await ctx.db.get(match.team1);